@@ -0,0 +1,48 @@
+""" Run the benchmark suite
+
+Examples::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --filter 'ixs_by_slices.*' --quick
+    python -m benchmarks --compare results.json --threshold 0.2
+"""
+import argparse
+import sys
+
+from . import (  # noqa: F401 (registering benchmarks)
+    aggregators,
+    concurrency,
+    harness,
+    server,
+    trackers,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', default='*', help="glob pattern for benchmark names")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes, single repeat")
+    parser.add_argument('--repeat', type=int, default=3, help="repeats, the best one counts")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="compare with results in this JSON file")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative difference considered a regression")
+    args = parser.parse_args()
+
+    results = harness.run(pattern=args.filter, quick=args.quick, repeat=args.repeat,
+                          report=lambda result: print(harness.format_result(result)))
+    if args.output:
+        harness.dump(results, args.output)
+    if args.compare:
+        worse = harness.regressions(results, harness.load(args.compare),
+                                    threshold=args.threshold)
+        for before, after in worse:
+            print("REGRESSION", harness.format_result(after), file=sys.stderr)
+            print("  baseline", harness.format_result(before), file=sys.stderr)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
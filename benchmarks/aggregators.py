@@ -0,0 +1,234 @@
+""" Throughput and memory of the aggregators as the number of indices and their range scale """
+import fractions
+import random
+import typing
+
+import numpy as np
+
+from slice_aggregator import (
+    ixs_by_slices,
+    offline,
+    slices_by_ixs,
+)
+from slice_aggregator.by_slices import FixedSizeAggregator
+
+from .harness import benchmark
+
+SIZES = dict(n=[10 ** 3, 10 ** 4, 10 ** 5], v=[10 ** 3, 10 ** 6, 10 ** 12],
+             distribution=['dense', 'sparse'])
+QUICK_SIZES = dict(n=[10 ** 3], v=[10 ** 3, 10 ** 12])
+
+
+def _ixs(n: int, v: int, distribution: str, seed: int = 0) -> typing.List[int]:
+    """ Random indices within (-v, v), dense ones come from a window of n around a random point """
+    rng = random.Random(seed)
+    if distribution == 'dense':
+        low = rng.randrange(-v, max(1 - v, v - n))
+        return [rng.randrange(low, low + min(n, 2 * v - 1)) for _ in range(n)]
+    return [rng.randrange(1 - v, v) for _ in range(n)]
+
+
+def _slices(n: int, v: int, distribution: str) -> typing.List[typing.Tuple[int, int]]:
+    return [tuple(sorted(pair)) for pair in zip(_ixs(n, v, distribution, 0),
+                                                _ixs(n, v, distribution, 1))]
+
+
+@benchmark('ixs_by_slices.inc', params=SIZES, quick_params=QUICK_SIZES, memory=True)
+def ixs_by_slices_inc(n: int, v: int, distribution: str):
+    ixs = _ixs(n, v, distribution)
+
+    def run():
+        a = ixs_by_slices()
+        for ix in ixs:
+            a.inc(ix, 1)
+    return run, n
+
+
+HOT_PARAMS = dict(buffer_size=[None, 1024], hot=[100, 10 ** 4], v=[10 ** 12], n=[10 ** 5])
+
+
+@benchmark('ixs_by_slices.inc_hot', params=HOT_PARAMS, quick_params=dict(n=[10 ** 4]))
+def ixs_by_slices_inc_hot(buffer_size: typing.Optional[int], hot: int, v: int, n: int):
+    """ Bursts of increments of a few hot indices, with a read every 1000 writes """
+    rng = random.Random(0)
+    hot_ixs = [rng.randrange(1 - v, v) for _ in range(hot)]
+    ixs = [rng.choice(hot_ixs) for _ in range(n)]
+
+    def run():
+        a = ixs_by_slices(buffer_size=buffer_size)
+        for i, ix in enumerate(ixs):
+            a.inc(ix, 1)
+            if i % 1000 == 999:
+                a.get(None, 0)
+    return run, n
+
+
+@benchmark('ixs_by_slices.get', params=SIZES, quick_params=QUICK_SIZES)
+def ixs_by_slices_get(n: int, v: int, distribution: str):
+    a = ixs_by_slices(items=[(ix, 1) for ix in _ixs(n, v, distribution)])
+    slices = _slices(n, v, distribution)
+
+    def run():
+        for start, stop in slices:
+            a.get(start, stop)
+    return run, n
+
+
+@benchmark('ixs_by_slices.set', params=SIZES, quick_params=QUICK_SIZES)
+def ixs_by_slices_set(n: int, v: int, distribution: str):
+    ixs = _ixs(n, v, distribution)
+    a = ixs_by_slices(items=[(ix, 1) for ix in ixs])
+
+    def run():
+        for value, ix in enumerate(ixs):
+            a.set(ix, value)
+    return run, n
+
+
+@benchmark('slices_by_ixs.inc', params=SIZES, quick_params=QUICK_SIZES, memory=True)
+def slices_by_ixs_inc(n: int, v: int, distribution: str):
+    slices = _slices(n, v, distribution)
+
+    def run():
+        a = slices_by_ixs()
+        for start, stop in slices:
+            a.inc(start, stop, 1)
+    return run, n
+
+
+@benchmark('slices_by_ixs.get', params=SIZES, quick_params=QUICK_SIZES)
+def slices_by_ixs_get(n: int, v: int, distribution: str):
+    a = slices_by_ixs(items=[(start, stop, 1) for start, stop in _slices(n, v, distribution)])
+    ixs = _ixs(n, v, distribution, 2)
+
+    def run():
+        for ix in ixs:
+            a.get(ix)
+    return run, n
+
+
+@benchmark('slices_by_ixs.replay', params=dict(engine=['offline', 'online'], n=[10 ** 5],
+                                               v=[10 ** 6, 10 ** 12]),
+           quick_params=dict(n=[10 ** 4], v=[10 ** 12]))
+def slices_by_ixs_replay(engine: str, n: int, v: int):
+    """ n slice increments followed by n point queries, counted together """
+    slices = _slices(n, v, 'sparse')
+    starts = [start for start, _ in slices]
+    stops = [stop for _, stop in slices]
+    values = [1] * n
+    ixs = _ixs(n, v, 'sparse', 2)
+
+    def run():
+        if engine == 'offline':
+            offline.slices_by_ixs(starts, stops, values, ixs)
+        else:
+            a = slices_by_ixs()
+            a.inc_many(starts, stops, values)
+            a.get_many(ixs)
+    return run, 2 * n
+
+
+@benchmark('FixedSizeAggregator.inc', params=dict(n=SIZES['n'], v=[10 ** 3, 10 ** 6]),
+           quick_params=dict(n=[10 ** 3], v=[10 ** 3]), memory=True)
+def fixed_size_inc(n: int, v: int):
+    rng = random.Random(0)
+    ixs = [rng.randrange(v) for _ in range(n)]
+
+    def run():
+        a = FixedSizeAggregator(table=[0] * v)
+        for ix in ixs:
+            a.inc(ix, 1)
+    return run, n
+
+
+@benchmark('FixedSizeAggregator.get', params=dict(n=SIZES['n'], v=[10 ** 3, 10 ** 6]),
+           quick_params=dict(n=[10 ** 3], v=[10 ** 3]))
+def fixed_size_get(n: int, v: int):
+    rng = random.Random(0)
+    a = FixedSizeAggregator.from_items([(rng.randrange(v), 1) for _ in range(n)], size=v)
+    slices = [tuple(sorted((rng.randrange(v), rng.randrange(v)))) for _ in range(n)]
+
+    def run():
+        for start, stop in slices:
+            a.get(start, stop)
+    return run, n
+
+
+def _numpy_zero():
+    return np.zeros(3)
+
+
+_NUMPY_ZERO = _numpy_zero()
+
+
+def _numpy_zero_test(value):
+    return np.array_equal(value, _NUMPY_ZERO)
+
+
+_VALUE_TYPES = {
+    'int': (dict(), lambda i: i % 7 - 3),
+    'float': (dict(), lambda i: i * 0.5),
+    'fraction': (dict(), lambda i: fractions.Fraction(i, 7)),
+    'numpy': (dict(zero_factory=_numpy_zero, zero_test=_numpy_zero_test),
+              lambda i: np.array([i, 0, 3.5])),
+    'vector': (dict(dim=3), lambda i: np.array([i, 0, 3.5])),
+}
+
+
+@benchmark('custom_values.inc', params=dict(value_type=sorted(_VALUE_TYPES), n=[10 ** 4]),
+           quick_params=dict(n=[10 ** 3]), memory=True)
+def custom_values_inc(value_type: str, n: int):
+    kwargs, make_value = _VALUE_TYPES[value_type]
+    ixs = _ixs(n, 10 ** 6, 'sparse')
+    values = [make_value(i) for i in range(n)]
+
+    def run():
+        a = ixs_by_slices(**kwargs)
+        for ix, value in zip(ixs, values):
+            a.inc(ix, value)
+    return run, n
+
+
+@benchmark('custom_values.get', params=dict(value_type=sorted(_VALUE_TYPES), n=[10 ** 4]),
+           quick_params=dict(n=[10 ** 3]))
+def custom_values_get(value_type: str, n: int):
+    kwargs, make_value = _VALUE_TYPES[value_type]
+    a = ixs_by_slices(items=[(ix, make_value(i))
+                             for i, ix in enumerate(_ixs(n, 10 ** 6, 'sparse'))], **kwargs)
+    slices = _slices(n, 10 ** 6, 'sparse')
+
+    def run():
+        for start, stop in slices:
+            a.get(start, stop)
+    return run, n
+
+
+_PATHS = {
+    'generic': dict(zero_factory=int),
+    'numeric': dict(),
+}
+
+
+@benchmark('fast_path.inc', params=dict(path=sorted(_PATHS), n=[10 ** 5]),
+           quick_params=dict(n=[10 ** 4]))
+def fast_path_inc(path: str, n: int):
+    """ The numeric fast path against the generic aggregator with the same values """
+    ixs = _ixs(n, 10 ** 12, 'sparse')
+
+    def run():
+        a = ixs_by_slices(**_PATHS[path])
+        for ix in ixs:
+            a.inc(ix, 1)
+    return run, n
+
+
+@benchmark('fast_path.get', params=dict(path=sorted(_PATHS), n=[10 ** 5]),
+           quick_params=dict(n=[10 ** 4]))
+def fast_path_get(path: str, n: int):
+    a = ixs_by_slices(items=[(ix, 1) for ix in _ixs(n, 10 ** 12, 'sparse')], **_PATHS[path])
+    slices = _slices(n, 10 ** 12, 'sparse')
+
+    def run():
+        for start, stop in slices:
+            a.get(start, stop)
+    return run, n
@@ -0,0 +1,49 @@
+""" Writes from many threads to a shared aggregator """
+import random
+import threading
+
+from slice_aggregator import ixs_by_slices
+from slice_aggregator.threadsafe import BySlicesAggregator
+
+from .harness import benchmark
+
+
+class _Locked:
+
+    def __init__(self, aggregator):
+        self.aggregator = aggregator
+        self.lock = threading.Lock()
+
+    def inc(self, ix, value):
+        with self.lock:
+            self.aggregator.inc(ix, value)
+
+    def get(self, start, stop):
+        with self.lock:
+            return self.aggregator.get(start, stop)
+
+
+@benchmark('concurrency.inc', params=dict(mode=['locked', 'buffered'], threads=[1, 2, 4, 8],
+                                          universe=[10 ** 3, 10 ** 6], ops=[40000]),
+           quick_params=dict(ops=[4000]))
+def inc(mode: str, threads: int, universe: int, ops: int):
+    """ Increment random indices from many threads, reading the total at the end """
+    rng = random.Random(0)
+    chunks = [[rng.randrange(universe) for _ in range(ops // threads)] for _ in range(threads)]
+
+    def run():
+        if mode == 'locked':
+            a = _Locked(ixs_by_slices())
+        else:
+            a = BySlicesAggregator(ixs_by_slices())
+
+        def write(ixs):
+            for ix in ixs:
+                a.inc(ix, 1)
+        workers = [threading.Thread(target=write, args=(chunk,)) for chunk in chunks]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        a.get(None, None)
+    return run, ops
@@ -0,0 +1,105 @@
+""" A minimal benchmark harness with machine-readable results """
+import collections
+import fnmatch
+import itertools
+import json
+import timeit
+import tracemalloc
+import typing
+
+Result = collections.namedtuple('Result', 'name params ops seconds ops_per_second peak_memory')
+
+_Benchmark = collections.namedtuple('_Benchmark', 'name setup params quick_params memory')
+
+_registry = []
+
+
+def benchmark(name: str, *, params: typing.Dict[str, typing.List[typing.Any]] = None,
+              quick_params: typing.Dict[str, typing.List[typing.Any]] = None,
+              memory: bool = False) -> typing.Callable:
+    """ Register a benchmark
+
+    The decorated function takes parameters from the grid and returns a pair of a callable
+    to measure and the number of operations it performs.
+
+    :param name: name of the benchmark
+    :param params: lists of values of parameters, the benchmark runs for their product
+    :param quick_params: parameters overriding ``params`` in the quick mode
+    :param memory: whether to measure peak memory allocated by the callable
+    """
+    def decorator(setup: typing.Callable) -> typing.Callable:
+        _registry.append(_Benchmark(name, setup, params or {}, quick_params or {}, memory))
+        return setup
+    return decorator
+
+
+def _grid(params: typing.Dict[str, typing.List[typing.Any]]
+          ) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    names = sorted(params)
+    for values in itertools.product(*(params[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def run(*, pattern: str = '*', quick: bool = False, repeat: int = 3,
+        report: typing.Callable[[Result], None] = None) -> typing.List[Result]:
+    """ Run the registered benchmarks with names matching the pattern """
+    results = []
+    for bench in _registry:
+        if not fnmatch.fnmatch(bench.name, pattern):
+            continue
+        params = dict(bench.params, **bench.quick_params) if quick else bench.params
+        for point in _grid(params):
+            fn, ops = bench.setup(**point)
+            seconds = min(timeit.repeat(fn, number=1, repeat=1 if quick else repeat))
+            peak_memory = None
+            if bench.memory:
+                tracemalloc.start()
+                try:
+                    fn()
+                    peak_memory = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            result = Result(bench.name, point, ops, seconds, ops / seconds, peak_memory)
+            results.append(result)
+            if report is not None:
+                report(result)
+    return results
+
+
+def _key(name: str, params: typing.Dict[str, typing.Any]) -> str:
+    return json.dumps([name, params], sort_keys=True)
+
+
+def dump(results: typing.List[Result], path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump([result._asdict() for result in results], f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> typing.List[Result]:
+    with open(path) as f:
+        return [Result(**result) for result in json.load(f)]
+
+
+def regressions(results: typing.List[Result], baseline: typing.List[Result], *,
+                threshold: float) -> typing.List[typing.Tuple[Result, Result]]:
+    """ Pairs of (baseline, current) results, where throughput or memory got worse """
+    baseline = {_key(result.name, result.params): result for result in baseline}
+    worse = []
+    for result in results:
+        before = baseline.get(_key(result.name, result.params))
+        if before is None:
+            continue
+        if result.ops_per_second < before.ops_per_second * (1 - threshold):
+            worse.append((before, result))
+        elif (result.peak_memory is not None and before.peak_memory is not None
+              and result.peak_memory > before.peak_memory * (1 + threshold)):
+            worse.append((before, result))
+    return worse
+
+
+def format_result(result: Result) -> str:
+    params = ' '.join('{}={}'.format(name, value) for name, value in sorted(result.params.items()))
+    memory = '' if result.peak_memory is None else '{:>10.1f} KiB'.format(
+        result.peak_memory / 1024)
+    return '{:<28} {:<56} {:>10.0f} ops/s{}'.format(result.name, params, result.ops_per_second,
+                                                    memory)
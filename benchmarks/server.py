@@ -0,0 +1,45 @@
+""" Throughput of the aggregation server with a blocking client """
+import os
+import random
+import tempfile
+
+from slice_aggregator import ixs_by_slices
+from slice_aggregator.server import (
+    Client,
+    Server,
+)
+
+from .harness import benchmark
+
+_addresses = {}
+
+
+def _address(transport: str):
+    """ A server shared by the benchmarks, running in a daemon thread """
+    if transport not in _addresses:
+        server = Server(default_factory=ixs_by_slices)
+        if transport == 'unix':
+            path = os.path.join(tempfile.mkdtemp(), 'server.sock')
+            _addresses[transport] = server.start_in_thread(path=path)
+        else:
+            _addresses[transport] = server.start_in_thread()
+    return _addresses[transport]
+
+
+@benchmark('server.inc', params=dict(transport=['unix', 'tcp'], batch=[1, 100, 10000],
+                                     ops=[100000]),
+           quick_params=dict(batch=[1, 1000], ops=[10000]))
+def inc(transport: str, batch: int, ops: int):
+    """ Increments of random indices sent in batches, with a read after every batch """
+    rng = random.Random(0)
+    ixs = [rng.randrange(-10 ** 6, 10 ** 6) for _ in range(ops)]
+    values = [1] * batch
+    client = Client(_address(transport))
+    name = 'inc-{}-{}'.format(batch, ops)
+
+    def run():
+        for start in range(0, ops, batch):
+            chunk = ixs[start:start + batch]
+            client.inc(name, chunk, values[:len(chunk)])
+        client.get(name, [None], [None])
+    return run, ops
@@ -0,0 +1,50 @@
+""" Trackers of non-zero indices on write-heavy workloads """
+import random
+
+from slice_aggregator import ixs_by_slices
+from slice_aggregator.bitmap import HierarchicalBitmap
+from slice_aggregator.heap import (
+    IndexedUniqueMaxHeap,
+    LazyMaxHeap,
+)
+
+from .harness import benchmark
+
+TRACKER_CLASSES = {cls.__name__: cls
+                   for cls in [IndexedUniqueMaxHeap, LazyMaxHeap, HierarchicalBitmap]}
+PARAMS = dict(tracker=sorted(TRACKER_CLASSES), universe=[10 ** 3, 10 ** 9], ops=[20000])
+QUICK_PARAMS = dict(ops=[2000])
+
+
+@benchmark('trackers.churn', params=PARAMS, quick_params=QUICK_PARAMS)
+def churn(tracker: str, universe: int, ops: int):
+    """ Add and remove random values, reading the maximum after every write """
+    tracker_class = TRACKER_CLASSES[tracker]
+    rng = random.Random(0)
+    values = [rng.randrange(universe) for _ in range(ops)]
+    removals = [rng.random() < 0.5 for _ in range(ops)]
+
+    def run():
+        t = tracker_class()
+        for value, removal in zip(values, removals):
+            if removal:
+                t.remove(value)
+            else:
+                t.add(value)
+            t.max()
+    return run, ops
+
+
+@benchmark('trackers.aggregator_writes', params=PARAMS, quick_params=QUICK_PARAMS)
+def aggregator_writes(tracker: str, universe: int, ops: int):
+    """ Increment and decrement random indices of an aggregator """
+    tracker_class = TRACKER_CLASSES[tracker]
+    rng = random.Random(0)
+    ixs = [rng.randrange(-universe, universe) for _ in range(ops)]
+    values = [rng.choice((-1, 1)) for _ in range(ops)]
+
+    def run():
+        a = ixs_by_slices(tracker_class=tracker_class)
+        for ix, value in zip(ixs, values):
+            a.inc(ix, value)
+    return run, ops
@@ -37,8 +37,11 @@ setup(
         'Source': 'https://github.com/bm371613/slice-aggregator/',
         'Tracker': 'https://github.com/bm371613/slice-aggregator/issues',
     },
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['benchmarks', 'tests']),
     python_requires=">=3.5",
+    extras_require={
+        'numpy': ['numpy'],
+    },
     setup_requires=['pytest-runner'],
     tests_require=tests_require,
 )
@@ -1,7 +1,15 @@
+import functools
+import typing
+
 from . import (
     __about__ as about,
+    buffered,
     by_ixs,
     by_slices,
+    heap,
+    monoid,
+    multidim,
+    ranges,
 )
 
 V = by_slices.V
@@ -9,29 +17,189 @@ ZF = by_slices.ZF
 ZT = by_slices.ZT
 
 
-def ixs_by_slices(*, zero_factory: ZF = None, zero_test: ZT = None) -> by_slices.Aggregator[V]:
+def _left_bounded(*, zero_factory: ZF, zero_test: ZT, typecode: typing.Optional[str],
+                  dim: typing.Optional[int] = None, dtype: typing.Any = None,
+                  **kwargs: typing.Any) -> typing.Tuple[typing.Type, typing.Dict[str, typing.Any]]:
+    if dim is not None:
+        if zero_factory is not None or zero_test is not None or typecode is not None:
+            raise ValueError("dim can't be combined with zero_factory, zero_test or typecode")
+        from . import vectorized  # requires NumPy
+        kwargs['dim'] = dim
+        if dtype is not None:
+            kwargs['dtype'] = dtype
+        return vectorized.VectorLeftBoundedAggregator, kwargs
+    if dtype is not None:
+        raise ValueError("dtype is only used with dim")
+    if typecode is None:
+        if zero_factory is None and zero_test is None:
+            return by_slices.NumericLeftBoundedAggregator, kwargs
+        if zero_factory is not None:
+            kwargs['zero_factory'] = zero_factory
+        if zero_test is not None:
+            kwargs['zero_test'] = zero_test
+        return by_slices.VariableSizeLeftBoundedAggregator, kwargs
+    if zero_factory is not None or zero_test is not None:
+        raise ValueError("typecode can't be combined with zero_factory or zero_test")
+    kwargs['typecode'] = typecode
+    return by_slices.ArrayLeftBoundedAggregator, kwargs
+
+
+def ixs_by_slices(*, zero_factory: ZF = None, zero_test: ZT = None,
+                  items: typing.Iterable[typing.Tuple[int, V]] = None,
+                  track_points: bool = True,
+                  tracker_class: typing.Type = heap.IndexedUniqueMaxHeap,
+                  typecode: str = None, buffer_size: int = None, dim: int = None,
+                  dtype: typing.Any = None) -> by_slices.Aggregator[V]:
     """ Returns an object that allows assigning values to indices and aggregating them by slices
 
     :param zero_factory: callable returning additive identity
     :param zero_test: test for equality to zero
+        (without it and ``zero_factory`` values are numbers, handled by a faster,
+        specialized aggregator)
+    :param items: initial ``(ix, value)`` pairs, much faster than incrementing one by one
+    :param track_points: keep values assigned to indices for faster writes and point reads,
+        at the cost of more memory
+    :param tracker_class: the class tracking indices with non-zero values assigned
+    :param typecode: store numbers in arrays of this :mod:`array` typecode (like ``'d'``
+        or ``'q'``) instead of dicts, which takes much less memory for fairly dense indices
+    :param buffer_size: collect increments of up to that many indices in a buffer applied
+        in batches, see :class:`slice_aggregator.buffered.BufferedAggregator`
+    :param dim: values are NumPy vectors of this length, kept as rows of 2-D arrays,
+        see :class:`slice_aggregator.vectorized.VectorLeftBoundedAggregator`
+    :param dtype: the data type of the vectors, float by default
     :return: a new instance of :class:`slice_aggregator.by_slices.Aggregator`
     """
-    return by_slices.UnboundedAggregator(
-        negative=by_slices.VariableSizeLeftBoundedAggregator(zero_factory=zero_factory,
-                                                             zero_test=zero_test),
-        nonnegative=by_slices.VariableSizeLeftBoundedAggregator(zero_factory=zero_factory,
-                                                                zero_test=zero_test),
-    )
+    left_bounded_class, kwargs = _left_bounded(
+        zero_factory=zero_factory, zero_test=zero_test, typecode=typecode, dim=dim, dtype=dtype,
+        track_points=track_points, tracker_class=tracker_class)
+    if items is not None:
+        aggregator = by_slices.UnboundedAggregator.from_items(
+            items, left_bounded_class=left_bounded_class, **kwargs)
+    else:
+        aggregator = by_slices.UnboundedAggregator(
+            negative=left_bounded_class(**kwargs),
+            nonnegative=left_bounded_class(**kwargs),
+        )
+    if buffer_size is not None:
+        aggregator = buffered.BufferedAggregator(aggregator, max_buffered=buffer_size)
+    return aggregator
 
 
-def slices_by_ixs(*, zero_factory: ZF = None, zero_test: ZT = None) -> by_ixs.Aggregator[V]:
+def slices_by_ixs(*, zero_factory: ZF = None, zero_test: ZT = None,
+                  items: typing.Iterable[typing.Tuple[typing.Optional[int], typing.Optional[int],
+                                                      V]] = None,
+                  track_points: bool = True,
+                  tracker_class: typing.Type = heap.IndexedUniqueMaxHeap,
+                  typecode: str = None, buffer_size: int = None, dim: int = None,
+                  dtype: typing.Any = None) -> by_ixs.Aggregator[V]:
     """ Returns an object that allows assigning values to slices and aggregating them by indices
 
     :param zero_factory: callable returning additive identity
     :param zero_test: test for equality to zero
+        (without it and ``zero_factory`` values are numbers, handled by a faster,
+        specialized aggregator)
+    :param items: initial ``(start, stop, value)`` triples, much faster than incrementing
+        one by one
+    :param track_points: keep values assigned to slice endpoints for faster writes,
+        at the cost of more memory
+    :param tracker_class: the class tracking slice endpoints with non-zero values assigned
+    :param typecode: store numbers in arrays of this :mod:`array` typecode (like ``'d'``
+        or ``'q'``) instead of dicts
+    :param buffer_size: collect increments of up to that many slice endpoints in a buffer
+        applied in batches, see :class:`slice_aggregator.buffered.BufferedAggregator`
+    :param dim: values are NumPy vectors of this length, kept as rows of 2-D arrays
+    :param dtype: the data type of the vectors, float by default
     :return: a new instance of :class:`slice_aggregator.by_ixs.Aggregator`
     """
+    if items is not None:
+        left_bounded_class, kwargs = _left_bounded(
+            zero_factory=zero_factory, zero_test=zero_test, typecode=typecode, dim=dim,
+            dtype=dtype, track_points=track_points, tracker_class=tracker_class)
+        aggregator = by_ixs.Aggregator.from_items(items, left_bounded_class=left_bounded_class,
+                                                  **kwargs)
+        if buffer_size is not None:
+            aggregator.dual = buffered.BufferedAggregator(aggregator.dual,
+                                                          max_buffered=buffer_size)
+        return aggregator
     return by_ixs.Aggregator(
-        dual=ixs_by_slices(zero_factory=zero_factory, zero_test=zero_test),
+        dual=ixs_by_slices(zero_factory=zero_factory, zero_test=zero_test,
+                           track_points=track_points, tracker_class=tracker_class,
+                           typecode=typecode, buffer_size=buffer_size, dim=dim, dtype=dtype),
+        zero_factory=zero_factory,
+    )
+
+
+def ixs_by_slices_monoid(operation: monoid.OP, identity: V, *, identity_test: ZT = None,
+                         items: typing.Iterable[typing.Tuple[int, V]] = None,
+                         lazy: bool = False, power: monoid.POWER = None
+                         ) -> by_slices.Aggregator[V]:
+    """ Returns an object that allows assigning values to indices and aggregating them by slices
+    with any associative operation with an identity, like ``max``
+
+    Values can't be subtracted, so :meth:`inc` combines the value assigned to an index
+    with another one and :meth:`dec` isn't supported.
+
+    :param operation: an associative operation combining two values, it must not modify them
+    :param identity: the value such that combining with it doesn't change other values
+    :param identity_test: test for equality to the identity
+    :param items: initial ``(ix, value)`` pairs, combined with ``operation``
+    :param lazy: also allow assigning a value to all indices of a slice at once,
+        like ``a[start:stop] = value``
+    :param power: for ``lazy``, computes the value combined with itself ``n`` times
+    :return: a new instance of :class:`slice_aggregator.monoid.SegmentTreeAggregator`
+        or, if ``lazy``, :class:`slice_aggregator.monoid.LazySegmentTreeAggregator`
+    """
+    if lazy:
+        aggregator = monoid.LazySegmentTreeAggregator(
+            operation=operation, identity=identity, identity_test=identity_test, power=power)
+    elif power is not None:
+        raise ValueError("power is only used with lazy")
+    else:
+        aggregator = monoid.SegmentTreeAggregator(
+            operation=operation, identity=identity, identity_test=identity_test)
+    for ix, value in items or ():
+        aggregator.inc(ix, value)
+    return aggregator
+
+
+def slices_by_slices(*, zero_factory: ZF = None, zero_test: ZT = None,
+                     track_points: bool = True,
+                     tracker_class: typing.Type = heap.IndexedUniqueMaxHeap,
+                     ) -> ranges.Aggregator[V]:
+    """ Returns an object that allows assigning values to slices and aggregating them by slices
+
+    Values have to support multiplication by integers.
+
+    :param zero_factory: callable returning additive identity
+    :param zero_test: test for equality to zero
+    :param track_points: keep values assigned to slice endpoints for faster writes,
+        at the cost of more memory
+    :param tracker_class: the class tracking slice endpoints with non-zero values assigned
+    :return: a new instance of :class:`slice_aggregator.ranges.Aggregator`
+    """
+    kwargs = dict(zero_factory=zero_factory, zero_test=zero_test, track_points=track_points,
+                  tracker_class=tracker_class)
+    return ranges.Aggregator(
+        slopes=ixs_by_slices(**kwargs),
+        intercepts=ixs_by_slices(**kwargs),
+        zero_factory=zero_factory,
+        zero_test=zero_test,
+    )
+
+
+def ixs_by_boxes(ndim: int, *, zero_factory: ZF = None,
+                 zero_test: ZT = None) -> multidim.Aggregator[V]:
+    """ Returns an object that allows assigning values to points and aggregating them by boxes
+
+    :param ndim: the number of dimensions
+    :param zero_factory: callable returning additive identity
+    :param zero_test: test for equality to zero
+    :return: a new instance of :class:`slice_aggregator.multidim.Aggregator`
+    """
+    return multidim.UnboundedAggregator(
+        ndim=ndim,
+        left_bounded_factory=functools.partial(
+            multidim.VariableSizeLeftBoundedAggregator,
+            ndim=ndim, zero_factory=zero_factory, zero_test=zero_test),
         zero_factory=zero_factory,
     )
@@ -0,0 +1,83 @@
+import typing
+
+WORD_BITS = 64
+_WORD_SHIFT = 6
+
+
+class HierarchicalBitmap:
+    """ A set of nonnegative integers, tracking its maximum
+
+    Level ``k`` maps word indices to words, where bits of words on level 0 represent the elements
+    and bits of words on higher levels represent non-zero words on the level below.
+    The top level has at most one word, so adding, removing and finding the maximum
+    take ``O(log v / log w)`` operations on words, where ``v`` is the maximum and ``w`` is
+    the word size.
+    """
+
+    def __init__(self):
+        self.levels = [{}]
+        self.size = 0
+
+    @classmethod
+    def from_iterable(cls, values: typing.Iterable[int]) -> 'HierarchicalBitmap':
+        """ Build a bitmap of the values """
+        bitmap = cls()
+        for value in values:
+            bitmap.add(value)
+        return bitmap
+
+    def _grow(self, value: int) -> None:
+        while value >> (_WORD_SHIFT * len(self.levels)):
+            self.levels.append({0: 1} if self.levels[-1] else {})
+
+    def add(self, value: int) -> None:
+        if value < 0:
+            raise ValueError("Only nonnegative integers are supported")
+        if value in self:
+            return
+        self._grow(value)
+        self.size += 1
+        for level in self.levels:
+            key = value >> _WORD_SHIFT
+            word = level.get(key, 0)
+            level[key] = word | (1 << (value & (WORD_BITS - 1)))
+            if word:
+                break
+            value = key
+
+    def remove(self, value: int) -> None:
+        if value not in self:
+            return
+        self.size -= 1
+        for level in self.levels:
+            key = value >> _WORD_SHIFT
+            word = level[key] & ~(1 << (value & (WORD_BITS - 1)))
+            if word:
+                level[key] = word
+                break
+            del level[key]
+            value = key
+
+    def max(self) -> int:
+        if not self.size:
+            return None
+        result = 0
+        for level in reversed(self.levels):
+            result = (result << _WORD_SHIFT) + level[result].bit_length() - 1
+        return result
+
+    def __contains__(self, value: int) -> bool:
+        if value < 0:
+            return False
+        word = self.levels[0].get(value >> _WORD_SHIFT, 0)
+        return bool(word >> (value & (WORD_BITS - 1)) & 1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> typing.Iterator[int]:
+        for key, word in self.levels[0].items():
+            while word:
+                bit = word.bit_length() - 1
+                yield (key << _WORD_SHIFT) + bit
+                word ^= 1 << bit
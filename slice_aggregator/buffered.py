@@ -0,0 +1,117 @@
+import typing
+
+from . import by_slices
+from .by_slices import (
+    V,
+    _check_same_length,
+)
+
+
+class _WriteBuffer:
+    """ Values added to keys, like indices or slices, summed up per key until applied """
+
+    def __init__(self):
+        self.data = {}
+
+    def add(self, key: typing.Hashable, value: V) -> int:
+        """ Add a value to a key
+
+        :return: the number of buffered keys
+        """
+        data = self.data
+        data[key] = data[key] + value if key in data else value
+        return len(data)
+
+    def take(self) -> typing.Dict[typing.Hashable, V]:
+        """ Remove and return all buffered values """
+        data, self.data = self.data, {}
+        return data
+
+    def apply(self, function: typing.Callable[[typing.Dict[typing.Hashable, V]], None]) -> None:
+        """ Pass the buffered values to a function and remove them, unless it raises """
+        if self.data:
+            function(self.data)
+            self.data = {}
+
+
+class BufferedAggregator(by_slices.Aggregator):
+    """ An aggregator collecting increments in a dict and applying them in batches
+
+    Repeated increments of the same index between reads cost a single dict update.
+    The buffer is applied to the wrapped aggregator with one :meth:`inc_many` on every read,
+    when it holds ``max_buffered`` indices, and on :meth:`flush`. If applying the buffer
+    raises, like for an index out of range, the buffered writes are kept.
+    Only :meth:`inc`, :meth:`dec` and :meth:`inc_many` are buffered, the slice syntax reads
+    the current value first, so it flushes the buffer every time.
+
+    :param aggregator: the wrapped aggregator
+    :param max_buffered: the number of buffered indices triggering a flush
+    """
+
+    def __init__(self, aggregator: by_slices.Aggregator, *, max_buffered: int = 1024):
+        self.aggregator = aggregator
+        self.max_buffered = max_buffered
+        self.buffer = _WriteBuffer()
+
+    def _apply(self, data: typing.Dict[int, V]) -> None:
+        self.aggregator.inc_many(list(data), list(data.values()))
+
+    def flush(self) -> None:
+        self.buffer.apply(self._apply)
+
+    def inc(self, ix: int, value: V) -> None:
+        if self.buffer.add(ix, value) >= self.max_buffered:
+            self.flush()
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[V]) -> None:
+        _check_same_length(ixs, values)
+        for ix, value in zip(ixs, values):
+            self.inc(int(ix), value)
+
+    def set(self, ix: int, value: V) -> None:
+        self.flush()
+        self.aggregator.set(ix, value)
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        self.flush()
+        return self.aggregator.get(start, stop)
+
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> typing.List[V]:
+        self.flush()
+        return self.aggregator.get_many(starts, stops)
+
+    def _find_many(self, targets: typing.Sequence[V], strict: bool
+                   ) -> typing.List[typing.Optional[int]]:
+        self.flush()
+        return self.aggregator._find_many(targets, strict)
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        self.flush()
+        return self.aggregator._nonzero_bounds()
+
+    def _iter_range(self, start: int, stop: int) -> typing.Iterator[typing.Tuple[int, V]]:
+        self.flush()
+        return self.aggregator._iter_range(start, stop)
+
+    def _is_zero(self, value: V) -> bool:
+        return self.aggregator._is_zero(value)
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        self.flush()
+        return self.aggregator.nonzero_items()
+
+    def _get_point(self, ix: int) -> V:
+        self.flush()
+        return self.aggregator._get_point(ix)
+
+    def merge(self, other: by_slices.Aggregator) -> None:
+        self.flush()
+        if isinstance(other, BufferedAggregator):
+            other.flush()
+            other = other.aggregator
+        self.aggregator.merge(other)
+
+    def snapshot(self) -> by_slices.Aggregator:
+        self.flush()
+        return self.aggregator.snapshot()
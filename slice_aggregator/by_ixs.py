@@ -1,22 +1,68 @@
-import collections
 import typing
 
 from .by_slices import (
     Aggregator as Dual,
+    UnboundedAggregator,
     V,
     ZF,
+    _check_same_length,
+    _default_zero,
+    _ix_or_none,
 )
 
+
+def _dual_increments(starts: typing.Sequence[typing.Optional[int]],
+                     stops: typing.Sequence[typing.Optional[int]], values: typing.Sequence[V]
+                     ) -> typing.Tuple[typing.List[int], typing.List[V], typing.Optional[V]]:
+    """ Translate increments of slices into increments of the dual and of the value offset """
+    _check_same_length(starts, stops)
+    _check_same_length(starts, values)
+    dual_ixs = []
+    dual_values = []
+    value_offset = None
+    for start, stop, value in zip(starts, stops, values):
+        start = _ix_or_none(start)
+        stop = _ix_or_none(stop)
+        if start is not None and stop is not None and start > stop:
+            raise ValueError("start > stop")
+        if start is None:
+            if stop is None:
+                value_offset = value if value_offset is None else value_offset + value
+            else:
+                dual_ixs.append(stop - 1)
+                dual_values.append(value)
+        elif stop is None:
+            dual_ixs.append(start - 1)
+            dual_values.append(-value)
+            value_offset = value if value_offset is None else value_offset + value
+        elif start < stop:
+            dual_ixs.append(start - 1)
+            dual_values.append(-value)
+            dual_ixs.append(stop - 1)
+            dual_values.append(value)
+    return dual_ixs, dual_values, value_offset
+
+
 _ASSIGNED_GUARD = object()
 
 
-class _InplaceAddHelper(collections.namedtuple("_InplaceAddHelper", "callback")):
+class _SliceProxy:
+    """ The result of slicing, applying ``+=`` and ``-=`` to the slice """
+    __slots__ = ('aggregator', 'start', 'stop')
+
+    def __init__(self, aggregator: 'Aggregator', start: typing.Optional[int],
+                 stop: typing.Optional[int]):
+        self.aggregator = aggregator
+        self.start = start
+        self.stop = stop
 
     def __iadd__(self, value: V) -> typing.Any:
-        return self.callback(value)
+        self.aggregator.inc(self.start, self.stop, value)
+        return _ASSIGNED_GUARD
 
     def __isub__(self, value: V) -> typing.Any:
-        return self.callback(-value)
+        self.aggregator.dec(self.start, self.stop, value)
+        return _ASSIGNED_GUARD
 
 
 class Aggregator(typing.Generic[V]):
@@ -31,11 +77,36 @@ class Aggregator(typing.Generic[V]):
 
     def __init__(self, *, dual: Dual, zero_factory: ZF = None):
         self.dual = dual
-        self.value_offset = 0 if zero_factory is None else zero_factory()
+        self.zero_factory = zero_factory if zero_factory is not None else _default_zero
+        self.value_offset = self.zero_factory()
+
+    @classmethod
+    def from_items(cls, items: typing.Iterable[typing.Tuple[typing.Optional[int],
+                                                            typing.Optional[int], V]],
+                   *, zero_factory: ZF = None, **kwargs: typing.Any) -> 'Aggregator':
+        """ Build an aggregator from ``(start, stop, value)`` triples
+
+        The underlying aggregator is built with
+        :meth:`slice_aggregator.by_slices.UnboundedAggregator.from_items`,
+        which also takes the keyword arguments.
+        """
+        items = list(items)
+        dual_ixs, dual_values, value_offset = _dual_increments(
+            [start for start, _, _ in items], [stop for _, stop, _ in items],
+            [value for _, _, value in items])
+        if zero_factory is not None:
+            kwargs['zero_factory'] = zero_factory
+        aggregator = cls(
+            dual=UnboundedAggregator.from_items(zip(dual_ixs, dual_values), **kwargs),
+            zero_factory=zero_factory,
+        )
+        if value_offset is not None:
+            aggregator.value_offset += value_offset
+        return aggregator
 
     def get(self, ix: int) -> V:
         """ Get the aggregated value of all slices containing the specified index """
-        return self.dual[ix:] + self.value_offset
+        return self.dual.get(ix, None) + self.value_offset
 
     def inc(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
         """ Increment the value assigned to a slice """
@@ -43,13 +114,12 @@ class Aggregator(typing.Generic[V]):
             if stop is None:
                 self.value_offset += value
             else:
-                self.dual[stop - 1] += value
+                self.dual.inc(stop - 1, value)
         elif stop is None:
-            self.dual[start - 1] -= value
+            self.dual.dec(start - 1, value)
             self.value_offset += value
         elif start < stop:
-            self.dual[start - 1] -= value
-            self.dual[stop - 1] += value
+            self.dual._inc_pair(start - 1, stop - 1, value)
         elif start > stop:
             raise ValueError("start > stop")
 
@@ -57,19 +127,130 @@ class Aggregator(typing.Generic[V]):
         """ Decrement the value assigned to a slice """
         self.inc(start, stop, -value)
 
-    def _inplace_add_callback(self, start: typing.Optional[int], stop: typing.Optional[int],
-                              value: V) -> typing.Any:
-        self.inc(start, stop, value)
-        return _ASSIGNED_GUARD
+    def get_many(self, ixs: typing.Sequence[int]) -> typing.List[V]:
+        """ Get the aggregated values of all slices containing each of the specified indices """
+        return [value + self.value_offset for value in self.dual.get_many(ixs, [None] * len(ixs))]
+
+    def inc_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]], values: typing.Sequence[V]) -> None:
+        """ Increment the values assigned to many slices at once """
+        dual_ixs, dual_values, value_offset = _dual_increments(starts, stops, values)
+        self.dual.inc_many(dual_ixs, dual_values)
+        if value_offset is not None:
+            self.value_offset += value_offset
+
+    def iter_range(self, start: typing.Optional[int] = None, stop: typing.Optional[int] = None
+                   ) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices of a slice and aggregated values of slices containing them,
+        in increasing order
+
+        Missing ends default to the smallest and the largest slice endpoint, inclusive,
+        so values change only within that range: values before it are all the same
+        and values after it are the same as at its end. Only the first value takes a full query,
+        every next one differs by the value assigned to a single endpoint.
+        """
+        if start is None or stop is None:
+            bounds = self.dual._nonzero_bounds()
+            if bounds is None:
+                return
+            # the dual has the value of a slice endpoint one index before it
+            start = bounds[0] + 1 if start is None else start
+            stop = bounds[1] + 2 if stop is None else stop
+        if start >= stop:
+            return
+        value = self.get(start)
+        yield start, value
+        for ix, point in self.dual.iter_range(start, stop - 1):
+            value = value - point
+            yield ix + 1, value
 
-    def __getitem__(self, item: typing.Union[int, slice]) -> typing.Union[V, _InplaceAddHelper]:
+    def items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over all indices from the smallest to the largest slice endpoint, inclusive,
+        and aggregated values of slices containing them
+        """
+        return self.iter_range()
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Like :meth:`items`, but skipping indices with zero values
+
+        Values only change at slice endpoints, so runs of zeros are skipped at once.
+        """
+        bounds = self.dual._nonzero_bounds()
+        if bounds is None:
+            return
+        value = self.get(bounds[0])
+        previous = bounds[0] - 1
+        for endpoint, point in self.dual.nonzero_items():
+            if not self.dual._is_zero(value):
+                for ix in range(previous + 1, endpoint + 1):
+                    yield ix, value
+            value = value - point
+            previous = endpoint
+
+    def running_sums(self, start: typing.Optional[int] = None, stop: typing.Optional[int] = None
+                     ) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices of a slice and sums of values from the start of the slice
+        up to them, like :meth:`iter_range`
+        """
+        total = None
+        for ix, value in self.iter_range(start, stop):
+            total = value if total is None else total + value
+            yield ix, total
+
+    def flush(self) -> None:
+        """ Apply buffered writes, if the underlying aggregator buffers them """
+        self.dual.flush()
+
+    def merge(self, other: 'Aggregator') -> None:
+        """ Add the values assigned to slices by another aggregator
+
+        It's meant for combining aggregators built over disjoint parts of the input,
+        for example in different processes.
+        """
+        if not isinstance(other, Aggregator):
+            raise TypeError("Can only merge with another by_ixs.Aggregator")
+        value_offset = other.value_offset
+        self.dual.merge(other.dual)
+        self.value_offset += value_offset
+
+    def snapshot(self) -> 'Aggregator':
+        """ Get a read-only view of the current values, unaffected by later writes
+
+        See :meth:`slice_aggregator.by_slices.Aggregator.snapshot`.
+        """
+        snapshot = AggregatorSnapshot(dual=self.dual.snapshot(), zero_factory=self.zero_factory)
+        snapshot.value_offset = self.value_offset + snapshot.value_offset  # a copy
+        return snapshot
+
+    def __iadd__(self, other: 'Aggregator') -> 'Aggregator':
+        self.merge(other)
+        return self
+
+    def __getitem__(self, item: typing.Union[int, slice]) -> typing.Union[V, _SliceProxy]:
         if isinstance(item, slice):
             if item.step is not None:
                 raise ValueError("Slicing with step is not supported")
-            return _InplaceAddHelper(lambda v: self._inplace_add_callback(item.start, item.stop, v))
+            return _SliceProxy(self, item.start, item.stop)
         else:
             return self.get(item)
 
     def __setitem__(self, key: slice, value: typing.Any) -> None:
         if value is not _ASSIGNED_GUARD:
             raise NotImplementedError("Operation not supported!")
+
+
+class AggregatorSnapshot(Aggregator):
+    """ A read-only view of an aggregator, see :meth:`Aggregator.snapshot` """
+
+    def inc(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
+        raise TypeError("Snapshots are read-only")
+
+    def inc_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]], values: typing.Sequence[V]) -> None:
+        raise TypeError("Snapshots are read-only")
+
+    def merge(self, other: Aggregator) -> None:
+        raise TypeError("Snapshots are read-only")
+
+    def snapshot(self) -> 'AggregatorSnapshot':
+        return self
@@ -1,4 +1,8 @@
+import array
+import bisect
+import heapq
 import typing
+import weakref
 
 from .heap import IndexedUniqueMaxHeap
 
@@ -13,6 +17,108 @@ ZF = typing.Callable[[], V]  # zero factory
 ZT = typing.Callable[[V], bool]  # zero test
 
 
+def _default_zero() -> int:
+    return 0
+
+
+def _check_same_length(fst: typing.Sized, snd: typing.Sized) -> None:
+    if len(fst) != len(snd):
+        raise ValueError("Batch arguments have different lengths")
+
+
+def _all_equal(value: V, zero: V) -> bool:
+    """ Test for equality, comparing array-like values element-wise """
+    equal = value == zero
+    return bool(equal.all()) if hasattr(equal, 'all') else bool(equal)
+
+
+def _ix_or_none(ix: typing.Any) -> typing.Optional[int]:
+    return None if ix is None else int(ix)
+
+
+def _coalesce(ixs: typing.Sequence[int], values: typing.Sequence[V]) -> typing.Dict[int, V]:
+    """ Sum the values assigned to the same index """
+    _check_same_length(ixs, values)
+    result = {}
+    for ix, value in zip(ixs, values):
+        ix = int(ix)
+        result[ix] = result[ix] + value if ix in result else value
+    return result
+
+
+def _accumulate_dense(table: typing.MutableSequence[V], offset: int = 0) -> typing.Dict[int, V]:
+    """ Turn values assigned to consecutive indices, starting at offset, into table entries
+
+    Works in place and in linear time. Returns increments of the table entries below offset.
+    """
+    below = {}
+    for ix in reversed(range(len(table))):
+        parent = offset + ix - binary_tail(offset + ix + 1)  # +1 for 0-based indexing
+        if parent >= offset:
+            table[parent - offset] = table[parent - offset] + table[ix]
+        elif parent >= 0:
+            below[parent] = below[parent] + table[ix] if parent in below else table[ix]
+    return below
+
+
+def _points_dense(table: typing.MutableSequence[V]) -> None:
+    """ Turn table entries into values assigned to indices, in place and in linear time """
+    for ix in range(len(table)):
+        parent = ix - binary_tail(ix + 1)  # +1 for 0-based indexing
+        if parent >= 0:
+            table[parent] = table[parent] - table[ix]
+
+
+def _accumulate_sparse(points: typing.Dict[int, V]) -> typing.Dict[int, V]:
+    """ Turn values assigned to indices into table entries
+
+    Every table entry is visited once, in decreasing order of indices.
+    """
+    table = dict(points)
+    order = [-ix for ix in table]
+    heapq.heapify(order)
+    while order:
+        ix = -heapq.heappop(order)
+        parent = ix - binary_tail(ix + 1)  # +1 for 0-based indexing
+        if parent < 0:
+            continue
+        if parent in table:
+            table[parent] = table[parent] + table[ix]
+        else:
+            table[parent] = table[ix]
+            heapq.heappush(order, -parent)
+    return table
+
+
+def _split(start: typing.Optional[int], stop: typing.Optional[int]
+           ) -> typing.List[typing.Tuple[bool, typing.Optional[int], typing.Optional[int]]]:
+    """ Split a slice into slices of negative indices (mirrored) and nonnegative indices
+
+    Negative indices are mirrored by mapping ``ix`` to ``-1 - ix``.
+    The results are ``(negative, start, stop)`` triples.
+    """
+    if start is None:
+        if stop is None:
+            return [(True, None, None), (False, None, None)]
+        elif stop > 0:
+            return [(True, None, None), (False, None, stop)]
+        else:
+            return [(True, -stop, None)]
+    elif stop is None:
+        if start >= 0:
+            return [(False, start, None)]
+        else:
+            return [(True, None, -start), (False, None, None)]
+    elif start >= stop:
+        return []
+    elif 0 <= start:
+        return [(False, start, stop)]
+    elif stop <= 0:
+        return [(True, -stop, -start)]
+    else:
+        return [(True, None, -start), (False, None, stop)]
+
+
 class Aggregator(typing.Generic[V]):
     """ A data structure for assigning values to indices and aggregating them by slices
 
@@ -22,6 +128,7 @@ class Aggregator(typing.Generic[V]):
     Only the method-based interface is suitable for custom values handling inplace operators.
     Read the documentation on advances usage for more details.
     """
+    __slots__ = ()
 
     def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
         """ Get the aggregated value of all indices contained by the specified slice """
@@ -37,7 +144,134 @@ class Aggregator(typing.Generic[V]):
 
     def set(self, ix: int, value: V) -> None:
         """ Set the value assigned to an index """
-        self.inc(ix, value - self.get(ix, ix + 1))
+        self.inc(ix, value - self._get_point(ix))
+
+    def _get_point(self, ix: int) -> V:
+        return self.get(ix, ix + 1)
+
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        """ Decrement the value assigned to one index and increment another by the same value """
+        self.dec(dec_ix, value)
+        self.inc(inc_ix, value)
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[V]) -> None:
+        """ Increment the values assigned to many indices at once
+
+        Values assigned to the same index are summed up before the update.
+        """
+        for ix, value in _coalesce(ixs, values).items():
+            self.inc(ix, value)
+
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> typing.List[V]:
+        """ Get the aggregated values of many slices at once """
+        _check_same_length(starts, stops)
+        return [self.get(_ix_or_none(start), _ix_or_none(stop))
+                for start, stop in zip(starts, stops)]
+
+    def _find_many(self, targets: typing.Sequence[V], strict: bool
+                   ) -> typing.List[typing.Optional[int]]:
+        """ For every target, the smallest index such that the values assigned to it and all
+        smaller indices sum up to at least the target (more than the target if strict) or None
+        """
+        raise NotImplementedError()
+
+    def find_prefix(self, target: V) -> typing.Optional[int]:
+        """ Find the smallest index such that the values assigned to it and all smaller indices
+        sum up to at least the target
+
+        Values have to be nonnegative and the target has to be positive.
+        Returns None if all the values sum up to less than the target.
+        """
+        if not target > 0:
+            raise ValueError("target must be positive")
+        return self._find_many([target], False)[0]
+
+    def quantile(self, q: float) -> typing.Optional[int]:
+        """ Find the smallest index such that the values assigned to it and all smaller indices
+        make at least the fraction ``q`` of the sum of all values
+
+        Values have to be nonnegative. For ``q = 0`` it's the smallest index with a non-zero value.
+        Returns None if all the values are zero.
+        """
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: typing.Sequence[float]) -> typing.List[typing.Optional[int]]:
+        """ Find many quantiles at once, sharing table reads between them """
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("q must be between 0 and 1")
+        results = [None] * len(qs)
+        total = self.get(None, None)
+        if not total > 0:
+            return results
+        for strict in [True, False]:
+            positions = [position for position, q in enumerate(qs) if (q == 0) == strict]
+            found = self._find_many([qs[position] * total for position in positions], strict)
+            for position, ix in zip(positions, found):
+                results[position] = ix
+        return results
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        """ The smallest and the largest index with a non-zero value, or None if there's none """
+        raise NotImplementedError()
+
+    def _is_zero(self, value: V) -> bool:
+        """ Test for equality to zero """
+        raise NotImplementedError()
+
+    def _iter_range(self, start: int, stop: int) -> typing.Iterator[typing.Tuple[int, V]]:
+        for ix in range(start, stop):
+            yield ix, self._get_point(ix)
+
+    def iter_range(self, start: typing.Optional[int] = None, stop: typing.Optional[int] = None
+                   ) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices of a slice and values assigned to them, in increasing order
+
+        Missing ends default to the smallest and the largest index with a non-zero value.
+        Values are computed from the table in amortized constant time each.
+        """
+        if start is None or stop is None:
+            bounds = self._nonzero_bounds()
+            if bounds is None:
+                return iter(())
+            start = bounds[0] if start is None else start
+            stop = bounds[1] + 1 if stop is None else stop
+        return self._iter_range(start, stop)
+
+    def items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over all indices from the smallest to the largest one with a non-zero value
+        and values assigned to them
+        """
+        return self.iter_range()
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices with non-zero values and the values, in increasing order """
+        raise NotImplementedError()
+
+    def running_sums(self, start: typing.Optional[int] = None, stop: typing.Optional[int] = None
+                     ) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices of a slice and sums of values assigned to indices from the start
+        of the slice up to them, like :meth:`iter_range`
+        """
+        total = None
+        for ix, value in self.iter_range(start, stop):
+            total = value if total is None else total + value
+            yield ix, total
+
+    def flush(self) -> None:
+        """ Apply buffered writes, if the aggregator buffers them """
+
+    def merge(self, other: 'Aggregator') -> None:
+        """ Add the values assigned to indices by another aggregator of the same kind
+
+        It's meant for combining aggregators built over disjoint parts of the input,
+        for example in different processes.
+        """
+        raise NotImplementedError()
+
+    def __iadd__(self, other: 'Aggregator') -> 'Aggregator':
+        self.merge(other)
+        return self
 
     def __getitem__(self, item: typing.Union[int, slice]) -> V:
         if isinstance(item, slice):
@@ -45,19 +279,44 @@ class Aggregator(typing.Generic[V]):
                 raise ValueError("Slicing with step is not supported")
             return self.get(item.start, item.stop)
         else:
-            return self.get(item, item + 1)
+            return self._get_point(item)
 
     def __setitem__(self, ix: int, value: V) -> None:
         self.set(ix, value)
 
+    def snapshot(self) -> 'Aggregator':
+        """ Get a read-only view of the current values, unaffected by later writes
+
+        It doesn't copy the data, writers keep the old values of table entries they overwrite
+        for as long as the snapshot is referenced instead.
+        """
+        raise NotImplementedError()
+
+
+class _SnapshotLogs:
+    """ Old values of table entries, one dict for every live snapshot
+
+    The logs are kept in a tuple rebuilt when a snapshot is taken or released, so writes
+    iterate over it without copying, even if a snapshot is released meanwhile.
+    """
+    __slots__ = ('logs',)
+
+    def __init__(self):
+        self.logs = ()
+
+    def add(self, log: typing.Dict[int, V]) -> None:
+        self.logs = self.logs + (log,)
+
+    def remove(self, log: typing.Dict[int, V]) -> None:
+        self.logs = tuple(other for other in self.logs if other is not log)
+
 
 class LeftBoundedAggregator(Aggregator):
+    __slots__ = ('zero_factory', 'snapshot_logs')
 
     def __init__(self, *, zero_factory: ZF = None):
-        if zero_factory is None:
-            def zero_factory():
-                return 0
-        self.zero_factory = zero_factory
+        self.zero_factory = zero_factory if zero_factory is not None else _default_zero
+        self.snapshot_logs = _SnapshotLogs()
 
     def _table_get(self, ix: int) -> V:
         raise NotImplementedError()
@@ -65,6 +324,19 @@ class LeftBoundedAggregator(Aggregator):
     def _table_set(self, ix: int, value: V) -> None:
         raise NotImplementedError()
 
+    def _is_zero(self, value: V) -> bool:
+        return _all_equal(value, self.zero_factory())
+
+    def _table_items(self) -> typing.Iterable[typing.Tuple[int, V]]:
+        """ Table entries, possibly except zeros """
+        return ((ix, self._table_get(ix)) for ix in range(self._nonzero_ix_upper_bound() + 1))
+
+    def _log(self, ix: int) -> None:
+        """ Keep the current value of a table entry in the logs of snapshots, before writing it """
+        for log in self.snapshot_logs.logs:
+            if ix not in log:
+                log[ix] = self._table_get(ix)
+
     def _nonzero_ix_upper_bound(self) -> int:
         raise NotImplementedError()
 
@@ -97,56 +369,623 @@ class LeftBoundedAggregator(Aggregator):
             self._table_set(ix, self._table_get(ix) + value)
             ix -= binary_tail(ix + 1)  # +1 for 0-based indexing
 
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        if dec_ix < 0 or inc_ix < 0:
+            raise IndexError("ix out of range")
+        # both walks reach the same entries once they meet, where the updates cancel out
+        negated = -value
+        while dec_ix != inc_ix:
+            if dec_ix > inc_ix:
+                self._table_set(dec_ix, self._table_get(dec_ix) + negated)
+                dec_ix -= binary_tail(dec_ix + 1)  # +1 for 0-based indexing
+            else:
+                self._table_set(inc_ix, self._table_get(inc_ix) + value)
+                inc_ix -= binary_tail(inc_ix + 1)  # +1 for 0-based indexing
+
+    def snapshot(self) -> 'LeftBoundedSnapshot':
+        return LeftBoundedSnapshot(self)
+
+    def _suffix(self, ix: int, bound: int, cache: typing.Dict[int, V]) -> V:
+        path = []
+        while ix <= bound and ix not in cache:
+            path.append(ix)
+            ix += binary_tail(ix + 1)  # +1 for 0-based indexing
+        result = cache[ix] if ix <= bound else self.zero_factory()
+        for node in reversed(path):
+            result = self._table_get(node) + result
+            cache[node] = result
+        return result
+
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> typing.List[V]:
+        _check_same_length(starts, stops)
+        queries = [(_ix_or_none(start), _ix_or_none(stop)) for start, stop in zip(starts, stops)]
+        for start, stop in queries:
+            if start is not None and start < 0:
+                raise IndexError("start is out of range")
+            if stop is not None and stop < 0:
+                raise IndexError("stop is out of range")
+        bound = self._nonzero_ix_upper_bound()
+        cache = {}  # suffix sums shared between the queries
+        results = []
+        for start, stop in queries:
+            if start is None:
+                start = 0
+            if stop is not None and start >= stop:
+                results.append(self.zero_factory())
+            elif stop is None:
+                results.append(self._suffix(start, bound, cache))
+            else:
+                results.append(self._suffix(start, bound, cache)
+                               - self._suffix(stop, bound, cache))
+        return results
+
+    def _find_many(self, targets: typing.Sequence[V], strict: bool
+                   ) -> typing.List[typing.Optional[int]]:
+        bound = self._nonzero_ix_upper_bound()
+
+        def reaches(total: V, target: V) -> bool:
+            return total > target if strict else total >= target
+
+        def table_get(ix: int) -> V:
+            return self._table_get(ix) if ix <= bound else self.zero_factory()
+
+        # table entries 2^k - 1 cover consecutive blocks [2^k - 1, 2^(k+1) - 1), find the blocks
+        # containing the answers first, visiting the targets in increasing order
+        order = sorted(range(len(targets)), key=targets.__getitem__)
+        searches = []  # first position (1-based), size, sum, sum before, targets
+        position = 1
+        total = self.zero_factory()
+        i = 0
+        while i < len(order) and position - 1 <= bound:
+            block = table_get(position - 1)
+            first = i
+            while i < len(order) and reaches(total + block, targets[order[i]]):
+                i += 1
+            if i > first:
+                searches.append((position, position, block, total, order[first:i]))
+            total = total + block
+            position *= 2
+        # the right half of a range starting at a multiple of its size is a table entry
+        results = [None] * len(targets)
+        while searches:
+            position, size, block, total, group = searches.pop()
+            if size == 1:
+                for target_ix in group:
+                    results[target_ix] = position - 1
+                continue
+            size //= 2
+            right = table_get(position + size - 1)
+            left = block - right
+            split = 0
+            while split < len(group) and reaches(total + left, targets[group[split]]):
+                split += 1
+            if split:
+                searches.append((position, size, left, total, group[:split]))
+            if split < len(group):
+                searches.append((position + size, size, right, total + left, group[split:]))
+        return results
+
+    def _point_values(self, ixs: typing.Iterable[int]) -> typing.Iterator[V]:
+        """ Values assigned to indices, computed from the table
+
+        A table entry is the value of its index plus the entries covering the rest of its range,
+        so every value takes ``O(log t)`` table reads, where ``t`` is the binary tail of the index,
+        which is amortized constant time for consecutive indices.
+        """
+        bound = self._nonzero_ix_upper_bound()
+        for ix in ixs:
+            if ix > bound:
+                yield self.zero_factory()
+                continue
+            value = self._table_get(ix)
+            tail = binary_tail(ix + 1)  # +1 for 0-based indexing
+            child = 1
+            while child < tail and ix + child <= bound:
+                value = value - self._table_get(ix + child)
+                child *= 2
+            yield value
+
+    def _iter_range(self, start: int, stop: int) -> typing.Iterator[typing.Tuple[int, V]]:
+        if start < 0:
+            raise IndexError("start is out of range")
+        return zip(range(start, stop), self._point_values(range(start, stop)))
+
+    def _node_deltas(self, point_deltas: typing.Dict[int, V]) -> typing.Dict[int, V]:
+        """ Translate increments of indices into increments of table entries """
+        if any(ix < 0 for ix in point_deltas):
+            raise IndexError("ix out of range")
+        result = {}
+        for ix, value in point_deltas.items():
+            while ix >= 0:
+                result[ix] = result[ix] + value if ix in result else value
+                ix -= binary_tail(ix + 1)  # +1 for 0-based indexing
+        return result
+
+    def _inc_coalesced(self, point_deltas: typing.Dict[int, V]) -> None:
+        for ix, value in self._node_deltas(point_deltas).items():
+            self._table_set(ix, self._table_get(ix) + value)
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[V]) -> None:
+        self._inc_coalesced(_coalesce(ixs, values))
+
+
+class LeftBoundedSnapshot(LeftBoundedAggregator):
+    """ A read-only view of a left-bounded aggregator, see :meth:`Aggregator.snapshot`
+
+    Taking it registers a log with the aggregator, where writers keep the old value of every
+    table entry before overwriting it for the first time. Reads take the live entry first
+    and prefer the logged one, so they see the table as it was, even if they run concurrently
+    with a writer. The log is dropped when the snapshot is garbage collected, so until then
+    every write also costs a dict lookup per table entry and the log takes memory proportional
+    to the number of distinct entries written.
+
+    :param aggregator: the aggregator to take a snapshot of
+    """
+
+    def __init__(self, aggregator: LeftBoundedAggregator):
+        super().__init__(zero_factory=aggregator.zero_factory)
+        self.aggregator = aggregator
+        self.bound = aggregator._nonzero_ix_upper_bound()
+        self.log = {}
+        aggregator.snapshot_logs.add(self.log)
+        weakref.finalize(self, aggregator.snapshot_logs.remove, self.log)
+
+    def _table_get(self, ix: int) -> V:
+        value = self.aggregator._table_get(ix)
+        return self.log.get(ix, value)
+
+    def _table_set(self, ix: int, value: V) -> None:
+        raise TypeError("Snapshots are read-only")
+
+    def _table_items(self) -> typing.Iterable[typing.Tuple[int, V]]:
+        ixs = set(ix for ix, _ in list(self.aggregator._table_items())).union(list(self.log))
+        return ((ix, self._table_get(ix)) for ix in ixs if ix <= self.bound)
+
+    def _nonzero_ix_upper_bound(self) -> int:
+        return self.bound
+
+    def _is_zero(self, value: V) -> bool:
+        return self.aggregator._is_zero(value)
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        # an index with a non-zero value has a non-zero table entry, its own or of a child
+        ixs = set()
+        for ix, _ in self._table_items():
+            ixs.add(ix)
+            child = 1
+            while child <= ix:
+                if binary_tail(ix - child + 1) > child:  # +1 for 0-based indexing
+                    ixs.add(ix - child)
+                child *= 2
+        ixs = sorted(ixs)
+        return ((ix, value) for ix, value in zip(ixs, self._point_values(ixs))
+                if not self._is_zero(value))
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        ixs = [ix for ix, _ in self.nonzero_items()]
+        return (ixs[0], ixs[-1]) if ixs else None
+
+    def snapshot(self) -> 'LeftBoundedSnapshot':
+        return self
+
 
 class FixedSizeAggregator(LeftBoundedAggregator):
 
-    def __init__(self, *, table: typing.MutableSequence[V], zero_factory: ZF = None):
+    def __init__(self, *, table: typing.MutableSequence[V], zero_factory: ZF = None,
+                 zero_test: ZT = None):
         super().__init__(zero_factory=zero_factory)
         self.table = table
+        self.zero_test = zero_test
+
+    @classmethod
+    def from_dense(cls, values: typing.Iterable[V], offset: int = 0,
+                   **kwargs: typing.Any) -> 'FixedSizeAggregator':
+        """ Build an aggregator with values assigned to consecutive indices, in linear time
+
+        :param values: values assigned to indices ``offset``, ``offset + 1``, ...
+        :param offset: the first index with a value assigned
+        :param kwargs: other arguments of the constructor
+        """
+        zero_factory = kwargs.get('zero_factory')
+        zero = 0 if zero_factory is None else zero_factory()
+        table = [zero] * offset + list(values)
+        _accumulate_dense(table)
+        return cls(table=table, **kwargs)
+
+    @classmethod
+    def from_items(cls, items: typing.Iterable[typing.Tuple[int, V]], *, size: int,
+                   **kwargs: typing.Any) -> 'FixedSizeAggregator':
+        """ Build an aggregator from ``(ix, value)`` pairs, in linear time
+
+        :param items: indices and values assigned to them, indices may repeat
+        :param size: the size of the table
+        :param kwargs: other arguments of the constructor
+        """
+        zero_factory = kwargs.get('zero_factory')
+        table = [0 if zero_factory is None else zero_factory()] * size
+        for ix, value in items:
+            if not 0 <= ix < size:
+                raise IndexError("ix out of range")
+            table[ix] = table[ix] + value
+        _accumulate_dense(table)
+        return cls(table=table, **kwargs)
 
     def _table_get(self, ix: int) -> V:
         return self.table[ix]
 
     def _table_set(self, ix: int, value: V) -> None:
+        if self.snapshot_logs.logs:
+            self._log(ix)
         self.table[ix] = value
 
     def _nonzero_ix_upper_bound(self) -> int:
         return len(self.table) - 1
 
+    def _inc_coalesced(self, point_deltas: typing.Dict[int, V]) -> None:
+        # checked up front, so that a bad index doesn't leave the table partially updated
+        if any(ix >= len(self.table) for ix in point_deltas):
+            raise IndexError("ix out of range")
+        super()._inc_coalesced(point_deltas)
+
+    def _is_zero(self, value: V) -> bool:
+        if self.zero_test is None:
+            return super()._is_zero(value)
+        return self.zero_test(value)
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        """ Values are found by scanning the table, in linear time """
+        ixs = [ix for ix, _ in self.nonzero_items()]
+        return (ixs[0], ixs[-1]) if ixs else None
 
-class VariableSizeLeftBoundedAggregator(LeftBoundedAggregator):
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Values are computed from the whole table, in linear time """
+        return ((ix, value) for ix, value in self._iter_range(0, len(self.table))
+                if not self._is_zero(value))
 
-    def __init__(self, *, zero_factory: ZF = None, zero_test: ZT = None):
+    def merge(self, other: 'FixedSizeAggregator') -> None:
+        if not isinstance(other, FixedSizeAggregator):
+            raise TypeError("Can only merge with another FixedSizeAggregator")
+        if len(other.table) != len(self.table):
+            raise ValueError("Can't merge aggregators of different sizes")
+        for ix, value in enumerate(list(other.table)):
+            self._table_set(ix, self.table[ix] + value)
+
+
+class _VariableSizeBase(LeftBoundedAggregator):
+    """ Methods shared by aggregators storing only the non-zero table entries """
+    __slots__ = ()
+
+    def __init__(self, *, zero_factory: ZF = None, zero_test: ZT = None,
+                 track_points: bool = True, tracker_class: typing.Type = IndexedUniqueMaxHeap):
         super().__init__(zero_factory=zero_factory)
         self.table = {}
-        self.heap = IndexedUniqueMaxHeap()
-        self.zero = zero_factory() if zero_factory is not None else 0  # read only
-        if zero_test is None:
-            def zero_test(v):
-                return v == self.zero
-        self.zero_test = zero_test
+        self.points = {} if track_points else None
+        self.tracker_class = tracker_class
+        self.heap = tracker_class()
+        self.zero = self.zero_factory()  # read only
+        self.zero_test = zero_test if zero_test is not None else self._equals_zero
+
+    def _equals_zero(self, value: V) -> bool:
+        return value == self.zero
+
+    def _build(self, points: typing.Dict[int, V], table: typing.Dict[int, V]) -> None:
+        self.table = {ix: value for ix, value in table.items() if not self.zero_test(value)}
+        nonzero_points = {ix: value for ix, value in points.items() if not self.zero_test(value)}
+        if self.points is not None:
+            self.points = nonzero_points
+        self.heap = self.tracker_class.from_iterable(nonzero_points)
+
+    @classmethod
+    def from_dense(cls, values: typing.Iterable[V], offset: int = 0,
+                   **kwargs: typing.Any) -> 'VariableSizeLeftBoundedAggregator':
+        """ Build an aggregator with values assigned to consecutive indices, in linear time
+
+        :param values: values assigned to indices ``offset``, ``offset + 1``, ...
+        :param offset: the first index with a value assigned
+        :param kwargs: other arguments of the constructor
+        """
+        if offset < 0:
+            raise IndexError("offset out of range")
+        aggregator = cls(**kwargs)
+        table = list(values)
+        points = {offset + ix: value for ix, value in enumerate(table)}
+        below = _accumulate_sparse(_accumulate_dense(table, offset))
+        below.update((offset + ix, value) for ix, value in enumerate(table))
+        aggregator._build(points, below)
+        return aggregator
+
+    @classmethod
+    def from_items(cls, items: typing.Iterable[typing.Tuple[int, V]],
+                   **kwargs: typing.Any) -> 'VariableSizeLeftBoundedAggregator':
+        """ Build an aggregator from ``(ix, value)`` pairs
+
+        Every table entry is computed once, so it's much faster than incrementing
+        the values one by one.
+
+        :param items: indices and values assigned to them, indices may repeat
+        :param kwargs: other arguments of the constructor
+        """
+        aggregator = cls(**kwargs)
+        points = {}
+        for ix, value in items:
+            if ix < 0:
+                raise IndexError("ix out of range")
+            points[ix] = points[ix] + value if ix in points else value
+        aggregator._build(points, _accumulate_sparse(points))
+        return aggregator
 
     def _table_get(self, ix: int) -> V:
         return self.table[ix] if ix in self.table else self.zero
 
     def _table_set(self, ix: int, value: V) -> None:
+        if self.snapshot_logs.logs:
+            self._log(ix)
         if self.zero_test(value):
-            del self.table[ix]
+            self.table.pop(ix, None)
         else:
             self.table[ix] = value
 
+    def _table_items(self) -> typing.Iterable[typing.Tuple[int, V]]:
+        """ Non-zero table entries """
+        return self.table.items()
+
     def _nonzero_ix_upper_bound(self) -> int:
         if not len(self.table):
             return 0
         return self.heap.max()
 
+    def _get_point(self, ix: int) -> V:
+        if self.points is None:
+            return super()._get_point(ix)
+        if ix < 0:
+            raise IndexError("ix out of range")
+        return self.points[ix] if ix in self.points else self.zero_factory()
+
+    def _tracked_point(self, ix: int) -> V:
+        return self.points[ix] if ix in self.points else self.zero
+
+    def _point_values(self, ixs: typing.Iterable[int]) -> typing.Iterator[V]:
+        if self.points is None:
+            return super()._point_values(ixs)
+        return (self._tracked_point(ix) for ix in ixs)
+
+    def _is_zero(self, value: V) -> bool:
+        return self.zero_test(value)
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        """ The tracker only keeps the largest index, the smallest one takes a linear scan """
+        if not len(self.heap):
+            return None
+        return min(self.heap), self.heap.max()
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices with non-zero values and the values, in increasing order
+
+        The tracked indices are sorted first, in ``O(n log n)`` time for ``n`` of them.
+        """
+        ixs = sorted(self.heap)
+        return zip(ixs, self._point_values(ixs))
+
+    def _set_point(self, ix: int, value: V) -> None:
+        """ Track the value assigned to an index """
+        if self.zero_test(value):
+            self.heap.remove(ix)
+            if self.points is not None:
+                self.points.pop(ix, None)
+        else:
+            self.heap.add(ix)
+            if self.points is not None:
+                self.points[ix] = value
+
     def inc(self, ix: int, value: V) -> None:
-        new_value = self.get(ix, ix + 1) + value
+        if self.points is None:
+            new_value = self.get(ix, ix + 1) + value
+        else:
+            new_value = self._tracked_point(ix) + value
         super().inc(ix, value)
-        if self.zero_test(new_value):
+        self._set_point(ix, new_value)
+
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        if dec_ix == inc_ix:
+            return
+        if self.points is None:
+            dec_value = self.get(dec_ix, dec_ix + 1) - value
+            inc_value = self.get(inc_ix, inc_ix + 1) + value
+        else:
+            dec_value = self._tracked_point(dec_ix) - value
+            inc_value = self._tracked_point(inc_ix) + value
+        super()._inc_pair(dec_ix, inc_ix, value)
+        self._set_point(dec_ix, dec_value)
+        self._set_point(inc_ix, inc_value)
+
+    def _inc_coalesced(self, point_deltas: typing.Dict[int, V]) -> None:
+        ixs = list(point_deltas)
+        if self.points is None:
+            old_values = self.get_many(ixs, [ix + 1 for ix in ixs])
+        else:
+            old_values = [self._tracked_point(ix) for ix in ixs]
+        super()._inc_coalesced(point_deltas)
+        for ix, old_value in zip(ixs, old_values):
+            self._set_point(ix, old_value + point_deltas[ix])
+
+    def merge(self, other: 'VariableSizeLeftBoundedAggregator') -> None:
+        """ Add the values assigned to indices by another aggregator
+
+        Table entries are added one by one, so it takes time linear in the number of
+        non-zero table entries of the other aggregator, rather than of its writes.
+        """
+        if not isinstance(other, _VariableSizeBase):
+            raise TypeError("Can only merge with another VariableSizeLeftBoundedAggregator")
+        ixs = list(other.heap)
+        deltas = [other._get_point(ix) for ix in ixs]
+        if self.points is None:
+            old_values = self.get_many(ixs, [ix + 1 for ix in ixs])
+        else:
+            old_values = [self._tracked_point(ix) for ix in ixs]
+        for ix, value in list(other._table_items()):
+            self._table_set(ix, self._table_get(ix) + value)
+        for ix, old_value, delta in zip(ixs, old_values, deltas):
+            self._set_point(ix, old_value + delta)
+
+
+class VariableSizeLeftBoundedAggregator(_VariableSizeBase):
+    """ A left-bounded aggregator storing only the non-zero table entries
+
+    :param zero_factory: callable returning additive identity
+    :param zero_test: test for equality to zero
+    :param track_points: keep the values assigned to indices next to the table, so that reading
+        them is constant-time and writing doesn't need a point query, at the cost of more memory
+    :param tracker_class: the class tracking indices with non-zero values assigned, like
+        :class:`slice_aggregator.heap.IndexedUniqueMaxHeap` (default),
+        :class:`slice_aggregator.heap.LazyMaxHeap`
+        or :class:`slice_aggregator.bitmap.HierarchicalBitmap`
+    """
+
+
+class NumericLeftBoundedAggregator(_VariableSizeBase):
+    """ A variable-size left-bounded aggregator specialized for numbers, with zero as ``0``
+
+    It behaves like :class:`VariableSizeLeftBoundedAggregator` with the default zero factory
+    and zero test, but its hot paths are inlined: zero is a literal, every table entry is read
+    with a single dict lookup, binary tails are bit operations and instances have
+    ``__slots__``. The factories use it when neither ``zero_factory`` nor ``zero_test`` is given.
+
+    :param track_points: keep the values assigned to indices next to the table
+    :param tracker_class: the class tracking indices with non-zero values assigned
+    """
+    __slots__ = ('table', 'points', 'tracker_class', 'heap', 'zero', 'zero_test')
+
+    def __init__(self, *, track_points: bool = True,
+                 tracker_class: typing.Type = IndexedUniqueMaxHeap):
+        super().__init__(track_points=track_points, tracker_class=tracker_class)
+
+    def _generic(self) -> VariableSizeLeftBoundedAggregator:
+        """ An equivalent generic aggregator sharing the table, points and tracker """
+        generic = VariableSizeLeftBoundedAggregator(track_points=False,
+                                                    tracker_class=self.tracker_class)
+        generic.table = self.table
+        generic.points = self.points
+        generic.heap = self.heap
+        generic.snapshot_logs = self.snapshot_logs
+        return generic
+
+    def _table_get(self, ix: int) -> V:
+        return self.table.get(ix, 0)
+
+    def _table_set(self, ix: int, value: V) -> None:
+        if self.snapshot_logs.logs:
+            self._log(ix)
+        if value == 0:
+            self.table.pop(ix, None)
+        else:
+            self.table[ix] = value
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        if start is not None and start < 0:
+            raise IndexError("start is out of range")
+        if stop is not None and stop < 0:
+            raise IndexError("stop is out of range")
+        table = self.table
+        if not table or start is not None and stop is not None and start >= stop:
+            return 0
+        bound = self.heap.max()
+        if start is None:
+            start = 0
+        if stop is None:
+            stop = bound + 1
+        table_get = table.get
+        result = 0
+        while start != stop and (start <= bound or stop <= bound):
+            if start < stop:
+                result += table_get(start, 0)
+                start |= start + 1  # the next entry, ix + binary_tail(ix + 1)
+            else:
+                result -= table_get(stop, 0)
+                stop |= stop + 1
+        return result
+
+    def inc(self, ix: int, value: V) -> None:
+        if ix < 0:
+            raise IndexError("ix out of range")
+        points = self.points
+        if points is None:
+            new_value = self.get(ix, ix + 1) + value
+        else:
+            new_value = points.get(ix, 0) + value
+        table = self.table
+        logs = self.snapshot_logs.logs
+        node = ix
+        while node >= 0:
+            if logs:
+                self._log(node)
+            entry = table.get(node, 0) + value
+            if entry == 0:
+                table.pop(node, None)
+            else:
+                table[node] = entry
+            node = (node & (node + 1)) - 1  # the previous entry, ix - binary_tail(ix + 1)
+        if new_value == 0:
             self.heap.remove(ix)
+            if points is not None:
+                points.pop(ix, None)
         else:
             self.heap.add(ix)
+            if points is not None:
+                points[ix] = new_value
+
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        if dec_ix < 0 or inc_ix < 0:
+            raise IndexError("ix out of range")
+        if dec_ix == inc_ix:
+            return
+        points = self.points
+        if points is None:
+            dec_value = self.get(dec_ix, dec_ix + 1) - value
+            inc_value = self.get(inc_ix, inc_ix + 1) + value
+        else:
+            dec_value = points.get(dec_ix, 0) - value
+            inc_value = points.get(inc_ix, 0) + value
+        table = self.table
+        logs = self.snapshot_logs.logs
+        dec_node, inc_node = dec_ix, inc_ix
+        while dec_node != inc_node:
+            if dec_node > inc_node:
+                node = dec_node
+                entry = table.get(node, 0) - value
+                dec_node = (node & (node + 1)) - 1
+            else:
+                node = inc_node
+                entry = table.get(node, 0) + value
+                inc_node = (node & (node + 1)) - 1
+            if logs:
+                self._log(node)
+            if entry == 0:
+                table.pop(node, None)
+            else:
+                table[node] = entry
+        self._set_point(dec_ix, dec_value)
+        self._set_point(inc_ix, inc_value)
+
+    def _get_point(self, ix: int) -> V:
+        if self.points is None:
+            return super()._get_point(ix)
+        if ix < 0:
+            raise IndexError("ix out of range")
+        return self.points.get(ix, 0)
+
+    def _tracked_point(self, ix: int) -> V:
+        return self.points.get(ix, 0)
+
+    def _set_point(self, ix: int, value: V) -> None:
+        if value == 0:
+            self.heap.remove(ix)
+            if self.points is not None:
+                self.points.pop(ix, None)
+        else:
+            self.heap.add(ix)
+            if self.points is not None:
+                self.points[ix] = value
 
 
 class UnboundedAggregator(Aggregator):
@@ -155,6 +994,62 @@ class UnboundedAggregator(Aggregator):
         self.negative = negative
         self.nonnegative = nonnegative
 
+    @classmethod
+    def from_dense(cls, values: typing.Sequence[V], offset: int = 0, *,
+                   left_bounded_class: typing.Type = None,
+                   **kwargs: typing.Any) -> 'UnboundedAggregator':
+        """ Build an aggregator with values assigned to consecutive indices, in linear time
+
+        :param values: values assigned to indices ``offset``, ``offset + 1``, ...
+        :param offset: the first index with a value assigned
+        :param left_bounded_class: the class of both parts,
+            :class:`VariableSizeLeftBoundedAggregator` by default
+        :param kwargs: arguments of the left-bounded class constructor
+        """
+        if left_bounded_class is None:
+            left_bounded_class = VariableSizeLeftBoundedAggregator
+        negative_count = min(len(values), max(0, -offset))
+        return cls(
+            negative=left_bounded_class.from_dense(
+                values[negative_count - 1::-1] if negative_count else [],
+                max(0, -offset - len(values)),
+                **kwargs),
+            nonnegative=left_bounded_class.from_dense(
+                values[negative_count:], max(0, offset), **kwargs),
+        )
+
+    @classmethod
+    def from_items(cls, items: typing.Iterable[typing.Tuple[int, V]], *,
+                   left_bounded_class: typing.Type = None,
+                   **kwargs: typing.Any) -> 'UnboundedAggregator':
+        """ Build an aggregator from ``(ix, value)`` pairs
+
+        :param items: indices and values assigned to them, indices may repeat
+        :param left_bounded_class: the class of both parts,
+            :class:`VariableSizeLeftBoundedAggregator` by default
+        :param kwargs: arguments of the left-bounded class constructor
+        """
+        if left_bounded_class is None:
+            left_bounded_class = VariableSizeLeftBoundedAggregator
+        negative_items = []
+        nonnegative_items = []
+        for ix, value in items:
+            if ix < 0:
+                negative_items.append((-1 - ix, value))
+            else:
+                nonnegative_items.append((ix, value))
+        return cls(
+            negative=left_bounded_class.from_items(negative_items, **kwargs),
+            nonnegative=left_bounded_class.from_items(nonnegative_items, **kwargs),
+        )
+
+    def _parts(self, start: typing.Optional[int], stop: typing.Optional[int]
+               ) -> typing.List[typing.Tuple[LeftBoundedAggregator,
+                                             typing.Optional[int], typing.Optional[int]]]:
+        """ Split a slice into slices of the left-bounded parts """
+        return [(self.negative if negative else self.nonnegative, part_start, part_stop)
+                for negative, part_start, part_stop in _split(start, stop)]
+
     def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
         if start is None:
             if stop is None:
@@ -169,7 +1064,7 @@ class UnboundedAggregator(Aggregator):
             else:
                 return self.negative.get(None, -start) + self.nonnegative.get(None, None)
         elif start >= stop:
-            return self.nonnegative.zero
+            return self.nonnegative.zero_factory()
         elif 0 <= start:
             return self.nonnegative.get(start, stop)
         elif stop <= 0:
@@ -177,8 +1072,296 @@ class UnboundedAggregator(Aggregator):
         else:
             return self.negative.get(None, -start) + self.nonnegative.get(None, stop)
 
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> typing.List[V]:
+        _check_same_length(starts, stops)
+        queries = {self.negative: ([], []), self.nonnegative: ([], [])}
+        query_parts = []
+        for start, stop in zip(starts, stops):
+            parts = []
+            for part, part_start, part_stop in self._parts(_ix_or_none(start), _ix_or_none(stop)):
+                part_starts, part_stops = queries[part]
+                parts.append((part, len(part_starts)))
+                part_starts.append(part_start)
+                part_stops.append(part_stop)
+            query_parts.append(parts)
+        answers = {part: part.get_many(part_starts, part_stops)
+                   for part, (part_starts, part_stops) in queries.items()}
+        results = []
+        for parts in query_parts:
+            result = None
+            for part, ix in parts:
+                value = answers[part][ix]
+                result = value if result is None else result + value
+            results.append(self.nonnegative.zero_factory() if result is None else result)
+        return results
+
+    def _get_point(self, ix: int) -> V:
+        if ix < 0:
+            return self.negative._get_point(-1 - ix)
+        else:
+            return self.nonnegative._get_point(ix)
+
     def inc(self, ix: int, value: V) -> None:
         if ix < 0:
             self.negative.inc(-1 - ix, value)
         else:
             self.nonnegative.inc(ix, value)
+
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        if dec_ix < 0 and inc_ix < 0:
+            self.negative._inc_pair(-1 - dec_ix, -1 - inc_ix, value)
+        elif dec_ix >= 0 and inc_ix >= 0:
+            self.nonnegative._inc_pair(dec_ix, inc_ix, value)
+        else:
+            super()._inc_pair(dec_ix, inc_ix, value)
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[V]) -> None:
+        _check_same_length(ixs, values)
+        negative_ixs, negative_values, nonnegative_ixs, nonnegative_values = [], [], [], []
+        for ix, value in zip(ixs, values):
+            ix = int(ix)
+            if ix < 0:
+                negative_ixs.append(-1 - ix)
+                negative_values.append(value)
+            else:
+                nonnegative_ixs.append(ix)
+                nonnegative_values.append(value)
+        self.negative.inc_many(negative_ixs, negative_values)
+        self.nonnegative.inc_many(nonnegative_ixs, nonnegative_values)
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        negative = self.negative._nonzero_bounds()
+        nonnegative = self.nonnegative._nonzero_bounds()
+        if negative is None and nonnegative is None:
+            return None
+        low = -1 - negative[1] if negative is not None else nonnegative[0]
+        high = nonnegative[1] if nonnegative is not None else -1 - negative[0]
+        return low, high
+
+    def _iter_range(self, start: int, stop: int) -> typing.Iterator[typing.Tuple[int, V]]:
+        for negative, part_start, part_stop in _split(start, stop):
+            part_start = 0 if part_start is None else part_start
+            if negative:
+                mirrored = range(part_stop - 1, part_start - 1, -1)
+                yield from zip((-1 - ix for ix in mirrored), self.negative._point_values(mirrored))
+            else:
+                yield from self.nonnegative._iter_range(part_start, part_stop)
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        for ix, value in reversed(list(self.negative.nonzero_items())):
+            yield -1 - ix, value
+        yield from self.nonnegative.nonzero_items()
+
+    def _find_many(self, targets: typing.Sequence[V], strict: bool
+                   ) -> typing.List[typing.Optional[int]]:
+        negative_total = self.negative.get(None, None)
+        negative, nonnegative = [], []
+        for target_ix, target in enumerate(targets):
+            if negative_total > target or not strict and negative_total == target:
+                negative.append(target_ix)
+            else:
+                nonnegative.append(target_ix)
+        results = [None] * len(targets)
+        # the largest mirrored index with the sum of larger ones reaching the target
+        # is the smallest one with the sum of smaller ones exceeding the rest
+        found = self.negative._find_many([negative_total - targets[target_ix]
+                                          for target_ix in negative], not strict)
+        for target_ix, ix in zip(negative, found):
+            results[target_ix] = None if ix is None else -1 - ix
+        found = self.nonnegative._find_many([targets[target_ix] - negative_total
+                                             for target_ix in nonnegative], strict)
+        for target_ix, ix in zip(nonnegative, found):
+            results[target_ix] = ix
+        return results
+
+    def merge(self, other: 'UnboundedAggregator') -> None:
+        if not isinstance(other, UnboundedAggregator):
+            raise TypeError("Can only merge with another UnboundedAggregator")
+        self.negative.merge(other.negative)
+        self.nonnegative.merge(other.nonnegative)
+
+    def _is_zero(self, value: V) -> bool:
+        return self.nonnegative._is_zero(value)
+
+    def snapshot(self) -> 'UnboundedAggregator':
+        return UnboundedAggregator(negative=self.negative.snapshot(),
+                                   nonnegative=self.nonnegative.snapshot())
+
+
+class ArrayLeftBoundedAggregator(VariableSizeLeftBoundedAggregator):
+    """ A left-bounded aggregator storing its table in an :class:`array.array`
+
+    It's suitable for numbers and fairly dense indices. The array grows to the next power of two
+    whenever a non-zero value is assigned to an index out of its bounds.
+
+    :param typecode: the typecode of the array, like ``'d'`` for floats or ``'q'`` for integers
+    :param track_points: keep the values assigned to indices in another array
+    :param tracker_class: the class tracking indices with non-zero values assigned
+    """
+
+    def __init__(self, *, typecode: str = 'd', track_points: bool = True,
+                 tracker_class: typing.Type = IndexedUniqueMaxHeap):
+        super().__init__(zero_factory=type(array.array(typecode, [0])[0]),
+                         track_points=track_points,
+                         tracker_class=tracker_class)
+        self.typecode = typecode
+        self.table = array.array(typecode)
+        self.points = array.array(typecode) if track_points else None
+
+    @staticmethod
+    def _grow(values: array.array, size: int) -> None:
+        capacity = 1 << (size - 1).bit_length()
+        values.frombytes(bytes(values.itemsize * (capacity - len(values))))
+
+    def _build(self, points: typing.Dict[int, V], table: typing.Dict[int, V]) -> None:
+        self.table = self._dense({ix: value for ix, value in table.items()
+                                  if not self.zero_test(value)})
+        nonzero_points = {ix: value for ix, value in points.items() if not self.zero_test(value)}
+        if self.points is not None:
+            self.points = self._dense(nonzero_points)
+        self.heap = self.tracker_class.from_iterable(nonzero_points)
+
+    def _dense(self, values: typing.Dict[int, V]) -> array.array:
+        result = array.array(self.typecode)
+        if values:
+            self._grow(result, max(values) + 1)
+        for ix, value in values.items():
+            result[ix] = value
+        return result
+
+    def _table_get(self, ix: int) -> V:
+        return self.table[ix] if ix < len(self.table) else self.zero
+
+    def _table_set(self, ix: int, value: V) -> None:
+        if self.snapshot_logs.logs:
+            self._log(ix)
+        if ix >= len(self.table):
+            if self.zero_test(value):
+                return
+            self._grow(self.table, ix + 1)
+        self.table[ix] = value
+
+    def _table_items(self) -> typing.Iterable[typing.Tuple[int, V]]:
+        return ((ix, value) for ix, value in enumerate(self.table) if not self.zero_test(value))
+
+    def _nonzero_ix_upper_bound(self) -> int:
+        if not len(self.heap):
+            return 0
+        return self.heap.max()
+
+    def _get_point(self, ix: int) -> V:
+        if self.points is None:
+            return super()._get_point(ix)
+        if ix < 0:
+            raise IndexError("ix out of range")
+        return self._tracked_point(ix)
+
+    def _tracked_point(self, ix: int) -> V:
+        return self.points[ix] if ix < len(self.points) else self.zero
+
+    def _set_point(self, ix: int, value: V) -> None:
+        if self.zero_test(value):
+            self.heap.remove(ix)
+            if self.points is not None and ix < len(self.points):
+                self.points[ix] = self.zero
+        else:
+            self.heap.add(ix)
+            if self.points is not None:
+                if ix >= len(self.points):
+                    self._grow(self.points, ix + 1)
+                self.points[ix] = value
+
+
+class CompressedAggregator(Aggregator):
+    """ An aggregator over a set of known indices (keys)
+
+    Keys are mapped to their ranks, so the cost of operations depends on the number of keys
+    rather than their magnitude. Slice bounds don't have to be keys.
+
+    :param keys: indices that values can be assigned to
+    :param zero_factory: callable returning additive identity
+    :param zero_test: callable telling if a value is zero, equality to zero by default
+    """
+
+    def __init__(self, *, keys: typing.Iterable[int] = (), zero_factory: ZF = None,
+                 zero_test: ZT = None):
+        self.keys = sorted(set(keys))
+        self.ranks = {key: rank for rank, key in enumerate(self.keys)}
+        self.ranked = FixedSizeAggregator.from_dense([], len(self.keys), zero_factory=zero_factory,
+                                                     zero_test=zero_test)
+        self.zero_factory = self.ranked.zero_factory
+
+    def add_keys(self, keys: typing.Iterable[int]) -> None:
+        """ Extend the set of known keys, in time linear in the number of all keys """
+        new_keys = set(keys).difference(self.ranks)
+        if not new_keys:
+            return
+        if isinstance(self.ranked, LeftBoundedSnapshot):
+            raise TypeError("Snapshots are read-only")
+        points = list(self.ranked.table)
+        _points_dense(points)
+        old = dict(zip(self.keys, points))
+        self.keys = sorted(new_keys.union(self.keys))
+        self.ranks = {key: rank for rank, key in enumerate(self.keys)}
+        zero = self.zero_factory()
+        self.ranked = FixedSizeAggregator.from_dense(
+            [old[key] if key in old else zero for key in self.keys],
+            zero_factory=self.ranked.zero_factory, zero_test=self.ranked.zero_test)
+
+    def _rank(self, ix: int) -> int:
+        try:
+            return self.ranks[ix]
+        except KeyError:
+            raise IndexError("ix is not a known key") from None
+
+    def _rank_or_none(self, ix: typing.Optional[int]) -> typing.Optional[int]:
+        return None if ix is None else bisect.bisect_left(self.keys, ix)
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        return self.ranked.get(self._rank_or_none(start), self._rank_or_none(stop))
+
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> typing.List[V]:
+        _check_same_length(starts, stops)
+        return self.ranked.get_many([self._rank_or_none(_ix_or_none(start)) for start in starts],
+                                    [self._rank_or_none(_ix_or_none(stop)) for stop in stops])
+
+    def _find_many(self, targets: typing.Sequence[V], strict: bool
+                   ) -> typing.List[typing.Optional[int]]:
+        return [None if rank is None else self.keys[rank]
+                for rank in self.ranked._find_many(targets, strict)]
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        bounds = self.ranked._nonzero_bounds()
+        return None if bounds is None else (self.keys[bounds[0]], self.keys[bounds[1]])
+
+    def _is_zero(self, value: V) -> bool:
+        return self.ranked._is_zero(value)
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        return ((self.keys[rank], value) for rank, value in self.ranked.nonzero_items())
+
+    def _get_point(self, ix: int) -> V:
+        if ix not in self.ranks:
+            return self.zero_factory()
+        rank = self.ranks[ix]
+        return self.ranked.get(rank, rank + 1)
+
+    def inc(self, ix: int, value: V) -> None:
+        self.ranked.inc(self._rank(ix), value)
+
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        self.ranked._inc_pair(self._rank(dec_ix), self._rank(inc_ix), value)
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[V]) -> None:
+        _check_same_length(ixs, values)
+        self.ranked.inc_many([self._rank(int(ix)) for ix in ixs], values)
+
+    def snapshot(self) -> 'CompressedAggregator':
+        # keys are never modified in place, only replaced
+        snapshot = CompressedAggregator(zero_factory=self.zero_factory)
+        snapshot.keys = self.keys
+        snapshot.ranks = self.ranks
+        snapshot.ranked = self.ranked.snapshot()
+        return snapshot
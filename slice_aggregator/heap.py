@@ -1,9 +1,28 @@
+import heapq
+import typing
+
+
 class IndexedUniqueMaxHeap:
+    """ A binary max heap of unique integers, with an index for removing arbitrary elements
+
+    It's the default tracker of non-zero indices. Trackers implement ``add``, ``remove``, ``max``,
+    ``__contains__``, ``__len__``, ``__iter__`` and a ``from_iterable`` class method.
+    """
 
     def __init__(self):
         self.data = []
         self.index = {}
 
+    @classmethod
+    def from_iterable(cls, values: typing.Iterable[int]) -> 'IndexedUniqueMaxHeap':
+        """ Build a heap of the unique values in linear time """
+        heap = cls()
+        heap.data = list(set(values))
+        heap.index = {value: ix for ix, value in enumerate(heap.data)}
+        for ix in reversed(range(len(heap) // 2)):
+            heap._sift_down(ix)
+        return heap
+
     def _swap(self, ix1: int, ix2: int) -> None:
         ix1 = ix1 % len(self)
         ix2 = ix2 % len(self)
@@ -16,12 +35,7 @@ class IndexedUniqueMaxHeap:
         self.index[v2] = ix1
         self.index[v1] = ix2
 
-    def add(self, value: int) -> None:
-        if value in self:
-            return
-        child_ix = len(self)
-        self.data.append(value)
-        self.index[value] = child_ix
+    def _sift_up(self, child_ix: int) -> None:
         parent_ix = (child_ix - 1) // 2
         while child_ix > 0 and self.data[child_ix] > self.data[parent_ix]:
             self._swap(child_ix, parent_ix)
@@ -29,22 +43,36 @@ class IndexedUniqueMaxHeap:
             child_ix = parent_ix
             parent_ix = (child_ix - 1) // 2
 
-    def remove(self, value: int) -> None:
-        if value not in self:
-            return
-        ix = self.index[value]
-        self._swap(ix, -1)
-        del self.data[-1]
-        del self.index[value]
+    def _sift_down(self, ix: int) -> None:
         while True:
             snd = 2 * (ix + 1)
             fst = snd - 1
             if fst >= len(self):
                 break
             selected = snd if snd < len(self) and self.data[snd] >= self.data[fst] else fst
+            if self.data[selected] <= self.data[ix]:
+                break
             self._swap(ix, selected)
             ix = selected
 
+    def add(self, value: int) -> None:
+        if value in self:
+            return
+        self.data.append(value)
+        self.index[value] = len(self) - 1
+        self._sift_up(len(self) - 1)
+
+    def remove(self, value: int) -> None:
+        if value not in self:
+            return
+        ix = self.index[value]
+        self._swap(ix, -1)
+        del self.data[-1]
+        del self.index[value]
+        if ix < len(self):
+            self._sift_down(ix)
+            self._sift_up(ix)
+
     def max(self) -> int:
         return self.data[0] if self.data else None
 
@@ -53,3 +81,58 @@ class IndexedUniqueMaxHeap:
 
     def __len__(self) -> int:
         return len(self.data)
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self.data)
+
+
+class LazyMaxHeap:
+    """ A max heap of unique integers that removes elements only when they reach the top
+
+    Removal is constant-time, stale elements are skipped by ``max``.
+    """
+
+    def __init__(self):
+        self.data = []
+        self.members = set()
+        self.queued = set()
+
+    @classmethod
+    def from_iterable(cls, values: typing.Iterable[int]) -> 'LazyMaxHeap':
+        """ Build a heap of the unique values in linear time """
+        heap = cls()
+        heap.members = set(values)
+        heap._rebuild()
+        return heap
+
+    def _rebuild(self) -> None:
+        self.data = [-value for value in self.members]
+        heapq.heapify(self.data)
+        self.queued = set(self.members)
+
+    def add(self, value: int) -> None:
+        if value in self.members:
+            return
+        self.members.add(value)
+        if value not in self.queued:
+            self.queued.add(value)
+            heapq.heappush(self.data, -value)
+
+    def remove(self, value: int) -> None:
+        self.members.discard(value)
+        if len(self.data) > 2 * len(self.members) + 64:
+            self._rebuild()
+
+    def max(self) -> int:
+        while self.data and -self.data[0] not in self.members:
+            self.queued.discard(-heapq.heappop(self.data))
+        return -self.data[0] if self.data else None
+
+    def __contains__(self, value: int) -> bool:
+        return value in self.members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self.members)
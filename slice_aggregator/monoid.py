@@ -0,0 +1,250 @@
+import typing
+
+from . import by_slices
+from .by_slices import (
+    V,
+    ZT,
+    _check_same_length,
+)
+
+OP = typing.Callable[[V, V], V]
+POWER = typing.Optional[typing.Callable[[V, int], V]]
+
+
+class _MonoidAggregator(by_slices.Aggregator):
+    """ Methods shared by aggregators of values combined with an associative operation """
+
+    def __init__(self, *, operation: OP, identity: V, identity_test: ZT = None):
+        self.operation = operation
+        self.identity = identity  # read only
+        self.identity_test = identity_test
+        self.low = None
+        self.high = None
+
+    def _is_identity(self, value: V) -> bool:
+        if self.identity_test is None:
+            return value == self.identity
+        return self.identity_test(value)
+
+    def _is_zero(self, value: V) -> bool:
+        return self._is_identity(value)
+
+    def _widen(self, start: int, stop: int) -> None:
+        """ Extend the bounds of indices that may have values other than the identity """
+        self.low = start if self.low is None else min(self.low, start)
+        self.high = stop - 1 if self.high is None else max(self.high, stop - 1)
+
+    def _clamp(self, start: typing.Optional[int], stop: typing.Optional[int]
+               ) -> typing.Tuple[int, int]:
+        start = self.low if start is None else max(start, self.low)
+        stop = self.high + 1 if stop is None else min(stop, self.high + 1)
+        return start, stop
+
+    def inc(self, ix: int, value: V) -> None:
+        """ Combine the value assigned to an index with another one, on the right """
+        self.set(ix, self.operation(self._get_point(ix), value))
+
+    def dec(self, ix: int, value: V) -> None:
+        raise TypeError("Values combined with an arbitrary operation can't be subtracted")
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[V]) -> None:
+        _check_same_length(ixs, values)
+        for ix, value in zip(ixs, values):
+            self.inc(int(ix), value)
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        return None if self.low is None else (self.low, self.high)
+
+
+class SegmentTreeAggregator(_MonoidAggregator):
+    """ An aggregator of values combined with any associative operation with an identity
+
+    It doesn't need subtraction, so it aggregates for example by maximum, minimum or top k.
+    Indices are unbounded and only nodes over indices with values other than the identity
+    are stored. A node at level ``k`` combines values assigned to indices ``i`` with equal
+    ``i >> k``, queries combine nodes bottom-up, from both ends of the slice,
+    so both reading and writing take ``O(log v)`` operations.
+
+    :param operation: an associative operation combining two values, it must not modify them
+    :param identity: the value such that combining with it doesn't change other values
+    :param identity_test: test for equality to the identity, ``==`` by default
+    """
+
+    def __init__(self, *, operation: OP, identity: V, identity_test: ZT = None):
+        super().__init__(operation=operation, identity=identity, identity_test=identity_test)
+        self.levels = [{}]
+
+    def _node(self, level: int, position: int) -> V:
+        return self.levels[level].get(position, self.identity)
+
+    def _set_node(self, level: int, position: int, value: V) -> None:
+        if self._is_identity(value):
+            self.levels[level].pop(position, None)
+        else:
+            self.levels[level][position] = value
+
+    def _grow(self, height: int) -> None:
+        """ Compute levels of nodes up to ``height`` """
+        while len(self.levels) < height:
+            below = self.levels[-1]
+            self.levels.append({})
+            for position in {position >> 1 for position in below}:
+                self._set_node(len(self.levels) - 1, position, self.operation(
+                    below.get(2 * position, self.identity),
+                    below.get(2 * position + 1, self.identity)))
+
+    def set(self, ix: int, value: V) -> None:
+        self._widen(ix, ix + 1)
+        self._set_node(0, ix, value)
+        for level in range(1, len(self.levels)):
+            ix >>= 1
+            self._set_node(level, ix, self.operation(self._node(level - 1, 2 * ix),
+                                                     self._node(level - 1, 2 * ix + 1)))
+
+    def _get_point(self, ix: int) -> V:
+        return self._node(0, ix)
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        if self.low is None:
+            return self.identity
+        start, stop = self._clamp(start, stop)
+        left = right = self.identity
+        level = 0
+        while start < stop:
+            if level == len(self.levels):
+                self._grow(level + 1)
+            if start & 1:
+                left = self.operation(left, self._node(level, start))
+                start += 1
+            if stop & 1:
+                stop -= 1
+                right = self.operation(self._node(level, stop), right)
+            start >>= 1
+            stop >>= 1
+            level += 1
+        return self.operation(left, right)
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        """ Iterate over indices with values other than the identity and the values """
+        return iter(sorted(self.levels[0].items()))
+
+
+class LazySegmentTreeAggregator(_MonoidAggregator):
+    """ Like :class:`SegmentTreeAggregator`, but also assigning a value to all indices of a slice
+
+    Values assigned to whole subtrees are kept in their roots and pushed down to children
+    only when a later assignment covers a part of the subtree, so :meth:`assign` takes
+    ``O(log v)`` operations, like reading. Nodes are visited top-down, from two roots covering
+    negative and nonnegative indices, that are raised as indices grow.
+
+    :param operation: an associative operation combining two values, it must not modify them
+    :param identity: the value such that combining with it doesn't change other values
+    :param identity_test: test for equality to the identity, ``==`` by default
+    :param power: computes the value combined with itself ``n`` times, by repeated squaring
+        with ``operation`` by default, so for example ``lambda v, n: v`` for maximum
+    """
+
+    def __init__(self, *, operation: OP, identity: V, identity_test: ZT = None,
+                 power: POWER = None):
+        super().__init__(operation=operation, identity=identity, identity_test=identity_test)
+        self.power = power if power is not None else self._power
+        self.height = 0
+        self.nodes = {}
+        self.assigned = {}
+
+    def _power(self, value: V, n: int) -> V:
+        result = self.identity
+        while n:
+            if n & 1:
+                result = self.operation(result, value)
+            value = self.operation(value, value)
+            n >>= 1
+        return result
+
+    def _node(self, level: int, position: int) -> V:
+        return self.nodes.get((level, position), self.identity)
+
+    def _update(self, level: int, position: int) -> None:
+        value = self.operation(self._node(level - 1, 2 * position),
+                               self._node(level - 1, 2 * position + 1))
+        if self._is_identity(value):
+            self.nodes.pop((level, position), None)
+        else:
+            self.nodes[level, position] = value
+
+    def _assign_node(self, level: int, position: int, value: V) -> None:
+        """ Assign the value to all indices under a node """
+        if level:
+            self.assigned[level, position] = value
+        self.nodes[level, position] = self.power(value, 1 << level)
+        if self._is_identity(self.nodes[level, position]):
+            del self.nodes[level, position]
+
+    def _raise(self, start: int, stop: int) -> None:
+        """ Raise the roots so that they cover the slice """
+        while start < -(1 << self.height) or stop > 1 << self.height:
+            self.height += 1
+            for position in [-1, 0]:
+                self._update(self.height, position)
+
+    def _assign(self, level: int, position: int, start: int, stop: int, value: V) -> None:
+        low = position << level
+        high = (position + 1) << level
+        if stop <= low or high <= start:
+            return
+        if start <= low and high <= stop:
+            self._assign_node(level, position, value)
+            return
+        pending = self.assigned.pop((level, position), None)
+        if pending is not None:
+            self._assign_node(level - 1, 2 * position, pending)
+            self._assign_node(level - 1, 2 * position + 1, pending)
+        self._assign(level - 1, 2 * position, start, stop, value)
+        self._assign(level - 1, 2 * position + 1, start, stop, value)
+        self._update(level, position)
+
+    def assign(self, start: int, stop: int, value: V) -> None:
+        """ Assign the value to every index of a slice """
+        if start is None or stop is None:
+            raise ValueError("Only bounded slices can be assigned to")
+        if start >= stop:
+            return
+        self._widen(start, stop)
+        self._raise(start, stop)
+        for position in [-1, 0]:
+            self._assign(self.height, position, start, stop, value)
+
+    def set(self, ix: int, value: V) -> None:
+        self.assign(ix, ix + 1, value)
+
+    def _get(self, level: int, position: int, start: int, stop: int) -> V:
+        low = position << level
+        high = (position + 1) << level
+        start = max(start, low)
+        stop = min(stop, high)
+        if start >= stop:
+            return self.identity
+        if start == low and stop == high:
+            return self._node(level, position)
+        pending = self.assigned.get((level, position))
+        if pending is not None:
+            return self.power(pending, stop - start)
+        return self.operation(self._get(level - 1, 2 * position, start, stop),
+                              self._get(level - 1, 2 * position + 1, start, stop))
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        if self.low is None:
+            return self.identity
+        start, stop = self._clamp(start, stop)
+        if start >= stop:
+            return self.identity
+        return self.operation(self._get(self.height, -1, start, stop),
+                              self._get(self.height, 0, start, stop))
+
+    def __setitem__(self, item: typing.Union[int, slice], value: V) -> None:
+        if isinstance(item, slice):
+            if item.step is not None:
+                raise ValueError("Slicing with step is not supported")
+            self.assign(item.start, item.stop, value)
+        else:
+            self.set(item, value)
@@ -0,0 +1,253 @@
+import functools
+import itertools
+import operator
+import typing
+
+from .by_slices import (
+    V,
+    ZF,
+    ZT,
+    _default_zero,
+    _split,
+    binary_tail,
+)
+
+Point = typing.Tuple[int, ...]
+Box = typing.Tuple[typing.Tuple[typing.Optional[int], typing.Optional[int]], ...]
+
+
+class Aggregator(typing.Generic[V]):
+    """ A data structure for assigning values to points and aggregating them by boxes
+
+    Points are tuples of indices and boxes are tuples of ``(start, stop)`` pairs, one per
+    dimension. It provides a method-based interface and an alternative based on `__getitem__`
+    with tuples of indices and slices, like ``a[t, k] += v`` and ``a[t0:t1, k0:k1]``.
+
+    **Warning**
+    Only the method-based interface is suitable for custom values handling inplace operators.
+    Read the documentation on advances usage for more details.
+    """
+
+    def __init__(self, *, ndim: int, zero_factory: ZF = None):
+        self.ndim = ndim
+        self.zero_factory = zero_factory if zero_factory is not None else _default_zero
+
+    def get(self, box: Box) -> V:
+        """ Get the aggregated value of all points contained by the specified box """
+        raise NotImplementedError()
+
+    def inc(self, point: Point, value: V) -> None:
+        """ Increment the value assigned to a point """
+        raise NotImplementedError()
+
+    def dec(self, point: Point, value: V) -> None:
+        """ Decrement the value assigned to a point """
+        self.inc(point, -value)
+
+    def set(self, point: Point, value: V) -> None:
+        """ Set the value assigned to a point """
+        self.inc(point, value - self.get(tuple((ix, ix + 1) for ix in point)))
+
+    def _check_ndim(self, key: typing.Sequence[typing.Any]) -> None:
+        if len(key) != self.ndim:
+            raise IndexError("Expected {} indices, got {}".format(self.ndim, len(key)))
+
+    def __getitem__(self, item: typing.Tuple[typing.Union[int, slice], ...]) -> V:
+        if not isinstance(item, tuple):
+            item = (item,)
+        self._check_ndim(item)
+        box = []
+        for key in item:
+            if isinstance(key, slice):
+                if key.step is not None:
+                    raise ValueError("Slicing with step is not supported")
+                box.append((key.start, key.stop))
+            else:
+                box.append((key, key + 1))
+        return self.get(tuple(box))
+
+    def __setitem__(self, point: typing.Union[int, Point], value: V) -> None:
+        if not isinstance(point, tuple):
+            point = (point,)
+        self.set(point, value)
+
+
+class LeftBoundedAggregator(Aggregator):
+    """ An aggregator for points with nonnegative indices
+
+    Every dimension uses the same table layout as
+    :class:`slice_aggregator.by_slices.LeftBoundedAggregator`, so both reading and writing take
+    ``O(log^d v)`` table operations.
+    """
+
+    def _table_get(self, node: Point) -> V:
+        raise NotImplementedError()
+
+    def _table_set(self, node: Point, value: V) -> None:
+        raise NotImplementedError()
+
+    def _nonzero_ix_upper_bounds(self) -> Point:
+        raise NotImplementedError()
+
+    def _suffix(self, corner: Point, bounds: Point) -> V:
+        result = self.zero_factory()
+        paths = []
+        for ix, bound in zip(corner, bounds):
+            path = []
+            while ix <= bound:
+                path.append(ix)
+                ix += binary_tail(ix + 1)  # +1 for 0-based indexing
+            paths.append(path)
+        for node in itertools.product(*paths):
+            result += self._table_get(node)
+        return result
+
+    def get(self, box: Box) -> V:
+        self._check_ndim(box)
+        for start, stop in box:
+            if start is not None and start < 0:
+                raise IndexError("start is out of range")
+            if stop is not None and stop < 0:
+                raise IndexError("stop is out of range")
+        result = self.zero_factory()
+        if any(start is not None and stop is not None and start >= stop for start, stop in box):
+            return result
+        bounds = self._nonzero_ix_upper_bounds()
+        # inclusion-exclusion over corners, every stop beyond the bound has a zero suffix sum
+        corners = []
+        for (start, stop), bound in zip(box, bounds):
+            corners.append([(start or 0, False)])
+            if stop is not None and stop <= bound:
+                corners[-1].append((stop, True))
+        for corner in itertools.product(*corners):
+            suffix = self._suffix(tuple(ix for ix, _ in corner), bounds)
+            if sum(negated for _, negated in corner) % 2:
+                result -= suffix
+            else:
+                result += suffix
+        return result
+
+    def inc(self, point: Point, value: V) -> None:
+        self._check_ndim(point)
+        if any(ix < 0 for ix in point):
+            raise IndexError("ix out of range")
+        paths = []
+        for ix in point:
+            path = []
+            while ix >= 0:
+                path.append(ix)
+                ix -= binary_tail(ix + 1)  # +1 for 0-based indexing
+            paths.append(path)
+        for node in itertools.product(*paths):
+            self._table_set(node, self._table_get(node) + value)
+
+
+class FixedSizeAggregator(LeftBoundedAggregator):
+    """ A left-bounded aggregator over a fixed shape, with a flat, row-major table
+
+    :param shape: the number of indices in every dimension
+    :param table: the table, ``[zero_factory()] * product(shape)`` by default
+    :param zero_factory: callable returning additive identity
+    """
+
+    def __init__(self, *, shape: Point, table: typing.MutableSequence[V] = None,
+                 zero_factory: ZF = None):
+        super().__init__(ndim=len(shape), zero_factory=zero_factory)
+        self.shape = tuple(shape)
+        size = functools.reduce(operator.mul, self.shape, 1)
+        self.table = table if table is not None else [self.zero_factory()] * size
+        if len(self.table) != size:
+            raise ValueError("Table size doesn't match the shape")
+        self.strides = tuple(functools.reduce(operator.mul, self.shape[dim + 1:], 1)
+                             for dim in range(self.ndim))
+
+    def _flat(self, node: Point) -> int:
+        return sum(ix * stride for ix, stride in zip(node, self.strides))
+
+    def _table_get(self, node: Point) -> V:
+        return self.table[self._flat(node)]
+
+    def _table_set(self, node: Point, value: V) -> None:
+        self.table[self._flat(node)] = value
+
+    def _nonzero_ix_upper_bounds(self) -> Point:
+        return tuple(size - 1 for size in self.shape)
+
+    def inc(self, point: Point, value: V) -> None:
+        self._check_ndim(point)
+        if any(ix >= size for ix, size in zip(point, self.shape)):
+            raise IndexError("ix out of range")
+        super().inc(point, value)
+
+
+class VariableSizeLeftBoundedAggregator(LeftBoundedAggregator):
+    """ A left-bounded aggregator storing only the non-zero table entries
+
+    Upper bounds of indices with non-zero values are the maximum indices ever written to.
+
+    :param ndim: the number of dimensions
+    :param zero_factory: callable returning additive identity
+    :param zero_test: test for equality to zero
+    """
+
+    def __init__(self, *, ndim: int, zero_factory: ZF = None, zero_test: ZT = None):
+        super().__init__(ndim=ndim, zero_factory=zero_factory)
+        self.table = {}
+        self.bounds = (0,) * ndim
+        self.zero = self.zero_factory()  # read only
+        self.zero_test = zero_test
+
+    def _is_zero(self, value: V) -> bool:
+        return value == self.zero if self.zero_test is None else self.zero_test(value)
+
+    def _table_get(self, node: Point) -> V:
+        return self.table[node] if node in self.table else self.zero
+
+    def _table_set(self, node: Point, value: V) -> None:
+        if self._is_zero(value):
+            self.table.pop(node, None)
+        else:
+            self.table[node] = value
+
+    def _nonzero_ix_upper_bounds(self) -> Point:
+        return self.bounds
+
+    def inc(self, point: Point, value: V) -> None:
+        super().inc(point, value)
+        self.bounds = tuple(max(ix, bound) for ix, bound in zip(point, self.bounds))
+
+
+class UnboundedAggregator(Aggregator):
+    """ An aggregator for points with any indices
+
+    It's a combination of left-bounded aggregators, one for every orthant,
+    with negative indices mirrored like in :class:`slice_aggregator.by_slices.UnboundedAggregator`.
+    Orthants are created on the first write.
+
+    :param ndim: the number of dimensions
+    :param left_bounded_factory: callable returning an empty left-bounded aggregator
+    :param zero_factory: callable returning additive identity
+    """
+
+    def __init__(self, *, ndim: int,
+                 left_bounded_factory: typing.Callable[[], LeftBoundedAggregator],
+                 zero_factory: ZF = None):
+        super().__init__(ndim=ndim, zero_factory=zero_factory)
+        self.left_bounded_factory = left_bounded_factory
+        self.orthants = {}
+
+    def get(self, box: Box) -> V:
+        self._check_ndim(box)
+        result = self.zero_factory()
+        for parts in itertools.product(*(_split(start, stop) for start, stop in box)):
+            orthant = self.orthants.get(tuple(negative for negative, _, _ in parts))
+            if orthant is not None:
+                result += orthant.get(tuple((start, stop) for _, start, stop in parts))
+        return result
+
+    def inc(self, point: Point, value: V) -> None:
+        self._check_ndim(point)
+        key = tuple(ix < 0 for ix in point)
+        if key not in self.orthants:
+            self.orthants[key] = self.left_bounded_factory()
+        self.orthants[key].inc(tuple(-1 - ix if ix < 0 else ix for ix in point), value)
@@ -0,0 +1,128 @@
+import typing
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .by_ixs import _dual_increments
+from .by_slices import (
+    V,
+    ZF,
+    _check_same_length,
+    _coalesce,
+    _default_zero,
+)
+
+
+_INT64_SAFE = 2.0 ** 62
+
+
+def _ixs_array(ixs: typing.Sequence[typing.Optional[int]]
+               ) -> typing.Optional[typing.Tuple['np.ndarray', 'np.ndarray']]:
+    """ Indices as int64 and a mask of missing ones, or None if they don't fit """
+    ixs = np.asarray(ixs)
+    if ixs.ndim != 1:
+        return None
+    if not len(ixs):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    if ixs.dtype.kind in 'iu':
+        return ixs.astype(np.int64), np.zeros(len(ixs), dtype=bool)
+    if ixs.dtype != object:
+        return None
+    missing = np.equal(ixs, None)
+    try:
+        return np.where(missing, 0, ixs).astype(np.int64), missing
+    except (OverflowError, TypeError):
+        return None
+
+
+def _slices_by_ixs_numpy(starts: typing.Sequence[typing.Optional[int]],
+                         stops: typing.Sequence[typing.Optional[int]],
+                         values: typing.Sequence[V], ixs: typing.Sequence[int]
+                         ) -> typing.Optional['np.ndarray']:
+    if not len(values) and not isinstance(values, np.ndarray):
+        values = np.zeros(0, dtype=np.int64)  # no slices, no values to infer the type from
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iufc':
+        return None
+    if values.dtype.kind in 'iu':
+        # no running sum exceeds the sum of magnitudes, with a margin for the rounding
+        if np.abs(values, dtype=np.float64).sum() >= _INT64_SAFE:
+            return None
+        values = values.astype(np.int64)
+    starts, stops, ixs = _ixs_array(starts), _ixs_array(stops), _ixs_array(ixs)
+    if starts is None or stops is None or ixs is None or ixs[1].any():
+        return None
+    (starts, no_start), (stops, no_stop), (ixs, _) = starts, stops, ixs
+    bounded = ~no_start & ~no_stop
+    if (bounded & (starts > stops)).any():
+        raise ValueError("start > stop")
+    nonempty = ~bounded | (starts < stops)
+    with_start = ~no_start & nonempty
+    with_stop = ~no_stop & nonempty
+    # the same increments as of the dual in by_ixs.Aggregator, summed up from the right
+    positions = np.concatenate([starts[with_start] - 1, stops[with_stop] - 1])
+    deltas = np.concatenate([-values[with_start], values[with_stop]])
+    order = np.argsort(positions, kind='stable')
+    positions = positions[order]
+    suffixes = np.zeros((len(positions) + 1,) + values.shape[1:], dtype=deltas.dtype)
+    suffixes[:-1] = np.cumsum(deltas[order][::-1], axis=0)[::-1]
+    return suffixes[np.searchsorted(positions, ixs, side='left')] + values[no_stop].sum(axis=0)
+
+
+def _slices_by_ixs_python(starts: typing.Sequence[typing.Optional[int]],
+                          stops: typing.Sequence[typing.Optional[int]],
+                          values: typing.Sequence[V], ixs: typing.Sequence[int],
+                          zero_factory: ZF) -> typing.List[V]:
+    dual_ixs, dual_values, value_offset = _dual_increments(starts, stops, values)
+    points = _coalesce(dual_ixs, dual_values)
+    positions = sorted(points, reverse=True)
+    if value_offset is None:
+        value_offset = zero_factory()
+    result = [None] * len(ixs)
+    suffix = zero_factory()
+    k = 0
+    for i in sorted(range(len(ixs)), key=lambda i: ixs[i], reverse=True):
+        ix = int(ixs[i])
+        while k < len(positions) and positions[k] >= ix:
+            suffix = suffix + points[positions[k]]
+            k += 1
+        result[i] = suffix + value_offset
+    return result
+
+
+def slices_by_ixs(starts: typing.Sequence[typing.Optional[int]],
+                  stops: typing.Sequence[typing.Optional[int]], values: typing.Sequence[V],
+                  ixs: typing.Sequence[int], *, zero_factory: ZF = None
+                  ) -> typing.Sequence[V]:
+    """ Aggregate values assigned to slices by indices, when all of them are known in advance
+
+    It gives the same results as incrementing the slices of
+    :func:`slice_aggregator.slices_by_ixs` and reading the indices, but instead of updating
+    and querying a tree, it sorts the slice endpoints once and sweeps over them with running sums,
+    in ``O((n + q) log (n + q))`` time for ``n`` slices and ``q`` indices, with a small constant.
+    With NumPy installed and numeric values, the sort and the sweep are vectorized,
+    with integers summed up in 64 bits, unless they are too large for it.
+    Float results may differ from the online ones by rounding, as values are summed up
+    in a different order.
+
+    :param starts: slice starts, ``None`` for unbounded
+    :param stops: slice stops, ``None`` for unbounded
+    :param values: values assigned to slices
+    :param ixs: indices to aggregate by
+    :param zero_factory: callable returning additive identity, values are handled one by one
+        in pure Python when it's given
+    :return: aggregated values of slices containing the indices, as a NumPy array
+        if the vectorized path was taken, as a list otherwise
+    """
+    _check_same_length(starts, stops)
+    _check_same_length(starts, values)
+    if np is not None and zero_factory is None:
+        result = _slices_by_ixs_numpy(starts, stops, values, ixs)
+        if result is not None:
+            return result
+    if (np is not None and isinstance(values, np.ndarray) and values.dtype.kind in 'iu'
+            and values.ndim == 1):
+        values = values.tolist()  # summed up as Python integers, which don't overflow
+    return _slices_by_ixs_python(starts, stops, values, ixs, zero_factory or _default_zero)
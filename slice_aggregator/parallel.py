@@ -0,0 +1,62 @@
+import concurrent.futures
+import itertools
+import os
+import typing
+
+
+def _chunks(items: typing.Iterable[typing.Any], size: int) -> typing.Iterator[typing.List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def build(factory: typing.Callable[..., typing.Any], items: typing.Iterable[typing.Any], *,
+          chunk_size: int = 100000, max_workers: int = None,
+          executor: concurrent.futures.Executor = None) -> typing.Any:
+    """ Build an aggregator from a stream of items using many processes
+
+    The stream is split into chunks, partial aggregators are built from them by
+    ``factory(items=chunk)`` in worker processes and merged as they arrive.
+    At most two chunks per worker are in flight, so the stream doesn't have to fit in memory.
+
+    :param factory: picklable callable taking an ``items`` keyword argument and returning
+        a mergeable aggregator, like :func:`slice_aggregator.ixs_by_slices`
+        or :func:`slice_aggregator.slices_by_ixs`
+    :param items: the items, in the format expected by the factory
+    :param chunk_size: the number of items per partial aggregator
+    :param max_workers: the number of worker processes, the number of CPUs by default
+    :param executor: an executor to use instead of a new
+        :class:`concurrent.futures.ProcessPoolExecutor`
+    :return: the merged aggregator
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+    result = None
+
+    def merge_results(futures):
+        nonlocal result
+        for future in futures:
+            if result is None:
+                result = future.result()
+            else:
+                result.merge(future.result())
+
+    try:
+        pending = set()
+        for chunk in _chunks(items, chunk_size):
+            if len(pending) >= 2 * max_workers:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                merge_results(done)
+            pending.add(executor.submit(factory, items=chunk))
+        merge_results(pending)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return result if result is not None else factory(items=[])
@@ -0,0 +1,228 @@
+import operator
+import typing
+
+from .by_slices import (
+    Aggregator as Dual,
+    V,
+    ZF,
+    ZT,
+)
+
+
+_ASSIGNED_GUARD = object()
+
+
+def _binary(op: typing.Callable[[V, V], V]) -> typing.Callable[['_SliceSum', V], V]:
+    return lambda self, other: op(self.value(), other)
+
+
+def _reflected(op: typing.Callable[[V, V], V]) -> typing.Callable[['_SliceSum', V], V]:
+    return lambda self, other: op(other, self.value())
+
+
+class _SliceSum:
+    """ The result of slicing, with ``+=`` and ``-=`` incrementing all indices of the slice
+    by the exact value
+
+    Every other operation acts on the sum of the slice at the time of slicing,
+    and raises :class:`ValueError` if the slice is unbounded and the sum is infinite.
+    """
+    __slots__ = ('aggregator', 'start', 'stop', 'sum')
+
+    def __init__(self, aggregator: 'Aggregator', start: typing.Optional[int],
+                 stop: typing.Optional[int], sum: typing.Optional[V]):
+        self.aggregator = aggregator
+        self.start = start
+        self.stop = stop
+        self.sum = sum  # None if infinite
+
+    def value(self) -> V:
+        if self.sum is None:
+            raise ValueError("The slice is unbounded and has non-zero values assigned")
+        return self.sum
+
+    def __iadd__(self, value: V) -> typing.Any:
+        self.aggregator.inc(self.start, self.stop, value)
+        return _ASSIGNED_GUARD
+
+    def __isub__(self, value: V) -> typing.Any:
+        self.aggregator.dec(self.start, self.stop, value)
+        return _ASSIGNED_GUARD
+
+    __add__ = _binary(operator.add)
+    __sub__ = _binary(operator.sub)
+    __mul__ = _binary(operator.mul)
+    __truediv__ = _binary(operator.truediv)
+    __floordiv__ = _binary(operator.floordiv)
+    __mod__ = _binary(operator.mod)
+    __pow__ = _binary(operator.pow)
+    __eq__ = _binary(operator.eq)
+    __ne__ = _binary(operator.ne)
+    __lt__ = _binary(operator.lt)
+    __le__ = _binary(operator.le)
+    __gt__ = _binary(operator.gt)
+    __ge__ = _binary(operator.ge)
+    __radd__ = _reflected(operator.add)
+    __rsub__ = _reflected(operator.sub)
+    __rmul__ = _reflected(operator.mul)
+    __rtruediv__ = _reflected(operator.truediv)
+    __rfloordiv__ = _reflected(operator.floordiv)
+    __rmod__ = _reflected(operator.mod)
+    __rpow__ = _reflected(operator.pow)
+
+    def __hash__(self) -> int:
+        return hash(self.value())
+
+    def __neg__(self) -> V:
+        return -self.value()
+
+    def __pos__(self) -> V:
+        return +self.value()
+
+    def __abs__(self) -> V:
+        return abs(self.value())
+
+    def __round__(self, ndigits: typing.Optional[int] = None) -> V:
+        return round(self.value(), ndigits)
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.value(), format_spec)
+
+    def __bool__(self) -> bool:
+        return bool(self.value())
+
+    def __float__(self) -> float:
+        return float(self.value())
+
+    def __int__(self) -> int:
+        return int(self.value())
+
+    def __repr__(self) -> str:
+        try:
+            return repr(self.value())
+        except ValueError:
+            return '<unbounded sum>'
+
+
+class Aggregator(typing.Generic[V]):
+    """ A data structure for assigning values to slices and aggregating them by slices
+
+    Incrementing every index of ``[l, r)`` by ``v`` changes the sum of ``[0, x)`` by a piecewise
+    linear function of ``x``, so the sums are kept as ``x * slope(x) + intercept(x)``, where
+    ``slope`` and ``intercept`` are sums of values assigned to indices not greater than ``x``
+    in two underlying aggregators.
+
+    It provides a method-based interface and an alternative based on `__getitem__` and slices.
+    Slicing gives an object supporting ``+=`` and ``-=`` and acting like the sum of the slice,
+    read when slicing, otherwise. ``a[ix] = v`` sets the value assigned to a single index.
+
+    **Warning:**
+    Only the method-based interface is suitable for custom values handling inplace operators.
+    Read the documentation on advances usage for more details.
+    """
+
+    def __init__(self, *, slopes: Dual, intercepts: Dual, zero_factory: ZF = None,
+                 zero_test: ZT = None):
+        self.slopes = slopes
+        self.intercepts = intercepts
+        self.zero_factory = zero_factory if zero_factory is not None else int
+        self.zero = self.zero_factory()  # read only
+        self.zero_test = zero_test
+        self.slope_offset = self.zero_factory()
+        self.intercept_offset = self.zero_factory()
+
+    def _prefix(self, x: int) -> V:
+        """ Sum of ``[0, x)``, or minus the sum of ``[x, 0)`` for negative ``x`` """
+        slope, intercept = self.slopes.get(None, x + 1), self.intercepts.get(None, x + 1)
+        return (slope + self.slope_offset) * x + intercept + self.intercept_offset
+
+    def _is_zero(self, value: V) -> bool:
+        return value == self.zero if self.zero_test is None else self.zero_test(value)
+
+    def _get(self, start: typing.Optional[int], stop: typing.Optional[int]
+             ) -> typing.Optional[V]:
+        """ Like get, but returns None for infinite sums """
+        if start is not None and stop is not None and start >= stop:
+            return self.zero_factory()
+        if stop is None:
+            if not self._is_zero(self.slope_offset + self.slopes.get(None, None)):
+                return None
+            result = self.intercept_offset + self.intercepts.get(None, None)
+        else:
+            result = self._prefix(stop)
+        if start is None:
+            if not self._is_zero(self.slope_offset):
+                return None
+            return result - self.intercept_offset
+        return result - self._prefix(start)
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        """ Get the aggregated value of all indices contained by the specified slice
+
+        Raises :class:`ValueError` if the slice is unbounded and the sum is infinite.
+        """
+        result = self._get(start, stop)
+        if result is None:
+            raise ValueError("The slice is unbounded and has non-zero values assigned")
+        return result
+
+    def inc(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
+        """ Increment the values assigned to all indices contained by the specified slice """
+        if start is not None and stop is not None:
+            if start > stop:
+                raise ValueError("start > stop")
+            if start == stop:
+                return
+        clamped_zero = 0 if stop is None else min(0, stop)
+        if start is None:
+            self.slope_offset += value
+            self.intercept_offset -= value * clamped_zero
+        else:
+            clamped_zero = max(start, clamped_zero)
+            self.slopes.inc(start, value)
+            self.intercepts.inc(start, -value * start)
+            self.intercept_offset += value * (start - clamped_zero)
+        if stop is not None:
+            self.slopes.inc(stop, -value)
+            self.intercepts.inc(stop, value * stop)
+
+    def dec(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
+        """ Decrement the values assigned to all indices contained by the specified slice """
+        self.inc(start, stop, -value)
+
+    def snapshot(self) -> 'Aggregator':
+        """ Get a read-only view of the current values, unaffected by later writes
+
+        See :meth:`slice_aggregator.by_slices.Aggregator.snapshot`.
+        """
+        snapshot = AggregatorSnapshot(slopes=self.slopes.snapshot(),
+                                      intercepts=self.intercepts.snapshot(),
+                                      zero_factory=self.zero_factory, zero_test=self.zero_test)
+        snapshot.slope_offset = self.slope_offset + snapshot.slope_offset  # copies
+        snapshot.intercept_offset = self.intercept_offset + snapshot.intercept_offset
+        return snapshot
+
+    def __getitem__(self, item: typing.Union[int, slice]) -> typing.Union[V, _SliceSum]:
+        if isinstance(item, slice):
+            if item.step is not None:
+                raise ValueError("Slicing with step is not supported")
+            return _SliceSum(self, item.start, item.stop, self._get(item.start, item.stop))
+        else:
+            return self.get(item, item + 1)
+
+    def __setitem__(self, item: typing.Union[int, slice], value: typing.Any) -> None:
+        if isinstance(item, slice):
+            if value is not _ASSIGNED_GUARD:
+                raise NotImplementedError("Operation not supported!")
+        else:
+            self.inc(item, item + 1, value - self.get(item, item + 1))
+
+
+class AggregatorSnapshot(Aggregator):
+    """ A read-only view of an aggregator, see :meth:`Aggregator.snapshot` """
+
+    def inc(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
+        raise TypeError("Snapshots are read-only")
+
+    def snapshot(self) -> 'AggregatorSnapshot':
+        return self
@@ -0,0 +1,466 @@
+""" A local server hosting named aggregators, and clients talking to it
+
+Requests and responses are frames of a little-endian length followed by a payload.
+A request payload is an operation code, the name of an aggregator and columns of numbers,
+each one a typecode, a length and packed values. Indices that may be missing come with a column
+of flags. Responses come in the order of requests, so clients send many requests on
+a connection without waiting for responses.
+"""
+import array
+import asyncio
+import collections
+import queue
+import socket
+import struct
+import sys
+import threading
+import typing
+
+from . import (
+    buffered,
+    by_ixs,
+    by_slices,
+)
+from .serialization import _typecode
+
+INC = 1
+GET = 2
+INC_SLICES = 3
+GET_IXS = 4
+
+_OK = 0
+_ERROR = 1
+_ERRORS = {error.__name__: error
+           for error in [IndexError, KeyError, OverflowError, TypeError, ValueError]}
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+Address = typing.Union[str, typing.Tuple[str, int]]
+
+
+def _column(typecode: str, values: typing.Iterable[typing.Any]) -> bytes:
+    values = array.array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return struct.pack('<cI', typecode.encode(), len(values)) + values.tobytes()
+
+
+def _optional_columns(ixs: typing.Iterable[typing.Optional[int]]) -> bytes:
+    ixs = list(ixs)
+    return (_column('B', [ix is None for ix in ixs])
+            + _column('q', [0 if ix is None else int(ix) for ix in ixs]))
+
+
+def _values_column(values: typing.Sequence[typing.Any]) -> bytes:
+    """ Values as a column of 64-bit integers, or of floats if integers don't fit """
+    typecode = _typecode(values)
+    if typecode == 'q':
+        try:
+            return _column(typecode, values)
+        except OverflowError:
+            pass
+    return _column('d', values)
+
+
+class _Payload:
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def struct(self, fmt: str) -> typing.Tuple[typing.Any, ...]:
+        result = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return result
+
+    def name(self) -> str:
+        length, = self.struct('<H')
+        self.offset += length
+        return self.data[self.offset - length:self.offset].decode(errors='replace')
+
+    def column(self) -> array.array:
+        typecode, length = self.struct('<cI')
+        values = array.array(typecode.decode())
+        size = values.itemsize * length
+        values.frombytes(self.data[self.offset:self.offset + size])
+        self.offset += size
+        if not _LITTLE_ENDIAN:
+            values.byteswap()
+        return values
+
+    def optional_column(self) -> typing.List[typing.Optional[int]]:
+        missing = self.column()
+        return [None if flag else ix for flag, ix in zip(missing, self.column())]
+
+
+def _name(name: str) -> bytes:
+    name = name.encode()[:0xffff]
+    return struct.pack('<H', len(name)) + name
+
+
+def _frame(payload: bytes) -> bytes:
+    return struct.pack('<I', len(payload)) + payload
+
+
+def _request(operation: int, name: str, *columns: bytes) -> bytes:
+    return _frame(struct.pack('<B', operation) + _name(name) + b''.join(columns))
+
+
+def _response(payload: bytes) -> typing.Optional[array.array]:
+    """ The values of a response, or None if there are none """
+    payload = _Payload(payload)
+    status, = payload.struct('<B')
+    if status == _ERROR:
+        error = payload.name()
+        raise _ERRORS.get(error, RuntimeError)(payload.name())
+    if payload.offset == len(payload.data):
+        return None
+    return payload.column()
+
+
+class Server:
+    """ Hosts named aggregators for clients connecting over a unix socket or local TCP
+
+    Increments of :func:`slice_aggregator.ixs_by_slices`-like aggregators are collected
+    in a :class:`slice_aggregator.buffered.BufferedAggregator` and applied in batches,
+    so writes between reads coalesce. Aggregators of :func:`slice_aggregator.slices_by_ixs`
+    get buffered duals. Requests are handled one by one on the event loop, so the aggregators
+    are never accessed concurrently. Integer values that don't fit in 64 bits are sent as floats.
+
+    :param aggregators: aggregators by names
+    :param default_factory: called to create aggregators with other names when they are first
+        used, like :func:`slice_aggregator.ixs_by_slices`; by default unknown names are errors
+    :param buffer_size: the number of buffered indices triggering a flush
+    """
+
+    def __init__(self, aggregators: typing.Dict[str, typing.Any] = None, *,
+                 default_factory: typing.Callable[[], typing.Any] = None,
+                 buffer_size: int = 1024):
+        self.aggregators = {}
+        self.default_factory = default_factory
+        self.buffer_size = buffer_size
+        self.server = None
+        self.handlers = {}  # writers of open connections and futures done when they're closed
+        self.loop = None
+        self.thread = None
+        for name, aggregator in (aggregators or {}).items():
+            self.add(name, aggregator)
+
+    def add(self, name: str, aggregator: typing.Any) -> None:
+        """ Host an aggregator, buffering its writes """
+        if isinstance(aggregator, by_ixs.Aggregator):
+            if not isinstance(aggregator.dual, buffered.BufferedAggregator):
+                aggregator.dual = buffered.BufferedAggregator(aggregator.dual,
+                                                              max_buffered=self.buffer_size)
+        elif not isinstance(aggregator, buffered.BufferedAggregator):
+            aggregator = buffered.BufferedAggregator(aggregator, max_buffered=self.buffer_size)
+        self.aggregators[name] = aggregator
+
+    def _aggregator(self, name: str) -> typing.Any:
+        if name not in self.aggregators:
+            if self.default_factory is None:
+                raise KeyError("No aggregator named {!r}".format(name))
+            self.add(name, self.default_factory())
+        return self.aggregators[name]
+
+    def _handle(self, payload: _Payload) -> bytes:
+        operation, = payload.struct('<B')
+        aggregator = self._aggregator(payload.name())
+        by_ixs_operation = operation in (INC_SLICES, GET_IXS)
+        if by_ixs_operation != isinstance(aggregator, by_ixs.Aggregator):
+            raise TypeError("Operation {} isn't supported by {}".format(
+                operation, type(aggregator).__name__))
+        if operation == INC:
+            aggregator.inc_many(payload.column(), payload.column())
+        elif operation == GET:
+            starts = payload.optional_column()
+            return _values_column(aggregator.get_many(starts, payload.optional_column()))
+        elif operation == INC_SLICES:
+            starts = payload.optional_column()
+            stops = payload.optional_column()
+            aggregator.inc_many(starts, stops, payload.column())
+        elif operation == GET_IXS:
+            return _values_column(aggregator.get_many(payload.column()))
+        else:
+            raise ValueError("Unknown operation {}".format(operation))
+        return b''
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.handlers[writer] = asyncio.get_event_loop().create_future()
+        try:
+            while True:
+                length, = struct.unpack('<I', await reader.readexactly(4))
+                payload = _Payload(await reader.readexactly(length))
+                try:
+                    response = struct.pack('<B', _OK) + self._handle(payload)
+                except Exception as e:
+                    # the message alone, as str(KeyError(message)) adds quotes
+                    message = str(e.args[0]) if len(e.args) == 1 else str(e)
+                    response = struct.pack('<B', _ERROR) + _name(type(e).__name__) + _name(message)
+                writer.write(_frame(response))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            self.handlers.pop(writer).set_result(None)
+
+    async def start(self, *, path: str = None, host: str = '127.0.0.1', port: int = 0
+                    ) -> Address:
+        """ Start listening on a unix socket if ``path`` is given, on TCP otherwise
+
+        :return: the path or the host and the port, useful when the port is picked by the system
+        """
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._serve, path=path)
+            return path
+        self.server = await asyncio.start_server(self._serve, host=host, port=port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self) -> None:
+        """ Stop listening and close all connections """
+        self.server.close()
+        handlers = list(self.handlers.values())
+        for writer in list(self.handlers):
+            writer.close()
+        for handler in handlers:
+            await handler
+
+    def start_in_thread(self, **kwargs: typing.Any) -> Address:
+        """ Run the server on an event loop in a daemon thread, see :meth:`start` for arguments
+
+        :return: the address of the server
+        """
+        self.loop = asyncio.new_event_loop()
+        started = queue.Queue()
+
+        def run() -> None:
+            asyncio.set_event_loop(self.loop)
+            try:
+                started.put(self.loop.run_until_complete(self.start(**kwargs)))
+            except Exception as e:
+                started.put(e)
+                return
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        address = started.get()
+        if isinstance(address, Exception):
+            raise address
+        return address
+
+    def stop_thread(self) -> None:
+        """ Stop the server started with :meth:`start_in_thread` """
+        asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def _connect_args(address: Address) -> typing.Tuple[int, typing.Any]:
+    if isinstance(address, str):
+        return socket.AF_UNIX, address
+    return socket.AF_INET, tuple(address)
+
+
+class _Connection:
+    """ A connection of the async client, matching responses to requests in order """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pending = collections.deque()
+        self.receiving = asyncio.ensure_future(self._receive())
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                length, = struct.unpack('<I', await self.reader.readexactly(4))
+                payload = await self.reader.readexactly(length)
+                future = self.pending.popleft()
+                if not future.cancelled():
+                    future.set_result(payload)
+        except Exception as e:
+            while self.pending:
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection lost: {!r}".format(e)))
+
+    @property
+    def closed(self) -> bool:
+        return self.receiving.done()
+
+    async def send(self, request: bytes) -> bytes:
+        future = asyncio.get_event_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(request)
+        return await future
+
+    def close(self) -> None:
+        self.receiving.cancel()
+        self.writer.close()
+
+
+class AsyncClient:
+    """ An asyncio client of :class:`Server`, opening up to ``pool_size`` connections
+
+    Concurrent requests are pipelined on the connection with the fewest pending ones.
+
+    :param address: a unix socket path, or a host and a port
+    :param pool_size: the maximum number of connections
+    """
+
+    def __init__(self, address: Address, *, pool_size: int = 4):
+        self.address = address
+        self.pool_size = pool_size
+        self.connections = []  # futures of connections, some may still be connecting
+
+    async def _open(self) -> _Connection:
+        if isinstance(self.address, str):
+            streams = await asyncio.open_unix_connection(self.address)
+        else:
+            streams = await asyncio.open_connection(*self.address)
+        return _Connection(*streams)
+
+    async def _connection(self) -> _Connection:
+        self.connections = [connection for connection in self.connections
+                            if not connection.done() or not connection.exception()
+                            and not connection.result().closed]
+        ready = [connection.result() for connection in self.connections if connection.done()]
+        idle = [connection for connection in ready if not connection.pending]
+        if idle:
+            return idle[0]
+        if len(self.connections) < self.pool_size:
+            connection = asyncio.ensure_future(self._open())
+            self.connections.append(connection)
+        elif ready:
+            return min(ready, key=lambda connection: len(connection.pending))
+        else:
+            connection = self.connections[0]
+        try:
+            return await asyncio.shield(connection)
+        except Exception:
+            if connection in self.connections:
+                self.connections.remove(connection)
+            raise
+
+    async def _send(self, request: bytes) -> typing.Optional[array.array]:
+        connection = await self._connection()
+        return _response(await connection.send(request))
+
+    async def inc(self, name: str, ixs: typing.Sequence[int],
+                  values: typing.Sequence[typing.Any]) -> None:
+        """ Increment the values assigned to indices, like :meth:`by_slices.Aggregator.inc_many` """
+        by_slices._check_same_length(ixs, values)
+        await self._send(_request(INC, name, _column('q', ixs), _values_column(values)))
+
+    async def get(self, name: str, starts: typing.Sequence[typing.Optional[int]],
+                  stops: typing.Sequence[typing.Optional[int]]) -> typing.List[typing.Any]:
+        """ Aggregate values by slices, like :meth:`by_slices.Aggregator.get_many` """
+        by_slices._check_same_length(starts, stops)
+        result = await self._send(_request(GET, name, _optional_columns(starts),
+                                           _optional_columns(stops)))
+        return result.tolist()
+
+    async def inc_slices(self, name: str, starts: typing.Sequence[typing.Optional[int]],
+                         stops: typing.Sequence[typing.Optional[int]],
+                         values: typing.Sequence[typing.Any]) -> None:
+        """ Increment the values assigned to slices, like :meth:`by_ixs.Aggregator.inc_many` """
+        by_slices._check_same_length(starts, stops)
+        by_slices._check_same_length(starts, values)
+        await self._send(_request(INC_SLICES, name, _optional_columns(starts),
+                                  _optional_columns(stops), _values_column(values)))
+
+    async def get_ixs(self, name: str, ixs: typing.Sequence[int]) -> typing.List[typing.Any]:
+        """ Aggregate values of slices by indices, like :meth:`by_ixs.Aggregator.get_many` """
+        result = await self._send(_request(GET_IXS, name, _column('q', ixs)))
+        return result.tolist()
+
+    def close(self) -> None:
+        for connection in self.connections:
+            if connection.done() and not connection.exception():
+                connection.result().close()
+            else:
+                connection.cancel()
+        self.connections = []
+
+
+def _read_exactly(f: typing.BinaryIO, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise ConnectionError("Connection closed by the server")
+    return data
+
+
+class Client:
+    """ A blocking client of :class:`Server`, safe to share between threads
+
+    Every request takes a connection from a pool, opening a new one if there's none free.
+
+    :param address: a unix socket path, or a host and a port
+    :param pool_size: the maximum number of idle connections kept open
+    """
+
+    def __init__(self, address: Address, *, pool_size: int = 4):
+        self.address = address
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _send(self, request: bytes) -> typing.Optional[array.array]:
+        try:
+            connection = self.pool.get_nowait()
+        except queue.Empty:
+            family, address = _connect_args(self.address)
+            connection = socket.socket(family, socket.SOCK_STREAM)
+            connection.connect(address)
+            files = connection.makefile('rb')
+            connection = (connection, files)
+        sock, f = connection
+        try:
+            sock.sendall(request)
+            length, = struct.unpack('<I', _read_exactly(f, 4))
+            payload = _read_exactly(f, length)
+        except BaseException:
+            f.close()
+            sock.close()
+            raise
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            f.close()
+            sock.close()
+        return _response(payload)
+
+    def inc(self, name: str, ixs: typing.Sequence[int],
+            values: typing.Sequence[typing.Any]) -> None:
+        """ Increment the values assigned to indices, like :meth:`by_slices.Aggregator.inc_many` """
+        by_slices._check_same_length(ixs, values)
+        self._send(_request(INC, name, _column('q', ixs), _values_column(values)))
+
+    def get(self, name: str, starts: typing.Sequence[typing.Optional[int]],
+            stops: typing.Sequence[typing.Optional[int]]) -> typing.List[typing.Any]:
+        """ Aggregate values by slices, like :meth:`by_slices.Aggregator.get_many` """
+        by_slices._check_same_length(starts, stops)
+        return self._send(_request(GET, name, _optional_columns(starts),
+                                   _optional_columns(stops))).tolist()
+
+    def inc_slices(self, name: str, starts: typing.Sequence[typing.Optional[int]],
+                   stops: typing.Sequence[typing.Optional[int]],
+                   values: typing.Sequence[typing.Any]) -> None:
+        """ Increment the values assigned to slices, like :meth:`by_ixs.Aggregator.inc_many` """
+        by_slices._check_same_length(starts, stops)
+        by_slices._check_same_length(starts, values)
+        self._send(_request(INC_SLICES, name, _optional_columns(starts),
+                            _optional_columns(stops), _values_column(values)))
+
+    def get_ixs(self, name: str, ixs: typing.Sequence[int]) -> typing.List[typing.Any]:
+        """ Aggregate values of slices by indices, like :meth:`by_ixs.Aggregator.get_many` """
+        return self._send(_request(GET_IXS, name, _column('q', ixs))).tolist()
+
+    def close(self) -> None:
+        while True:
+            try:
+                sock, f = self.pool.get_nowait()
+            except queue.Empty:
+                return
+            f.close()
+            sock.close()
@@ -0,0 +1,189 @@
+import collections
+import time
+import typing
+
+from . import (
+    by_ixs,
+    by_slices,
+)
+
+OPERATIONS = ['inc', 'dec', 'set', 'get', 'inc_many', 'get_many']
+_COMPONENTS = ['dual', 'aggregator', 'negative', 'nonnegative', 'ranked', 'ring', 'slopes',
+               'intercepts']
+_MISSING = object()
+
+
+class Stats:
+    """ Counters of operations on an instrumented aggregator, see :func:`instrument`
+
+    Operations are counted when called from outside of the aggregator, so, for example,
+    an assignment is counted as a ``set`` and not as an ``inc`` too.
+    Walk steps are table reads and writes done by a single top-level operation,
+    that is iterations of the loops following binary tails.
+
+    Components replaced by their owners, like the table of
+    :class:`slice_aggregator.by_slices.CompressedAggregator` after adding keys or the ring of
+    :class:`slice_aggregator.window.WindowedAggregator` after a jump, are noticed by checking
+    the identity of every component at the start of an operation and instrumented then.
+    Table reads and writes of a component created during an operation, but not those of
+    the component it replaced, are missing from the counters.
+    """
+
+    def __init__(self, *, timings: bool = False):
+        self.counts = collections.Counter()
+        self.walk_steps = 0
+        self.walk_steps_max = 0
+        self.timings = {} if timings else None
+        self._aggregator = None
+        self._parts = []
+        self._components = []  # (owner, attribute, component) as instrumented
+        self._patched = []
+        self._depth = 0
+
+    def _patch(self, obj: typing.Any, name: str, wrapper: typing.Callable) -> None:
+        self._patched.append((obj, name, obj.__dict__.get(name, _MISSING)))
+        wrapper.stats = self
+        setattr(obj, name, wrapper)
+
+    def _is_patched(self, obj: typing.Any, name: str) -> bool:
+        return getattr(obj.__dict__.get(name), 'stats', None) is self
+
+    def _refresh(self) -> None:
+        """ Instrument components that replaced the instrumented ones, forget the replaced ones """
+        if self._aggregator is None:
+            return
+        self._parts = []
+        self._components = []
+        reachable = {id(self._aggregator)}
+        self._attach(self._aggregator, reachable)
+        self._patched = [patch for patch in self._patched if id(patch[0]) in reachable]
+
+    def _replaced(self) -> bool:
+        """ Whether any owner holds a different component than the instrumented one """
+        for owner, name, component in self._components:
+            if getattr(owner, name, None) is not component:
+                return True
+        return False
+
+    def _steps(self) -> int:
+        return self.counts['table_reads'] + self.counts['table_writes']
+
+    def _wrap_operation(self, obj: typing.Any, name: str) -> None:
+        method = getattr(obj, name)
+
+        def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            if self._depth:
+                return method(*args, **kwargs)
+            self.counts[name] += 1
+            if self._replaced():
+                self._refresh()
+            self._depth += 1
+            steps = self._steps()
+            start = time.perf_counter() if self.timings is not None else None
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                steps = self._steps() - steps
+                self.walk_steps += steps
+                self.walk_steps_max = max(self.walk_steps_max, steps)
+                if start is not None:
+                    microseconds = int((time.perf_counter() - start) * 1000000)
+                    histogram = self.timings.setdefault(name, collections.Counter())
+                    histogram[1 << microseconds.bit_length()] += 1
+        self._patch(obj, name, wrapper)
+
+    def _wrap_counter(self, obj: typing.Any, name: str, counter: str) -> None:
+        if self._is_patched(obj, name):
+            return
+        method = getattr(obj, name)
+
+        def wrapper(*args: typing.Any) -> typing.Any:
+            self.counts[counter] += 1
+            return method(*args)
+        self._patch(obj, name, wrapper)
+
+    def _attach(self, aggregator: typing.Any, reachable: typing.Set[int]) -> None:
+        """ Instrument an aggregator and its components, unless they already are
+
+        :param reachable: ids of instrumented objects, updated
+        """
+        if isinstance(aggregator, by_slices.LeftBoundedAggregator):
+            self._parts.append(aggregator)
+            self._wrap_counter(aggregator, '_table_get', 'table_reads')
+            self._wrap_counter(aggregator, '_table_set', 'table_writes')
+            tracker = getattr(aggregator, 'heap', None)
+            self._components.append((aggregator, 'heap', tracker))
+            if tracker is not None:
+                reachable.add(id(tracker))
+                self._wrap_counter(tracker, 'add', 'heap_adds')
+                self._wrap_counter(tracker, 'remove', 'heap_removes')
+        if getattr(aggregator, 'zero_test', None) is not None:
+            self._wrap_counter(aggregator, 'zero_test', 'zero_tests')
+        for name in _COMPONENTS:
+            component = getattr(aggregator, name, None)
+            if hasattr(aggregator, name):
+                self._components.append((aggregator, name, component))
+            if isinstance(component, (by_slices.Aggregator, by_ixs.Aggregator)):
+                if not hasattr(component, '__dict__'):
+                    # fast paths have slots and inlined walks, swap in a generic twin
+                    component = component._generic()
+                    self._patch(aggregator, name, component)
+                    self._components[-1] = (aggregator, name, component)
+                reachable.add(id(component))
+                self._attach(component, reachable)
+
+    def detach(self) -> None:
+        """ Remove the instrumentation, the counters stay available """
+        self._refresh()
+        self._aggregator = None
+        for obj, name, previous in reversed(self._patched):
+            if previous is _MISSING:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, previous)
+        self._patched = []
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        """ The counters, table sizes and, if enabled, histograms of timings
+
+        Timings map upper bounds of buckets, in microseconds, to numbers of operations.
+        """
+        self._refresh()
+        result = {name: self.counts[name] for name in OPERATIONS + [
+            'table_reads', 'table_writes', 'heap_adds', 'heap_removes', 'zero_tests']}
+        result['walk_steps'] = self.walk_steps
+        result['walk_steps_max'] = self.walk_steps_max
+        result['table_size'] = sum(len(part.table) for part in self._parts)
+        result['tracked_indices'] = sum(len(part.heap) for part in self._parts
+                                        if getattr(part, 'heap', None) is not None)
+        if self.timings is not None:
+            result['timings'] = {name: dict(sorted(histogram.items()))
+                                 for name, histogram in self.timings.items()}
+        return result
+
+
+def instrument(aggregator: typing.Any, *, timings: bool = False) -> Stats:
+    """ Start collecting statistics of an aggregator and its components
+
+    Methods of the aggregator, its tables and trackers are wrapped on the instances,
+    so aggregators that aren't instrumented don't pay anything.
+    Numeric fast-path components are replaced by generic ones sharing their tables
+    until :meth:`Stats.detach`, so the fast path is disabled while instrumented and walk steps
+    and timings are those of the generic code.
+
+    :param aggregator: the aggregator, like one returned by
+        :func:`slice_aggregator.ixs_by_slices` or :func:`slice_aggregator.slices_by_ixs`
+    :param timings: also collect histograms of durations of operations
+    :return: the statistics, updated as the aggregator is used
+    """
+    if not hasattr(aggregator, '__dict__'):
+        raise TypeError("Can't instrument {}, instrument an aggregator containing it or "
+                        "a generic one".format(type(aggregator).__name__))
+    stats = Stats(timings=timings)
+    for name in OPERATIONS:
+        if hasattr(aggregator, name):
+            stats._wrap_operation(aggregator, name)
+    stats._aggregator = aggregator
+    stats._refresh()
+    return stats
@@ -0,0 +1,204 @@
+import threading
+import typing
+
+from . import (
+    by_ixs,
+    by_slices,
+)
+from .buffered import _WriteBuffer
+from .by_slices import V
+
+
+class _Buffer(_WriteBuffer):
+    """ A buffer of a single thread """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+
+
+class _BufferedAggregator:
+
+    def __init__(self, *, flush_interval: float = None, max_buffered: int = None):
+        self._lock = threading.Lock()  # guards the wrapped aggregator
+        self.max_buffered = max_buffered
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self._merged = _WriteBuffer()  # taken from the buffers but not applied, guarded by _lock
+        self._local = threading.local()
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval is not None:
+            self._flusher = threading.Thread(target=self._flush_periodically,
+                                             args=(flush_interval,), daemon=True)
+            self._flusher.start()
+
+    def _apply(self, data: typing.Dict[typing.Any, V]) -> None:
+        raise NotImplementedError()
+
+    def _buffer(self) -> _Buffer:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = _Buffer()
+            with self._buffers_lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def _add(self, key: typing.Any, value: V) -> None:
+        buffer = self._buffer()
+        with buffer.lock:
+            size = buffer.add(key, value)
+        if self.max_buffered is not None and size >= self.max_buffered:
+            self.flush()
+
+    def _flush_locked(self) -> None:
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            with buffer.lock:
+                data = buffer.take()
+            for key, value in data.items():
+                self._merged.add(key, value)
+            if not buffer.thread.is_alive():
+                with self._buffers_lock:
+                    self._buffers.remove(buffer)
+        # kept for the next flush if applying raises
+        self._merged.apply(self._apply)
+
+    def flush(self) -> None:
+        """ Merge the buffered writes of all threads into the wrapped aggregator """
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            self.flush()
+
+    def close(self) -> None:
+        """ Stop flushing periodically and flush the remaining writes """
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def __enter__(self) -> '_BufferedAggregator':
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+
+
+class BySlicesAggregator(_BufferedAggregator, typing.Generic[V]):
+    """ A thread-safe wrapper of :class:`slice_aggregator.by_slices.Aggregator`
+
+    Writers only lock their own thread's buffer, which is uncontended unless it's being flushed.
+    Buffers are merged into the wrapped aggregator with a single batched update on every read,
+    on :meth:`flush` and optionally every ``flush_interval`` seconds.
+    If applying them raises, like for an index out of range, the merged writes are kept
+    and applied again on the next flush.
+
+    A read observes every write that returned, in any thread, before the read was called.
+    Writes running concurrently with a read may or may not be observed by it.
+    The wrapped aggregator only reflects flushed writes, so it shouldn't be used directly.
+
+    :param aggregator: the wrapped aggregator
+    :param flush_interval: if set, buffers are also flushed every that many seconds
+    :param max_buffered: if set, a thread flushes when its buffer has that many indices
+    """
+
+    def __init__(self, aggregator: by_slices.Aggregator, *, flush_interval: float = None,
+                 max_buffered: int = None):
+        self.aggregator = aggregator
+        super().__init__(flush_interval=flush_interval, max_buffered=max_buffered)
+
+    def _apply(self, data: typing.Dict[int, V]) -> None:
+        self.aggregator.inc_many(list(data), list(data.values()))
+
+    def inc(self, ix: int, value: V) -> None:
+        """ Increment the value assigned to an index """
+        self._add(ix, value)
+
+    def dec(self, ix: int, value: V) -> None:
+        """ Decrement the value assigned to an index """
+        self._add(ix, -value)
+
+    def set(self, ix: int, value: V) -> None:
+        """ Set the value assigned to an index """
+        with self._lock:
+            self._flush_locked()
+            self.aggregator.set(ix, value)
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        """ Get the aggregated value of all indices contained by the specified slice """
+        with self._lock:
+            self._flush_locked()
+            return self.aggregator.get(start, stop)
+
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> typing.List[V]:
+        """ Get the aggregated values of many slices at once """
+        with self._lock:
+            self._flush_locked()
+            return self.aggregator.get_many(starts, stops)
+
+    def snapshot(self) -> by_slices.Aggregator:
+        """ Get a read-only view of the values, unaffected by later writes
+
+        Reading the snapshot doesn't take the lock, so readers don't block writers or each other.
+        """
+        with self._lock:
+            self._flush_locked()
+            return self.aggregator.snapshot()
+
+
+class ByIxsAggregator(_BufferedAggregator, typing.Generic[V]):
+    """ A thread-safe wrapper of :class:`slice_aggregator.by_ixs.Aggregator`
+
+    It buffers writes like :class:`BySlicesAggregator`, with the same consistency guarantees.
+
+    :param aggregator: the wrapped aggregator
+    :param flush_interval: if set, buffers are also flushed every that many seconds
+    :param max_buffered: if set, a thread flushes when its buffer has that many slices
+    """
+
+    def __init__(self, aggregator: by_ixs.Aggregator, *, flush_interval: float = None,
+                 max_buffered: int = None):
+        self.aggregator = aggregator
+        super().__init__(flush_interval=flush_interval, max_buffered=max_buffered)
+
+    def _apply(self, data: typing.Dict[typing.Tuple[typing.Optional[int], typing.Optional[int]],
+                                       V]) -> None:
+        self.aggregator.inc_many([start for start, _ in data], [stop for _, stop in data],
+                                 list(data.values()))
+
+    def inc(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
+        """ Increment the value assigned to a slice """
+        if start is not None and stop is not None and start > stop:
+            raise ValueError("start > stop")
+        self._add((start, stop), value)
+
+    def dec(self, start: typing.Optional[int], stop: typing.Optional[int], value: V) -> None:
+        """ Decrement the value assigned to a slice """
+        self.inc(start, stop, -value)
+
+    def get(self, ix: int) -> V:
+        """ Get the aggregated value of all slices containing the specified index """
+        with self._lock:
+            self._flush_locked()
+            return self.aggregator.get(ix)
+
+    def get_many(self, ixs: typing.Sequence[int]) -> typing.List[V]:
+        """ Get the aggregated values of all slices containing each of the specified indices """
+        with self._lock:
+            self._flush_locked()
+            return self.aggregator.get_many(ixs)
+
+    def snapshot(self) -> by_ixs.Aggregator:
+        """ Get a read-only view of the values, unaffected by later writes
+
+        Reading the snapshot doesn't take the lock, so readers don't block writers or each other.
+        """
+        with self._lock:
+            self._flush_locked()
+            return self.aggregator.snapshot()
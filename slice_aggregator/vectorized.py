@@ -0,0 +1,414 @@
+import functools
+import typing
+
+import numpy as np
+
+from . import by_slices
+from .by_slices import (
+    V,
+    _check_same_length,
+    binary_tail,
+)
+from .heap import IndexedUniqueMaxHeap
+
+
+def _accumulate_dense(table: np.ndarray) -> None:
+    """ Turn values assigned to consecutive indices into table entries, in place
+
+    Entries with the same binary tail are complete at the same time, so they are handled at once.
+    """
+    tail = 1
+    while tail < len(table):
+        ixs = np.arange(tail - 1, len(table), 2 * tail)
+        table[ixs[1:] - tail] += table[ixs[1:]]
+        tail *= 2
+
+
+def _ixs_array(ixs: typing.Sequence[typing.Optional[int]], default: int) -> np.ndarray:
+    if isinstance(ixs, np.ndarray) and ixs.dtype != object:
+        return ixs.astype(np.int64)
+    return np.array([default if ix is None else ix for ix in ixs], dtype=np.int64)
+
+
+class FixedSizeAggregator(by_slices.FixedSizeAggregator):
+    """ A fixed-size aggregator over a NumPy array, with vectorized batch operations
+
+    The table may be two-dimensional, in which case its rows are the values.
+    """
+
+    def __init__(self, *, table: np.ndarray):
+        if table.ndim > 1:
+            zero_factory = functools.partial(np.zeros, table.shape[1:], dtype=table.dtype)
+        else:
+            zero_factory = table.dtype.type
+        super().__init__(table=table, zero_factory=zero_factory)
+        self.shared = False  # the table is also viewed by a snapshot
+
+    @classmethod
+    def from_dense(cls, values: typing.Iterable[typing.Any], offset: int = 0,
+                   dtype: typing.Any = None) -> 'FixedSizeAggregator':
+        """ Build an aggregator with values assigned to consecutive indices, in linear time
+
+        :param values: values (or rows of values) assigned to ``offset``, ``offset + 1``, ...
+        :param offset: the first index with a value assigned
+        :param dtype: the table's data type, inferred from values by default
+        """
+        values = np.asarray(values, dtype=dtype)
+        table = np.zeros((offset + len(values),) + values.shape[1:], dtype=values.dtype)
+        table[offset:] = values
+        _accumulate_dense(table)
+        return cls(table=table)
+
+    @classmethod
+    def from_items(cls, items: typing.Iterable[typing.Tuple[int, typing.Any]], *, size: int,
+                   dtype: typing.Any = float) -> 'FixedSizeAggregator':
+        """ Build an aggregator from ``(ix, value)`` pairs, in linear time
+
+        :param items: indices and values assigned to them, indices may repeat
+        :param size: the size of the table
+        :param dtype: the table's data type
+        """
+        items = list(items)
+        ixs = _ixs_array([ix for ix, _ in items], 0)
+        if ((ixs < 0) | (ixs >= size)).any():
+            raise IndexError("ix out of range")
+        table = np.zeros(size, dtype=dtype)
+        np.add.at(table, ixs, np.asarray([value for _, value in items], dtype=dtype))
+        _accumulate_dense(table)
+        return cls(table=table)
+
+    def _own_table(self) -> None:
+        """ Copy the table before writing, if it's shared with a snapshot """
+        if self.shared:
+            self.table = self.table.copy()
+            self.shared = False
+
+    def _table_set(self, ix: int, value: typing.Any) -> None:
+        self._own_table()
+        super()._table_set(ix, value)
+
+    def _zeros(self, n: int) -> np.ndarray:
+        return np.zeros((n,) + self.table.shape[1:], dtype=self.table.dtype)
+
+    def _suffix_many(self, ixs: np.ndarray) -> np.ndarray:
+        result = self._zeros(len(ixs))
+        ixs = ixs.copy()
+        active = np.flatnonzero(ixs < len(self.table))
+        while active.size:
+            nodes = ixs[active]
+            result[active] += self.table[nodes]
+            ixs[active] = nodes + binary_tail(nodes + 1)  # +1 for 0-based indexing
+            active = active[ixs[active] < len(self.table)]
+        return result
+
+    def get_many(self, starts: typing.Sequence[typing.Optional[int]],
+                 stops: typing.Sequence[typing.Optional[int]]) -> np.ndarray:
+        _check_same_length(starts, stops)
+        starts = _ixs_array(starts, 0)
+        stops = _ixs_array(stops, len(self.table))
+        if (starts < 0).any():
+            raise IndexError("start is out of range")
+        if (stops < 0).any():
+            raise IndexError("stop is out of range")
+        nonempty = np.flatnonzero(starts < stops)
+        result = self._zeros(len(starts))
+        result[nonempty] = (self._suffix_many(starts[nonempty])
+                            - self._suffix_many(stops[nonempty]))
+        return result
+
+    def merge(self, other: by_slices.FixedSizeAggregator) -> None:
+        if not isinstance(other, by_slices.FixedSizeAggregator):
+            raise TypeError("Can only merge with another FixedSizeAggregator")
+        if len(other.table) != len(self.table):
+            raise ValueError("Can't merge aggregators of different sizes")
+        self._own_table()
+        self.table += np.asarray(other.table, dtype=self.table.dtype)
+
+    def inc_many(self, ixs: typing.Sequence[int], values: typing.Sequence[typing.Any]) -> None:
+        _check_same_length(ixs, values)
+        ixs = _ixs_array(ixs, 0)
+        values = np.asarray(values, dtype=self.table.dtype)
+        if ((ixs < 0) | (ixs >= len(self.table))).any():
+            raise IndexError("ix out of range")
+        self._own_table()
+        while ixs.size:
+            # coalesce paths that have met, so that every table entry is updated once per level
+            ixs, inverse = np.unique(ixs, return_inverse=True)
+            deltas = self._zeros(len(ixs))
+            np.add.at(deltas, inverse.reshape(-1), values)
+            self.table[ixs] += deltas
+            ixs = ixs - binary_tail(ixs + 1)  # +1 for 0-based indexing
+            nonnegative = ixs >= 0
+            ixs = ixs[nonnegative]
+            values = deltas[nonnegative]
+
+    def snapshot(self) -> 'FixedSizeAggregator':
+        """ Get a read-only view of the aggregator
+
+        Batch updates write whole arrays of entries at once, so rather than logging old values,
+        the table is shared with the snapshot, which can't write to it, and copied by the
+        aggregator on its next write, in linear time.
+        """
+        table = self.table.view()
+        table.flags.writeable = False
+        self.shared = True
+        return FixedSizeAggregator(table=table)
+
+
+class _Rows:
+    """ Vectors assigned to indices, like a dict, but kept as rows of a single 2-D array
+
+    Rows of removed indices are zeroed and reused, the array doubles when it's full.
+    Reading an index gives a copy of its row.
+    """
+
+    def __init__(self, *, dim: int, dtype: typing.Any = float):
+        self.slots = {}  # ix -> row
+        self.rows = np.zeros((8, dim), dtype=dtype)
+        self.free = []
+        self.used = 0
+
+    def _slot(self, ix: int) -> int:
+        """ The row of an index, a new zero row if it has none """
+        slot = self.slots.get(ix)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                if self.used == len(self.rows):
+                    self.rows = np.concatenate([self.rows, np.zeros_like(self.rows)])
+                slot = self.used
+                self.used += 1
+            self.slots[ix] = slot
+        return slot
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, ix: int) -> bool:
+        return ix in self.slots
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self.slots)
+
+    def __getitem__(self, ix: int) -> np.ndarray:
+        return self.rows[self.slots[ix]].copy()
+
+    def __setitem__(self, ix: int, value: np.ndarray) -> None:
+        slot = self._slot(ix)
+        self.rows[slot] = value
+
+    def get(self, ix: int, default: typing.Any = None) -> typing.Any:
+        slot = self.slots.get(ix)
+        return default if slot is None else self.rows[slot].copy()
+
+    def pop(self, ix: int, default: typing.Any = None) -> typing.Any:
+        slot = self.slots.pop(ix, None)
+        if slot is None:
+            return default
+        value = self.rows[slot].copy()
+        self.rows[slot] = 0
+        self.free.append(slot)
+        return value
+
+    def items(self) -> typing.Iterator[typing.Tuple[int, np.ndarray]]:
+        return ((ix, self.rows[slot].copy()) for ix, slot in list(self.slots.items()))
+
+    def add(self, ixs: typing.Sequence[int], deltas: np.ndarray) -> np.ndarray:
+        """ Add vectors to the rows of distinct indices in place, dropping rows that became zero
+
+        :return: whether each row is non-zero
+        """
+        slots = np.fromiter(map(self._slot, ixs), dtype=np.intp, count=len(ixs))
+        updated = self.rows[slots]
+        updated += deltas  # in the data type of the rows, so zeros are tested as stored
+        self.rows[slots] = updated
+        nonzero = updated.any(axis=1)
+        if not nonzero.all():
+            for ix, slot, is_nonzero in zip(ixs, slots.tolist(), nonzero.tolist()):
+                if not is_nonzero:
+                    del self.slots[ix]
+                    self.free.append(slot)
+        return nonzero
+
+
+class VectorLeftBoundedAggregator(by_slices._VariableSizeBase):
+    """ A variable-size left-bounded aggregator of NumPy vectors of a fixed length
+
+    Table entries and values assigned to indices are rows of two 2-D arrays, found by index
+    in dicts, instead of separate arrays. Writes add the value to all rows on the walk at once,
+    in place, and detect zero rows with a single vectorized test, reads sum up the rows on
+    the walk into a single new vector. Zero is the vector of zeros.
+    The factories use it when given ``dim``.
+
+    :param dim: the length of the vectors
+    :param dtype: the data type of the vectors
+    :param track_points: keep the values assigned to indices next to the table
+    :param tracker_class: the class tracking indices with non-zero values assigned
+    """
+    __slots__ = ('table', 'points', 'tracker_class', 'heap', 'zero', 'zero_test', 'dim',
+                 'dtype')
+
+    def __init__(self, *, dim: int, dtype: typing.Any = float, track_points: bool = True,
+                 tracker_class: typing.Type = IndexedUniqueMaxHeap):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        super().__init__(zero_factory=functools.partial(np.zeros, dim, dtype=self.dtype),
+                         track_points=track_points, tracker_class=tracker_class)
+        self.table = _Rows(dim=dim, dtype=self.dtype)
+        self.points = _Rows(dim=dim, dtype=self.dtype) if track_points else None
+
+    def _generic(self) -> by_slices.VariableSizeLeftBoundedAggregator:
+        """ An equivalent generic aggregator sharing the table, points and tracker """
+        generic = by_slices.VariableSizeLeftBoundedAggregator(
+            zero_factory=self.zero_factory, zero_test=self.zero_test, track_points=False,
+            tracker_class=self.tracker_class)
+        generic.table = self.table
+        generic.points = self.points
+        generic.heap = self.heap
+        generic.snapshot_logs = self.snapshot_logs
+        return generic
+
+    def _equals_zero(self, value: V) -> bool:
+        return not np.any(value)
+
+    def _vector(self, value: V) -> np.ndarray:
+        """ The value as a vector of the data type of the aggregator, if it can be cast safely """
+        value = np.asarray(value).astype(self.dtype, casting='same_kind', copy=False)
+        return value if value.shape == (self.dim,) else np.broadcast_to(value, (self.dim,))
+
+    def _build(self, points: typing.Dict[int, V], table: typing.Dict[int, V]) -> None:
+        self.table = _Rows(dim=self.dim, dtype=self.dtype)
+        for ix, value in table.items():
+            value = self._vector(value)
+            if not self.zero_test(value):
+                self.table[ix] = value
+        points = {ix: self._vector(value) for ix, value in points.items()}
+        nonzero_points = {ix: value for ix, value in points.items() if not self.zero_test(value)}
+        if self.points is not None:
+            self.points = _Rows(dim=self.dim, dtype=self.dtype)
+            for ix, value in nonzero_points.items():
+                self.points[ix] = value
+        self.heap = self.tracker_class.from_iterable(nonzero_points)
+
+    def _table_get(self, ix: int) -> V:
+        return self.table.get(ix, self.zero)
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        if start is not None and start < 0:
+            raise IndexError("start is out of range")
+        if stop is not None and stop < 0:
+            raise IndexError("stop is out of range")
+        slots = self.table.slots
+        if not slots or start is not None and stop is not None and start >= stop:
+            return self.zero_factory()
+        bound = self.heap.max()
+        if start is None:
+            start = 0
+        if stop is None:
+            stop = bound + 1
+        slots_get = slots.get
+        added = []
+        subtracted = []
+        while start != stop and (start <= bound or stop <= bound):
+            if start < stop:
+                slot = slots_get(start)
+                if slot is not None:
+                    added.append(slot)
+                start |= start + 1  # the next entry, ix + binary_tail(ix + 1)
+            else:
+                slot = slots_get(stop)
+                if slot is not None:
+                    subtracted.append(slot)
+                stop |= stop + 1
+        rows = self.table.rows
+        result = rows[added].sum(axis=0, dtype=self.dtype)
+        if subtracted:
+            result -= rows[subtracted].sum(axis=0, dtype=self.dtype)
+        return result
+
+    def _old_points(self, ixs: typing.Sequence[int]) -> typing.Optional[typing.List[V]]:
+        """ Values assigned to indices, if they aren't tracked """
+        if self.points is not None:
+            return None
+        return [self.get(ix, ix + 1) for ix in ixs]
+
+    def _add_rows(self, nodes: typing.Sequence[int], deltas: np.ndarray) -> None:
+        """ Add vectors to distinct table entries """
+        if self.snapshot_logs.logs:
+            for node in nodes:
+                self._log(node)
+        self.table.add(nodes, deltas)
+
+    def _track(self, ixs: typing.Sequence[int], deltas: np.ndarray,
+               old_points: typing.Optional[typing.List[V]]) -> None:
+        """ Update the values assigned to distinct indices and the tracker """
+        if old_points is None:
+            nonzero = self.points.add(ixs, deltas).tolist()
+        else:
+            nonzero = [bool((old + delta).any()) for old, delta in zip(old_points, deltas)]
+        for ix, is_nonzero in zip(ixs, nonzero):
+            if is_nonzero:
+                self.heap.add(ix)
+            else:
+                self.heap.remove(ix)
+
+    def inc(self, ix: int, value: V) -> None:
+        if ix < 0:
+            raise IndexError("ix out of range")
+        value = self._vector(value)
+        old_points = self._old_points([ix])
+        nodes = []
+        node = ix
+        while node >= 0:
+            nodes.append(node)
+            node = (node & (node + 1)) - 1  # the previous entry, ix - binary_tail(ix + 1)
+        self._add_rows(nodes, value)
+        self._track([ix], value[np.newaxis], old_points)
+
+    def dec(self, ix: int, value: V) -> None:
+        self.inc(ix, -self._vector(value))
+
+    def _inc_pair(self, dec_ix: int, inc_ix: int, value: V) -> None:
+        if dec_ix < 0 or inc_ix < 0:
+            raise IndexError("ix out of range")
+        if dec_ix == inc_ix:
+            return
+        value = self._vector(value)
+        old_points = self._old_points([dec_ix, inc_ix])
+        # both walks reach the same entries once they meet, where the updates cancel out
+        dec_nodes = []
+        inc_nodes = []
+        dec_node, inc_node = dec_ix, inc_ix
+        while dec_node != inc_node:
+            if dec_node > inc_node:
+                dec_nodes.append(dec_node)
+                dec_node = (dec_node & (dec_node + 1)) - 1
+            else:
+                inc_nodes.append(inc_node)
+                inc_node = (inc_node & (inc_node + 1)) - 1
+        self._add_rows(dec_nodes, -value)
+        self._add_rows(inc_nodes, value)
+        self._track([dec_ix, inc_ix], np.stack([-value, value]), old_points)
+
+    def _inc_coalesced(self, point_deltas: typing.Dict[int, V]) -> None:
+        if any(ix < 0 for ix in point_deltas):
+            raise IndexError("ix out of range")
+        if not point_deltas:
+            return
+        ixs = list(point_deltas)
+        deltas = np.stack([self._vector(value) for value in point_deltas.values()])
+        old_points = self._old_points(ixs)
+        nodes = []
+        sources = []
+        for source, ix in enumerate(ixs):
+            while ix >= 0:
+                nodes.append(ix)
+                sources.append(source)
+                ix = (ix & (ix + 1)) - 1
+        # paths of different indices meet, sum up their deltas once per table entry
+        nodes, inverse = np.unique(nodes, return_inverse=True)
+        node_deltas = np.zeros((len(nodes), self.dim), dtype=deltas.dtype)
+        np.add.at(node_deltas, inverse.reshape(-1), deltas[sources])
+        self._add_rows(nodes.tolist(), node_deltas)
+        self._track(ixs, deltas, old_points)
@@ -0,0 +1,89 @@
+import typing
+
+from . import by_slices
+from .by_slices import (
+    V,
+    ZF,
+    ZT,
+)
+
+
+class WindowedAggregator(by_slices.Aggregator):
+    """ An aggregator keeping only the values assigned to indices within ``[now - window, now]``
+
+    ``now`` is the largest index written to so far, or set by :meth:`advance`. Values are kept
+    in a ring buffer of ``window + 1`` slots, rounded up to a power of two, with a fixed-size
+    table over the slots, so memory is constant. Expired values are subtracted from the table
+    when ``now`` moves, once per index. Reading expired indices gives zeros, writing them
+    raises :class:`IndexError`.
+
+    :param window: the number of indices before ``now`` that are kept
+    :param zero_factory: callable returning additive identity
+    :param zero_test: test for equality to zero
+    """
+
+    def __init__(self, *, window: int, zero_factory: ZF = None, zero_test: ZT = None):
+        if window < 0:
+            raise ValueError("window must be nonnegative")
+        self.window = window
+        self.capacity = 1 << window.bit_length()
+        self.ring = by_slices.FixedSizeAggregator.from_dense(
+            [], self.capacity, zero_factory=zero_factory)
+        self.zero_factory = self.ring.zero_factory
+        self.zero = self.zero_factory()  # read only
+        self.zero_test = zero_test
+        self.points = [self.zero] * self.capacity
+        self.now = None
+
+    def _is_zero(self, value: V) -> bool:
+        return value == self.zero if self.zero_test is None else self.zero_test(value)
+
+    def advance(self, now: int) -> None:
+        """ Move the window forward, so that it ends at ``now``, evicting expired values """
+        if self.now is not None and now <= self.now:
+            return
+        if self.now is None or now - self.now >= self.capacity:
+            self.ring = by_slices.FixedSizeAggregator.from_dense(
+                [], self.capacity, zero_factory=self.zero_factory)
+            self.points = [self.zero] * self.capacity
+        else:
+            for ix in range(self.now - self.window, now - self.window):
+                slot = ix % self.capacity
+                value = self.points[slot]
+                if not self._is_zero(value):
+                    self.ring.inc(slot, -value)
+                    self.points[slot] = self.zero
+        self.now = now
+
+    def inc(self, ix: int, value: V) -> None:
+        if self.now is None or ix > self.now:
+            self.advance(ix)
+        elif ix < self.now - self.window:
+            raise IndexError("ix is older than the window")
+        slot = ix % self.capacity
+        self.ring.inc(slot, value)
+        self.points[slot] = self.points[slot] + value
+
+    def get(self, start: typing.Optional[int], stop: typing.Optional[int]) -> V:
+        if self.now is None:
+            return self.zero_factory()
+        start = self.now - self.window if start is None else max(start, self.now - self.window)
+        stop = self.now + 1 if stop is None else min(stop, self.now + 1)
+        if start >= stop:
+            return self.zero_factory()
+        start_slot = start % self.capacity
+        stop_slot = start_slot + stop - start
+        if stop_slot <= self.capacity:
+            return self.ring.get(start_slot, stop_slot)
+        return self.ring.get(start_slot, None) + self.ring.get(0, stop_slot - self.capacity)
+
+    def _get_point(self, ix: int) -> V:
+        if self.now is None or not self.now - self.window <= ix <= self.now:
+            return self.zero_factory()
+        return self.zero_factory() + self.points[ix % self.capacity]
+
+    def _nonzero_bounds(self) -> typing.Optional[typing.Tuple[int, int]]:
+        return None if self.now is None else (self.now - self.window, self.now)
+
+    def nonzero_items(self) -> typing.Iterator[typing.Tuple[int, V]]:
+        return ((ix, value) for ix, value in self.items() if not self._is_zero(value))
@@ -0,0 +1,43 @@
+import random
+
+from slice_aggregator.bitmap import HierarchicalBitmap
+
+
+def test_hierarchical_bitmap():
+    b = HierarchicalBitmap()
+    b.add(10)
+    b.add(2 ** 40 + 3)
+    b.add(64)
+    b.add(10)
+
+    assert len(b) == 3
+    assert 10 in b
+    assert 11 not in b
+    assert -1 not in b
+    assert b.max() == 2 ** 40 + 3
+
+    b.remove(2 ** 40 + 3)
+    b.remove(5)
+
+    assert len(b) == 2
+    assert b.max() == 64
+    b.remove(64)
+    b.remove(10)
+    assert b.max() is None
+
+
+def test_hierarchical_bitmap_random():
+    rng = random.Random(0)
+    b = HierarchicalBitmap.from_iterable([0, 7])
+    expected = {0, 7}
+    for _ in range(2000):
+        value = rng.randrange(10 ** rng.randrange(1, 7))
+        if rng.random() < 0.5:
+            b.add(value)
+            expected.add(value)
+        else:
+            b.remove(value)
+            expected.discard(value)
+        assert len(b) == len(expected)
+        assert b.max() == (max(expected) if expected else None)
+    assert sorted(b) == sorted(expected)
@@ -0,0 +1,66 @@
+import pytest
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.buffered import BufferedAggregator
+from slice_aggregator.by_slices import FixedSizeAggregator
+
+
+def test_flush_on_read():
+    a = ixs_by_slices(buffer_size=3)
+    assert isinstance(a, BufferedAggregator)
+    a.inc(5, 1)
+    a.inc(5, 2)
+    a.dec(-5, 4)
+    assert a.buffer.data == {5: 3, -5: -4}
+    assert a.aggregator[:] == 0
+
+    assert a[:] == -1
+    assert a.buffer.data == {}
+    a.inc_many([1, 2], [10, 20])
+    a.inc(3, 30)
+    assert a.buffer.data == {}
+    assert a.aggregator[1:4] == 60
+
+    a.inc(5, 1)
+    a[5] = 10
+    assert a[5] == 10
+    a.inc(7, 1)
+    a.flush()
+    assert a.aggregator[7] == 1
+    assert a.get_many([None], [None]) == [67]
+
+
+def test_slices_by_ixs():
+    items = [(None, None, 1), (-10, None, 100), (-5, 5, -200), (None, 10, 10)]
+    a = slices_by_ixs(buffer_size=100)
+    for start, stop, value in items:
+        a.inc(start, stop, value)
+    a[-5:5] += 1
+    assert isinstance(a.dual, BufferedAggregator)
+    assert len(a.dual.buffer.data) == 4
+
+    assert a.get_many([-11, -10, -5, 5, 10]) == [11, 111, -88, 111, 101]
+    assert not a.dual.buffer.data
+
+    b = slices_by_ixs(items=items, buffer_size=100)
+    b.inc(-5, 5, 1)
+    b += a
+    assert b.get(0) == 2 * a.get(0)
+    with pytest.raises(TypeError):
+        b.merge(a.dual)
+
+
+def test_failed_flush_keeps_writes():
+    a = BufferedAggregator(FixedSizeAggregator(table=[0] * 4))
+    a.inc(1, 2)
+    a.inc(9, 1)
+    with pytest.raises(IndexError):
+        a.get(None, None)
+    assert a.buffer.data == {1: 2, 9: 1}
+    assert a.aggregator[:] == 0
+    a.buffer.take()
+    a.inc(1, 2)
+    assert a[:] == 2
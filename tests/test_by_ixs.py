@@ -1,7 +1,12 @@
+from functools import partial
+
 import numpy as np
 import pytest
 
-from slice_aggregator import ixs_by_slices
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
 from slice_aggregator.by_ixs import Aggregator
 
 
@@ -26,6 +31,42 @@ def test_setitem_error():
     a = Aggregator(dual=ixs_by_slices())
     with pytest.raises(NotImplementedError):
         a[1] = 3
+    with pytest.raises(NotImplementedError):
+        a[1:3] = 3
+    with pytest.raises(NotImplementedError):
+        a[1:3] = a[4:5]
+
+
+def test_slices_in_expressions():
+    a = slices_by_ixs()
+
+    def f():
+        a[10:12] += 100
+        return 1
+    a[0:5] += f()
+    assert [a[0], a[4], a[5], a[10], a[11], a[12]] == [1, 1, 0, 100, 100, 0]
+    x = a[0:2]
+    y = a[5:6]
+    x += 1
+    y -= 1
+    assert [a[0], a[2], a[5]] == [2, 1, -1]
+
+
+@pytest.mark.parametrize('kwargs', [dict(), dict(zero_factory=int), dict(typecode='q'),
+                                    dict(track_points=False)])
+def test_fused_slice_updates(kwargs):
+    a = slices_by_ixs(**kwargs)
+    b = slices_by_ixs(**kwargs)
+    slices = [(ix * 37 % 101 - 50, ix * 37 % 101 - 50 + ix % 9) for ix in range(300)]
+    for ix, (start, stop) in enumerate(slices):
+        a[start:stop] += ix % 5 - 2
+        b.inc_many([start], [stop], [ix % 5 - 2])
+    a[-3:4] -= 7
+    b.dec(-3, 4, 7)
+
+    assert [a[ix] for ix in range(-60, 60)] == [b[ix] for ix in range(-60, 60)]
+    assert a.dual.nonnegative.table == b.dual.nonnegative.table
+    assert sorted(a.dual.negative.heap) == sorted(b.dual.negative.heap)
 
 
 def test_numpy_array():
@@ -54,3 +95,95 @@ def test_numpy_array():
     assert np.array_equal(a.get(5), np.array((1, 1, 0, 1)))
     assert np.array_equal(a.get(9), np.array((1, 1, 0, 1)))
     assert np.array_equal(a.get(10), np.array((1, 1, 0, 0)))
+
+
+def test_batch():
+    a = Aggregator(dual=ixs_by_slices())
+    a.inc_many([None, -10, -5, None], [None, None, 5, 10], [1, 100, -200, 10])
+
+    assert a.get_many([-11, -10, -6, -5, 4, 5, 9, 10]) == [11, 111, 111, -89, -89, 111, 111, 101]
+    with pytest.raises(ValueError):
+        a.inc_many([5], [3], [1])
+
+
+def test_from_items():
+    items = [(None, None, 1), (-10, None, 100), (-5, 5, -200), (None, 10, 10)]
+    a = Aggregator(dual=ixs_by_slices())
+    for start, stop, value in items:
+        a.inc(start, stop, value)
+    b = Aggregator.from_items(items)
+
+    assert b.get_many(range(-12, 12)) == a.get_many(range(-12, 12))
+
+
+@pytest.mark.parametrize('items', [None, [(None, 10, 10)]])
+def test_typecode(items):
+    a = slices_by_ixs(typecode='q', items=items)
+    a[:] += 1
+    a[-10:] += 100
+    a[-5:5] -= 200
+    if items is None:
+        a[:10] += 10
+
+    assert a.get_many([-11, -10, -5, 5, 10]) == [11, 111, -89, 111, 101]
+    assert len(a.dual.nonnegative.table) == 16
+    with pytest.raises(ValueError):
+        slices_by_ixs(typecode='q', zero_test=lambda v: v == 0)
+
+
+def test_merge():
+    items = [(None, None, 1), (-10, None, 100), (-5, 5, -200), (None, 10, 10), (3, 4, 7)]
+    a = slices_by_ixs(items=items[:2])
+    a += slices_by_ixs(items=items[2:])
+    expected = slices_by_ixs(items=items)
+
+    assert a.get_many(range(-12, 12)) == expected.get_many(range(-12, 12))
+    assert a.value_offset == 101
+
+
+def test_streaming():
+    items = [(None, None, 1), (-10, None, 100), (-5, 5, -101), (None, 10, 10), (3, 4, -10)]
+    a = slices_by_ixs(items=items)
+
+    assert list(a.items()) == [(ix, a.get(ix)) for ix in range(-10, 11)]
+    assert list(a.iter_range(-15, 15)) == [(ix, a.get(ix)) for ix in range(-15, 15)]
+    assert list(a.nonzero_items()) == [(ix, a.get(ix)) for ix in range(-11, 10) if a.get(ix)]
+    assert 3 not in dict(a.nonzero_items())
+    assert list(a.running_sums(0, 4)) == [(0, 10), (1, 20), (2, 30), (3, 30)]
+    assert list(slices_by_ixs().items()) == []
+    b = slices_by_ixs()
+    b.inc(0, 5, 1)
+    assert list(b.items()) == [(0, 1), (1, 1), (2, 1), (3, 1), (4, 1), (5, 0)]
+    assert list(b.iter_range(None, 2)) == [(0, 1), (1, 1)]
+    assert list(b.iter_range(4)) == [(4, 1), (5, 0)]
+
+
+def test_snapshot():
+    items = [(None, None, 1), (-10, None, 100), (-5, 5, -101), (None, 10, 10), (3, 4, -10)]
+    a = slices_by_ixs(items=items)
+    expected = slices_by_ixs(items=items)
+    s = a.snapshot()
+    a.inc(None, None, 5)
+    a[-3:8] += 4
+    a.inc_many([2, None], [20, 7], [1, 2])
+
+    assert [s[ix] for ix in range(-12, 12)] == [expected[ix] for ix in range(-12, 12)]
+    assert s.get_many(range(-12, 12)) == expected.get_many(range(-12, 12))
+    assert list(s.items()) == list(expected.items())
+    assert list(s.nonzero_items()) == list(expected.nonzero_items())
+    for write in [lambda: s.inc(None, None, 1), lambda: s.inc_many([1], [2], [3]),
+                  lambda: s.merge(expected)]:
+        with pytest.raises(TypeError):
+            write()
+    with pytest.raises(TypeError):
+        s[1:2] += 1
+
+
+def test_nonzero_items_vector_values():
+    a = Aggregator(dual=ixs_by_slices(zero_factory=partial(np.zeros, 2),
+                                      zero_test=lambda value: not value.any()))
+    a[2:5] += np.array([1., 0.])
+    a[3:6] += np.array([-1., 2.])
+    a[3:6] -= np.array([0., 2.])
+    assert [(ix, list(value)) for ix, value in a.nonzero_items()] == [
+        (2, [1., 0.]), (5, [-1., 0.])]
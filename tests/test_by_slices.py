@@ -1,12 +1,25 @@
+import array
+import gc
+import pickle
+from functools import partial
+
 import numpy as np
 import pytest
 
+from slice_aggregator.bitmap import HierarchicalBitmap
 from slice_aggregator.by_slices import (
+    ArrayLeftBoundedAggregator,
+    CompressedAggregator,
     FixedSizeAggregator,
+    NumericLeftBoundedAggregator,
     UnboundedAggregator,
     VariableSizeLeftBoundedAggregator,
     binary_tail,
 )
+from slice_aggregator.heap import (
+    IndexedUniqueMaxHeap,
+    LazyMaxHeap,
+)
 
 
 def test_binary_tail():
@@ -82,6 +95,23 @@ def test_variable_size_removes_unnecessary_data():
     assert len(a.heap) == 1
 
 
+@pytest.mark.parametrize('tracker_class', [IndexedUniqueMaxHeap, LazyMaxHeap, HierarchicalBitmap])
+def test_variable_size_trackers(tracker_class):
+    a = VariableSizeLeftBoundedAggregator(tracker_class=tracker_class)
+    a[3] += 10
+    a[15] += 15
+    assert len(a.table) == 2
+    assert len(a.heap) == 2
+    a[3] -= 10
+    assert len(a.table) == 1
+    assert len(a.heap) == 1
+    assert a.heap.max() == 15
+    a[15] -= 15
+    a.inc_many([0, 7], [1, 2])
+    assert a.heap.max() == 7
+    assert a[:] == 3
+
+
 def test_unbounded():
     a = UnboundedAggregator(
         negative=VariableSizeLeftBoundedAggregator(),
@@ -123,3 +153,424 @@ def test_unbounded_numpy_array():
     assert np.array_equal(a.get(-2, None), np.array((90, 180, -90)))
     assert np.array_equal(a.get(None, 0), np.array((-9, -18, 9)))
     assert np.array_equal(a.get(None, None), np.array((91, 182, -91)))
+
+
+def test_unbounded_batch():
+    a = UnboundedAggregator(
+        negative=VariableSizeLeftBoundedAggregator(),
+        nonnegative=VariableSizeLeftBoundedAggregator(),
+    )
+    b = UnboundedAggregator(
+        negative=VariableSizeLeftBoundedAggregator(),
+        nonnegative=VariableSizeLeftBoundedAggregator(),
+    )
+    ixs = [-6, -1, 8, 8, 3, -1, 3]
+    values = [1, -10, 100, 5, 7, 10, -7]
+    for ix, value in zip(ixs, values):
+        a.inc(ix, value)
+    b.inc_many(np.array(ixs), values)
+
+    assert b.nonnegative.table == a.nonnegative.table
+    assert b.negative.table == a.negative.table
+    assert len(b.nonnegative.heap) == 1
+    assert len(b.negative.heap) == 1
+
+    starts = [None, -1, 0, -2, None, 5, 9]
+    stops = [None, 0, 2, None, 0, 3, 100]
+    assert b.get_many(starts, stops) == [a.get(start, stop) for start, stop in zip(starts, stops)]
+    assert b.get_many(starts, stops) == [106, 0, 0, 105, 1, 0, 0]
+
+
+def test_fixed_size_batch():
+    a = FixedSizeAggregator(table=[0] * 10)
+    a.inc_many([0, 5, 9, 5], [1, -10, 100, 2])
+
+    assert a.get_many(np.array([5, 0, 6, 4, 0]), [6, 5, 8, None, 6]) == [-8, 1, 0, 92, -7]
+    with pytest.raises(IndexError):
+        a.inc_many([3, -1], [1, 1])
+    with pytest.raises(IndexError):
+        a.inc_many([3, 10], [1, 1])
+    assert a[:] == 93
+    assert a.table == FixedSizeAggregator.from_dense([1, 0, 0, 0, 0, -8, 0, 0, 0, 100]).table
+
+
+def test_fixed_size_bulk_construction():
+    values = [3, 0, -1, 7, 2, 0, 0, 5, 1, 1, 4]
+    a = FixedSizeAggregator(table=[0] * (len(values) + 2))
+    for ix, value in enumerate(values):
+        a.inc(ix + 2, value)
+
+    assert FixedSizeAggregator.from_dense(values, 2).table == a.table
+    assert FixedSizeAggregator.from_items(
+        [(ix + 2, value) for ix, value in enumerate(values)] + [(5, 1), (5, -1)],
+        size=len(values) + 2,
+    ).table == a.table
+
+
+def test_variable_size_bulk_construction():
+    items = [(0, 1), (1000, 5), (13, 2), (1000, -5), (77, -3), (13, 2)]
+    a = VariableSizeLeftBoundedAggregator()
+    for ix, value in items:
+        a.inc(ix, value)
+    b = VariableSizeLeftBoundedAggregator.from_items(items)
+
+    assert b.table == a.table
+    assert b.heap.max() == a.heap.max() == 77
+    assert len(b.heap) == 3
+
+    values = [2, 0, 5, -5, 1]
+    c = VariableSizeLeftBoundedAggregator()
+    for ix, value in enumerate(values):
+        c.inc(ix + 1021, value)
+    d = VariableSizeLeftBoundedAggregator.from_dense(values, 1021)
+
+    assert d.table == c.table
+    assert d.heap.max() == 1025
+    assert len(d.heap) == 4
+
+
+def test_unbounded_bulk_construction():
+    values = [1, 2, 3, 4, 5, 6]
+    for offset in [-10, -4, 0, 3]:
+        a = UnboundedAggregator.from_dense(values, offset)
+        b = UnboundedAggregator.from_items(
+            [(ix + offset, value) for ix, value in enumerate(values)])
+
+        for start in range(offset - 1, offset + 8):
+            assert a[start:] == b[start:] == sum(values[max(0, start - offset):])
+
+
+@pytest.mark.parametrize('track_points', [True, False])
+def test_variable_size_point_tracking(track_points):
+    a = VariableSizeLeftBoundedAggregator(track_points=track_points)
+    a[3] += 10
+    a[15] = 15
+    a[15] = 20
+    a.inc_many([3, 7, 7], [-10, 1, 2])
+
+    assert a[3] == 0
+    assert a[7] == 3
+    assert a[15] == 20
+    assert a[:] == 23
+    assert len(a.heap) == 2
+    assert (a.points == {7: 3, 15: 20}) if track_points else a.points is None
+    with pytest.raises(IndexError):
+        a[-1] = 1
+
+
+@pytest.mark.parametrize('track_points', [True, False])
+def test_array_left_bounded(track_points):
+    a = ArrayLeftBoundedAggregator(typecode='q', track_points=track_points)
+    b = VariableSizeLeftBoundedAggregator()
+    for ix, value in [(3, 10), (100, 5), (7, -2), (100, -5), (0, 1), (7, 2)]:
+        a.inc(ix, value)
+        b.inc(ix, value)
+
+    assert len(a.table) == 128
+    assert a.heap.max() == b.heap.max() == 3
+    assert [a[ix] for ix in range(110)] == [b[ix] for ix in range(110)]
+    assert a[2:] == b[2:] == 10
+    assert a[:] == b[:] == 11
+
+
+def test_array_left_bounded_bulk_construction():
+    items = [(3, 1.5), (1000, 5.0), (70, 2.0), (1000, -5.0)]
+    a = ArrayLeftBoundedAggregator.from_items(items)
+
+    assert isinstance(a.table, array.array)
+    assert len(a.table) == 128
+    assert a[70] == 2.0
+    assert a[:] == 3.5
+    a[1000] = 1.0
+    assert len(a.table) == 1024
+    assert a[4:] == 3.0
+
+
+def test_compressed():
+    m = 10 ** 15
+    a = CompressedAggregator(keys=[-6 * m, -1 * m, 8 * m])
+    a[-6 * m] = 1
+    a[-1 * m] -= 10
+    a[8 * m] += 100
+
+    assert a[-1 * m] == -10
+    assert a[0] == 0
+    assert a[0:2 * m] == 0
+    assert a[-2 * m:] == 90
+    assert a[:0] == -9
+    assert a[:] == 91
+    assert a.get_many([-6 * m + 1, None], [8 * m + 1, -6 * m + 1]) == [90, 1]
+    with pytest.raises(IndexError):
+        a[5] += 1
+
+    a.add_keys([5, -7 * m, 8 * m])
+    a.inc_many([5, -7 * m, 5], [1, 2, 3])
+
+    assert a.keys == [-7 * m, -6 * m, -1 * m, 5, 8 * m]
+    assert a[5] == 4
+    assert a[-6 * m:] == 95
+    assert a[:] == 97
+
+
+@pytest.mark.parametrize('left_bounded_class, kwargs', [
+    (VariableSizeLeftBoundedAggregator, dict(tracker_class=HierarchicalBitmap)),
+    (VariableSizeLeftBoundedAggregator, dict(track_points=False)),
+    (ArrayLeftBoundedAggregator, dict(typecode='q', tracker_class=LazyMaxHeap)),
+    (NumericLeftBoundedAggregator, dict()),
+])
+def test_merge(left_bounded_class, kwargs):
+    items = [(ix * 7 % 41 - 20, ix % 5 - 2) for ix in range(200)]
+    a = UnboundedAggregator.from_items(items[:120], left_bounded_class=left_bounded_class,
+                                       **kwargs)
+    b = UnboundedAggregator.from_items(items[120:], left_bounded_class=left_bounded_class,
+                                       **kwargs)
+    expected = UnboundedAggregator.from_items(items)
+    a += b
+
+    for start in range(-22, 22, 3):
+        for stop in range(start, 24, 5):
+            assert a[start:stop] == expected[start:stop]
+    for ix in range(-22, 22):
+        assert a[ix] == expected[ix]
+    assert sorted(a.nonnegative.heap) == sorted(expected.nonnegative.heap)
+    assert a.nonnegative.heap.max() == expected.nonnegative.heap.max()
+
+    a.merge(a)
+    assert a[:] == 2 * expected[:]
+    with pytest.raises(TypeError):
+        a.merge(expected.negative)
+
+
+@pytest.mark.parametrize('factory', [
+    lambda: FixedSizeAggregator(table=[0] * 64),
+    lambda: VariableSizeLeftBoundedAggregator(track_points=False),
+    lambda: ArrayLeftBoundedAggregator(typecode='q'),
+    lambda: NumericLeftBoundedAggregator(),
+    lambda: UnboundedAggregator.from_items([]),
+    lambda: CompressedAggregator(keys=range(64)),
+])
+def test_inc_pair(factory):
+    a = factory()
+    b = factory()
+    for ix in range(200):
+        dec_ix, inc_ix = ix * 7 % 64, ix * 11 % 64
+        a._inc_pair(dec_ix, inc_ix, ix % 3 + 1)
+        b.dec(dec_ix, ix % 3 + 1)
+        b.inc(inc_ix, ix % 3 + 1)
+
+    for start in range(0, 64, 5):
+        for stop in range(start, 65, 7):
+            assert a.get(start, stop) == b.get(start, stop)
+    assert [a[ix] for ix in range(64)] == [b[ix] for ix in range(64)]
+
+
+def test_inc_pair_walks_once():
+    a = VariableSizeLeftBoundedAggregator()
+    writes = []
+    table_set = a._table_set
+    a._table_set = lambda ix, value: writes.append(ix) or table_set(ix, value)
+    a._inc_pair(12, 13, 1)
+    assert writes == [13, 12]  # the walks meet at entry 11, which stays unchanged
+    with pytest.raises(IndexError):
+        a._inc_pair(-1, 3, 1)
+
+
+def test_fixed_size_merge():
+    a = FixedSizeAggregator.from_dense([1, 2, 3])
+    a += FixedSizeAggregator.from_dense([10, 20, 30])
+    assert [a[ix] for ix in range(3)] == [11, 22, 33]
+    assert a[1:] == 55
+    with pytest.raises(ValueError):
+        a.merge(FixedSizeAggregator.from_dense([1]))
+
+
+@pytest.mark.parametrize('kwargs', [dict(), dict(track_points=False),
+                                    dict(tracker_class=HierarchicalBitmap)])
+def test_numeric(kwargs):
+    items = [(ix * 7919 % 1009, (ix % 7 - 3) * 0.5) for ix in range(300)]
+    a = NumericLeftBoundedAggregator(**kwargs)
+    b = VariableSizeLeftBoundedAggregator(**kwargs)
+    for ix, value in items:
+        a.inc(ix, value)
+        b.inc(ix, value)
+    a.set(5, 0)
+    b.set(5, 0)
+    a.dec(1000, 2)
+    b.dec(1000, 2)
+
+    assert a.table == b.table
+    assert sorted(a.heap) == sorted(b.heap)
+    assert a.heap.max() == b.heap.max()
+    for start in [None, 0, 3, 500, 1000, 1100]:
+        for stop in [None, 0, 7, 640, 1001, 2000]:
+            assert a.get(start, stop) == b.get(start, stop)
+    assert [a[ix] for ix in range(1010)] == [b[ix] for ix in range(1010)]
+    assert (NumericLeftBoundedAggregator.from_items(items, **kwargs).table
+            == VariableSizeLeftBoundedAggregator.from_items(items, **kwargs).table)
+    with pytest.raises(IndexError):
+        a.inc(-1, 1)
+    with pytest.raises(IndexError):
+        a.get(-1, None)
+    assert not hasattr(a, '__dict__')
+    assert pickle.loads(pickle.dumps(a))[:] == b[:]
+
+
+def test_pickle():
+    a = UnboundedAggregator.from_items([(-3, 1), (5, 2)])
+    b = pickle.loads(pickle.dumps(a))
+    b.inc(7, 4)
+    assert b[:] == 7
+    assert b[-3] == 1
+    c = pickle.loads(pickle.dumps(UnboundedAggregator.from_items(
+        [(3, 1.5)], left_bounded_class=ArrayLeftBoundedAggregator)))
+    assert c[:] == 1.5
+
+
+@pytest.mark.parametrize('kwargs', [dict(), dict(left_bounded_class=ArrayLeftBoundedAggregator)])
+def test_find_prefix(kwargs):
+    items = [(ix * 37 % 201 - 100, ix % 4) for ix in range(300)]
+    a = UnboundedAggregator.from_items(items, **kwargs)
+    points = sorted((ix, a[ix]) for ix in range(-101, 102) if a[ix])
+
+    def expected(target, strict=False):
+        total = 0
+        for ix, value in points:
+            total += value
+            if total > target or not strict and total == target:
+                return ix
+        return None
+
+    total = a[:]
+    for target in range(1, int(total) + 2):
+        assert a.find_prefix(target) == expected(target)
+    qs = [0, 0.1, 0.25, 0.5, 0.5, 0.99, 1]
+    assert a.quantiles(qs) == [expected(q * total, q == 0) for q in qs]
+    assert a.quantile(0) == points[0][0]
+    assert a.quantile(1) == points[-1][0]
+    with pytest.raises(ValueError):
+        a.find_prefix(0)
+    with pytest.raises(ValueError):
+        a.quantile(2)
+    assert UnboundedAggregator.from_items([]).quantile(0.5) is None
+
+
+def test_fixed_size_find_prefix():
+    a = FixedSizeAggregator.from_dense([0, 1.5, 0, 0, 2, 0, 1])
+    assert [a.find_prefix(target) for target in [1, 1.5, 2, 3.5, 4, 4.5, 5]] == [
+        1, 1, 4, 4, 6, 6, None]
+    assert a.quantiles([0, 0.5, 1]) == [1, 4, 6]
+
+    c = CompressedAggregator(keys=[-10, 5, 1000])
+    c.inc(5, 2)
+    c.inc(1000, 1)
+    assert c.quantiles([0, 0.5, 1]) == [5, 5, 1000]
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(),
+    dict(track_points=False),
+    dict(left_bounded_class=ArrayLeftBoundedAggregator, typecode='q', track_points=False),
+])
+def test_streaming(kwargs):
+    items = [(ix * 37 % 201 - 100, ix % 5 - 2) for ix in range(300)]
+    a = UnboundedAggregator.from_items(items, **kwargs)
+    expected = {}
+    for ix, value in items:
+        expected[ix] = expected.get(ix, 0) + value
+    nonzero = sorted((ix, value) for ix, value in expected.items() if value)
+
+    assert list(a.nonzero_items()) == nonzero
+    low, high = nonzero[0][0], nonzero[-1][0]
+    assert list(a.items()) == [(ix, expected.get(ix, 0)) for ix in range(low, high + 1)]
+    assert list(a.iter_range(-120, 5)) == [(ix, expected.get(ix, 0)) for ix in range(-120, 5)]
+    assert list(a.iter_range(3, 300)) == [(ix, expected.get(ix, 0)) for ix in range(3, 300)]
+    assert list(a.running_sums(-50, 50)) == [(ix, a[-50:ix + 1]) for ix in range(-50, 50)]
+    assert list(UnboundedAggregator.from_items([]).items()) == []
+
+
+def test_fixed_size_streaming():
+    a = FixedSizeAggregator.from_dense([0, 1, 0, 3, 4, 0])
+    assert list(a.items()) == [(1, 1), (2, 0), (3, 3), (4, 4)]
+    assert list(a.nonzero_items()) == [(1, 1), (3, 3), (4, 4)]
+    assert list(a.running_sums(2)) == [(2, 0), (3, 3), (4, 7)]
+
+    c = CompressedAggregator(keys=[-10, 5, 1000])
+    c.inc(5, 2)
+    assert list(c.nonzero_items()) == [(5, 2)]
+    assert list(c.iter_range(4, 7)) == [(4, 0), (5, 2), (6, 0)]
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(),
+    dict(left_bounded_class=NumericLeftBoundedAggregator),
+    dict(track_points=False),
+    dict(left_bounded_class=ArrayLeftBoundedAggregator, typecode='q'),
+])
+def test_snapshot(kwargs):
+    items = [(ix * 37 % 201 - 100, ix % 5 - 2) for ix in range(300)]
+    a = UnboundedAggregator.from_items(items, **kwargs)
+    expected = UnboundedAggregator.from_items(items, **kwargs)
+    s = a.snapshot()
+    for ix, value in [(5, 3), (-7, 1), (150, 2), (1000, -4), (-300, 5), (3, -a[3])]:
+        a.inc(ix, value)
+    a._inc_pair(-20, 40, 6)
+    a.inc_many([1, 2, 2000], [1, 1, 1])
+
+    starts = [None, -150, -3, 0, 7, 200]
+    stops = [None, -50, 9, 120, 1500, None]
+    assert [s[start:stop] for start, stop in zip(starts, stops)] == [
+        expected[start:stop] for start, stop in zip(starts, stops)]
+    assert s.get_many(starts, stops) == expected.get_many(starts, stops)
+    assert [s[ix] for ix in range(-110, 110)] == [expected[ix] for ix in range(-110, 110)]
+    assert list(s.nonzero_items()) == list(expected.nonzero_items())
+    assert list(s.items()) == list(expected.items())
+    assert s.snapshot()[:] == expected[:]
+    with pytest.raises(TypeError):
+        s.inc(3, 1)
+    with pytest.raises(TypeError):
+        s[3] = 1
+    assert (a[150], s[150]) == (2, 0)
+
+
+def test_snapshot_released():
+    a = NumericLeftBoundedAggregator()
+    a.inc(3, 1)
+    s = a.snapshot()
+    a.inc(1, 1)
+    assert len(a.snapshot_logs.logs) == 1
+    assert s[:] == 1
+    del s
+    gc.collect()
+    assert not a.snapshot_logs.logs
+
+
+def test_fixed_size_snapshot():
+    a = FixedSizeAggregator.from_dense([0, 1, 0, 3, 4, 0])
+    s = a.snapshot()
+    a.inc(2, 5)
+    a.merge(FixedSizeAggregator.from_dense([1] * 6))
+    assert list(s.iter_range(0, 6)) == list(enumerate([0, 1, 0, 3, 4, 0]))
+    assert s.find_prefix(4) == 3
+
+    c = CompressedAggregator(keys=[-10, 5, 1000])
+    c.inc(5, 2)
+    t = c.snapshot()
+    c.inc(-10, 1)
+    c.add_keys([7])
+    c.inc(7, 3)
+    assert list(t.nonzero_items()) == [(5, 2)]
+    assert t[:6] == 2
+    with pytest.raises(TypeError):
+        t.add_keys([8])
+
+
+def test_fixed_size_vector_values():
+    a = FixedSizeAggregator.from_dense([np.zeros(2)] * 4, zero_factory=partial(np.zeros, 2))
+    a.inc(2, np.array([1., 0.]))
+    assert [(ix, list(value)) for ix, value in a.nonzero_items()] == [(2, [1., 0.])]
+    assert [ix for ix, _ in a.items()] == [2]
+
+    c = CompressedAggregator(keys=[10, 20, 30], zero_factory=partial(np.zeros, 2),
+                             zero_test=lambda value: not value.any())
+    c.inc(20, np.array([0., 3.]))
+    assert [(ix, list(value)) for ix, value in c.items()] == [(20, [0., 3.])]
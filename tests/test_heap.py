@@ -30,3 +30,54 @@ def test_indexed_unique_max_heap():
     assert 25 not in h
     assert 30 not in h
     assert h.max() == 20
+
+
+def test_indexed_unique_max_heap_remove_keeps_order():
+    h = heap.IndexedUniqueMaxHeap()
+    for value in [100, 10, 90, 5, 6, 80, 70]:
+        h.add(value)
+    h.remove(5)
+    h.remove(100)
+    h.remove(90)
+    h.remove(80)
+
+    assert h.max() == 70
+
+
+def test_indexed_unique_max_heap_from_iterable():
+    h = heap.IndexedUniqueMaxHeap.from_iterable([10, 20, 30, 15, 20, 25])
+
+    assert len(h) == 5
+    for expected in [30, 25, 20, 15, 10]:
+        assert h.max() == expected
+        h.remove(expected)
+    assert h.max() is None
+
+
+def test_lazy_max_heap():
+    h = heap.LazyMaxHeap.from_iterable([10, 20, 30])
+    h.add(15)
+    h.add(20)
+    h.remove(30)
+    h.remove(35)
+
+    assert len(h) == 3
+    assert 30 not in h
+    assert 20 in h
+    assert h.max() == 20
+
+    for _ in range(100):
+        h.add(1000)
+        h.remove(1000)
+        h.add(30)
+    h.remove(20)
+
+    assert h.max() == 30
+    assert len(h.data) <= 5
+
+
+def test_iteration():
+    for h in [heap.IndexedUniqueMaxHeap.from_iterable([3, 1, 4, 1, 5]),
+              heap.LazyMaxHeap.from_iterable([3, 1, 4, 1, 5])]:
+        h.remove(4)
+        assert sorted(h) == [1, 3, 5]
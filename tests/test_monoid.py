@@ -0,0 +1,87 @@
+import heapq
+import random
+
+import numpy as np
+import pytest
+
+from slice_aggregator import ixs_by_slices_monoid
+from slice_aggregator.monoid import (
+    LazySegmentTreeAggregator,
+    SegmentTreeAggregator,
+)
+
+_MONOIDS = [
+    (max, float('-inf'), lambda rng: rng.randrange(-50, 50)),
+    (min, float('inf'), lambda rng: rng.randrange(-50, 50)),
+    (lambda a, b: a + b, '', lambda rng: rng.choice('abc')),  # not commutative
+    (lambda a, b: tuple(heapq.nlargest(3, a + b)), (), lambda rng: (rng.randrange(100),)),
+]
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+@pytest.mark.parametrize('operation, identity, make_value', _MONOIDS)
+def test_against_scan(lazy, operation, identity, make_value):
+    rng = random.Random(0)
+    a = ixs_by_slices_monoid(operation, identity, lazy=lazy)
+    expected = {}
+    for _ in range(1000):
+        r = rng.random()
+        if r < 0.3:
+            ix, value = rng.randrange(-300, 300), make_value(rng)
+            a[ix] = value
+            expected[ix] = value
+        elif r < 0.45:
+            ix, value = rng.randrange(-300, 300), make_value(rng)
+            a.inc(ix, value)
+            expected[ix] = operation(expected.get(ix, identity), value)
+        elif r < 0.55 and lazy:
+            start, value = rng.randrange(-300, 300), make_value(rng)
+            stop = start + rng.randrange(80)
+            a[start:stop] = value
+            expected.update((ix, value) for ix in range(start, stop))
+        else:
+            start = rng.choice([None, rng.randrange(-320, 320)])
+            stop = rng.choice([None, rng.randrange(-320, 320)])
+            result = identity
+            for ix in range(-400 if start is None else start, 400 if stop is None else stop):
+                result = operation(result, expected.get(ix, identity))
+            assert a[start:stop] == result
+
+
+def test_segment_tree():
+    a = ixs_by_slices_monoid(max, 0, items=[(-10 ** 12, 5), (3, 7), (10 ** 12, 2), (3, 1)])
+    assert isinstance(a, SegmentTreeAggregator)
+    assert a[:] == 7
+    assert a[4:] == 2
+    assert a[3] == 7
+    assert a[-5:3] == 0
+    a[3] = 0
+    assert a[:] == 5
+    assert list(a.nonzero_items()) == [(-10 ** 12, 5), (10 ** 12, 2)]
+    with pytest.raises(TypeError):
+        a.dec(3, 1)
+    with pytest.raises(ValueError):
+        ixs_by_slices_monoid(max, 0, power=lambda value, n: value)
+
+
+def test_lazy_segment_tree():
+    a = ixs_by_slices_monoid(lambda x, y: x + y, 0, lazy=True, power=lambda value, n: value * n)
+    assert isinstance(a, LazySegmentTreeAggregator)
+    a[-10 ** 9:10 ** 9] = 1
+    a[0:10] = 3
+    a[5] = 0
+    assert a[:] == 2 * 10 ** 9 + 17
+    assert a[3:7] == 9
+    assert a[-2:2] == 8
+    with pytest.raises(ValueError):
+        a[:5] = 1
+
+
+def test_identity_test():
+    a = SegmentTreeAggregator(operation=np.maximum, identity=np.zeros(2),
+                              identity_test=lambda value: not value.any())
+    a.set(1, np.array([1, 5]))
+    a.set(4, np.array([3, 2]))
+    assert a.get(None, None).tolist() == [3, 5]
+    a.set(1, np.zeros(2))
+    assert list(a.nonzero_items())[0][0] == 4
@@ -0,0 +1,75 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from slice_aggregator import ixs_by_boxes
+from slice_aggregator.multidim import (
+    FixedSizeAggregator,
+    VariableSizeLeftBoundedAggregator,
+)
+
+
+def test_fixed_size():
+    a = FixedSizeAggregator(shape=(4, 5))
+    a[0, 0] = 1
+    a[2, 3] += 10
+    a[3, 4] -= 100
+
+    assert a[2, 3] == 10
+    assert a[:, :] == -89
+    assert a[1:, 1:] == -90
+    assert a[:3, 3:] == 10
+    assert a[3:, :4] == 0
+    with pytest.raises(IndexError):
+        a[4, 0] = 1
+    with pytest.raises(IndexError):
+        a[0, 0, 0] = 1
+
+
+def test_variable_size_removes_unnecessary_data():
+    a = VariableSizeLeftBoundedAggregator(ndim=2)
+    a[3, 5] += 10
+    a[3, 5] -= 10
+
+    assert not a.table
+    assert a[:, :] == 0
+
+
+def test_unbounded_against_naive():
+    rng = random.Random(0)
+    a = ixs_by_boxes(2)
+    points = {}
+    for _ in range(100):
+        point = (rng.randrange(-8, 8), rng.randrange(-8, 8))
+        value = rng.randrange(-5, 6)
+        a.inc(point, value)
+        points[point] = points.get(point, 0) + value
+    bounds = [None] + list(range(-9, 10))
+    for t0, t1, k0, k1 in itertools.product(bounds, repeat=4):
+        if rng.random() > 0.01:
+            continue
+        expected = sum(value for (t, k), value in points.items()
+                       if (t0 is None or t0 <= t) and (t1 is None or t < t1)
+                       and (k0 is None or k0 <= k) and (k1 is None or k < k1))
+        assert a[t0:t1, k0:k1] == expected
+
+
+def test_unbounded_numpy_array():
+    def zero_factory():
+        return np.zeros(2)
+
+    zero = zero_factory()
+
+    def zero_test(v):
+        return np.array_equal(zero, v)
+
+    a = ixs_by_boxes(3, zero_factory=zero_factory, zero_test=zero_test)
+    a.inc((-1, 0, 5), np.array((1, 2)))
+    a.dec((2, -3, 0), np.array((10, 0)))
+    a.set((0, 0, 0), np.array((0, 100)))
+
+    assert np.array_equal(a.get(((None, None), (None, None), (None, None))), (-9, 102))
+    assert np.array_equal(a.get(((None, 0), (0, None), (None, None))), (1, 2))
+    assert np.array_equal(a.get(((0, 5), (-3, 1), (0, 1))), (-10, 100))
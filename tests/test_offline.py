@@ -0,0 +1,83 @@
+import fractions
+import random
+
+import numpy as np
+import pytest
+
+from slice_aggregator import (
+    offline,
+    slices_by_ixs,
+)
+
+
+def _online(starts, stops, values, ixs, **kwargs):
+    a = slices_by_ixs(**kwargs)
+    for start, stop, value in zip(starts, stops, values):
+        a.inc(start, stop, value)
+    return a.get_many(ixs)
+
+
+def _random_slices(n, v, seed=0):
+    rng = random.Random(seed)
+    starts, stops = [], []
+    for _ in range(n):
+        start, stop = sorted((rng.randrange(-v, v), rng.randrange(-v, v)))
+        starts.append(None if rng.random() < 0.1 else start)
+        stops.append(None if rng.random() < 0.1 else stop)
+    return starts, stops
+
+
+def test_slices_by_ixs():
+    starts, stops = _random_slices(500, 100)
+    values = [ix % 11 - 5 for ix in range(500)]
+    ixs = list(range(-110, 110)) + [0, 0, 5]
+    result = offline.slices_by_ixs(starts, stops, values, ixs)
+
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == _online(starts, stops, values, ixs)
+    assert offline.slices_by_ixs(np.array([1, 3]), np.array([5, 3]), np.array([2, 7]),
+                                 np.array([0, 1, 3, 4, 5])).tolist() == [0, 2, 2, 2, 0]
+    assert offline.slices_by_ixs([], [], [], [1, 2]).dtype.kind == 'i'
+    assert offline.slices_by_ixs([], [], [], [1, 2]).tolist() == [0, 0]
+
+
+def test_slices_by_ixs_vectors():
+    starts, stops = _random_slices(100, 20)
+    values = np.array([[ix, -2 * ix, 0.5] for ix in range(100)])
+    ixs = list(range(-25, 25))
+    expected = _online(starts, stops, values, ixs, zero_factory=lambda: np.zeros(3),
+                       zero_test=lambda v: not v.any())
+
+    assert np.allclose(offline.slices_by_ixs(starts, stops, values, ixs), expected)
+
+
+@pytest.mark.parametrize('values, ixs, kwargs', [
+    ([fractions.Fraction(ix, 7) for ix in range(300)], list(range(-60, 60)), dict()),
+    (list(range(300)), [ix * 10 ** 18 for ix in range(-60, 60)], dict()),
+    ([ix * 10 ** 20 for ix in range(300)], list(range(-60, 60)), dict()),
+    ([2 ** 62] * 300, list(range(-60, 60)), dict()),
+    (list(range(300)), list(range(-60, 60)), dict(zero_factory=int)),
+])
+def test_slices_by_ixs_python(values, ixs, kwargs):
+    starts, stops = _random_slices(300, 50)
+    if max(abs(ix) for ix in ixs) > 100:
+        starts = [None if start is None else start * 10 ** 18 for start in starts]
+        stops = [None if stop is None else stop * 10 ** 18 for stop in stops]
+    result = offline.slices_by_ixs(starts, stops, values, ixs, **kwargs)
+
+    assert isinstance(result, list)
+    assert result == _online(starts, stops, values, ixs)
+
+
+def test_slices_by_ixs_overflow():
+    assert offline.slices_by_ixs([0, 0], [5, 5], [2 ** 62, 2 ** 62], [1]) == [2 ** 63]
+    assert offline.slices_by_ixs([0, None], [5, 5], np.full(2, -2 ** 62), [1, 7]) == [-2 ** 63, 0]
+
+
+def test_slices_by_ixs_errors():
+    with pytest.raises(ValueError):
+        offline.slices_by_ixs([3], [2], [1], [0])
+    with pytest.raises(ValueError):
+        offline.slices_by_ixs([3], [2], [fractions.Fraction(1)], [0])
+    with pytest.raises(ValueError):
+        offline.slices_by_ixs([1, 2], [3], [1, 1], [0])
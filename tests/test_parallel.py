@@ -0,0 +1,27 @@
+import concurrent.futures
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.parallel import build
+
+
+def test_build():
+    items = [(ix * 13 % 101 - 50, ix % 3) for ix in range(1000)]
+    a = build(ixs_by_slices, iter(items), chunk_size=64, max_workers=2)
+    expected = ixs_by_slices(items=items)
+
+    for start in range(-60, 60, 7):
+        assert a[start:] == expected[start:]
+        assert a[start] == expected[start]
+
+
+def test_build_with_executor():
+    items = [(ix - 20, ix + 5, 1) for ix in range(100)] + [(None, None, 3)]
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        a = build(slices_by_ixs, items, chunk_size=10, max_workers=4, executor=executor)
+    expected = slices_by_ixs(items=items)
+
+    assert a.get_many(range(-30, 110)) == expected.get_many(range(-30, 110))
+    assert build(slices_by_ixs, [], executor=executor).get(0) == 0
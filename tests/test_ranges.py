@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+
+from slice_aggregator import slices_by_slices
+
+
+def test_mixed_slice_types():
+    a = slices_by_slices()
+    a[-10:] += 100
+    a[-5:5] -= 200
+    a[:10] += 10
+    a[3] += 1
+
+    assert a[-11] == 10
+    assert a[-10] == 110
+    assert a[-5] == -90
+    assert a[3] == -89
+    assert a[9] == 110
+    assert a[10] == 100
+    assert a[-10:10] == 10 * 110 + 10 * -90 + 1
+    assert a[-12:-4] == 2 * 10 + 5 * 110 - 90
+    assert a[2:12] == 3 * -90 + 1 + 5 * 110 + 2 * 100
+    with pytest.raises(ValueError):
+        a.get(-10, None)
+    with pytest.raises(ValueError):
+        a[:10] + 1
+
+    a[11:] -= 100
+    a[:-10] -= 10
+    assert a[-100:] == a[-100:100] == 10 * 110 + 10 * -90 + 1 + 100
+
+
+def test_random_against_naive():
+    rng = random.Random(0)
+    a = slices_by_slices()
+    values = [0] * 40
+    for _ in range(200):
+        start, stop = sorted((rng.randrange(-20, 21), rng.randrange(-20, 21)))
+        value = rng.randrange(-5, 6)
+        a.inc(start, stop, value)
+        for ix in range(start, stop):
+            values[ix + 20] += value
+        start, stop = sorted((rng.randrange(-20, 21), rng.randrange(-20, 21)))
+        assert a.get(start, stop) == sum(values[start + 20:stop + 20])
+
+
+def test_setitem_error():
+    a = slices_by_slices()
+    with pytest.raises(NotImplementedError):
+        a[1:3] = 3
+    with pytest.raises(NotImplementedError):
+        a[1:3] = a[4:5]
+
+
+def test_slice_increments_are_exact():
+    a = slices_by_slices()
+    a[0:2 ** 53] += 1.0
+    a[0:2 ** 53] += 1.0  # the sum of the slice doesn't change in floats
+    assert a[0] == 2.0
+    a[1:3] += a[0]
+    assert a[2] == 4.0
+    a[-5] = 3
+    a[-5] += 1
+    assert a[-5] == 4
+    assert a[-6:-4] == 4
+
+
+def test_slices_are_read_when_sliced():
+    a = slices_by_slices()
+    a.inc(0, 5, 1)
+    x = a[0:5]
+    a.inc(0, 5, 1)
+    assert x == 5
+    assert a[0:5] == 10
+    assert abs(-a[0:5]) == 10
+    assert round(a[0:3] / 4) == 2
+    assert '{:.2f}'.format(a[0:5]) == '10.00'
+    assert {a[0:5]: 'x'}[10] == 'x'
+    a.inc(None, 0, 1)
+    y = a[:]
+    with pytest.raises(ValueError):
+        abs(y)
+    a[:0] -= 1
+    assert a[:] == 10
+
+
+def test_numpy_array():
+    def zero_factory():
+        return np.zeros(2)
+
+    zero = zero_factory()
+
+    def zero_test(v):
+        return np.array_equal(zero, v)
+
+    a = slices_by_slices(zero_factory=zero_factory, zero_test=zero_test)
+    a.inc(-3, 3, np.array((1, 0)))
+    a.inc(None, 0, np.array((0, 1)))
+    a.dec(None, -5, np.array((0, 1)))
+
+    assert np.array_equal(a.get(-10, 10), (6, 5))
+    assert np.array_equal(a.get(None, 1), (4, 5))
+    assert np.array_equal(a.get(None, None), (6, 5))
+    a.inc(None, None, np.array((0, 1)))
+    with pytest.raises(ValueError):
+        a.get(None, None)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.bitmap import HierarchicalBitmap
+from slice_aggregator.by_slices import FixedSizeAggregator
+from slice_aggregator.serialization import (
+    load,
+    save,
+)
+from slice_aggregator.vectorized import FixedSizeAggregator as VectorizedFixedSizeAggregator
+
+ITEMS = [(ix * 37 % 1001 - 500, ix % 7 - 3) for ix in range(3000)]
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(),
+    dict(track_points=False, tracker_class=HierarchicalBitmap),
+    dict(typecode='q'),
+    dict(zero_factory=float),
+])
+def test_unbounded(tmp_path, kwargs):
+    path = str(tmp_path / 'a.bin')
+    a = ixs_by_slices(items=ITEMS, **kwargs)
+    save(a, path)
+    b = load(path)
+
+    assert type(b.nonnegative) is type(a.nonnegative)
+    assert (b.nonnegative.points is None) == (a.nonnegative.points is None)
+    for start in range(-510, 510, 37):
+        assert b[start:] == a[start:]
+        assert b[start] == a[start]
+    b[3] += 1
+    assert b[:] == a[:] + 1
+
+
+def test_by_ixs(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    a = slices_by_ixs(items=[(None, None, 1.5), (-3, 10, 2), (5, None, -1)], typecode='d')
+    save(a, path)
+    for b in [load(path), load(path, mmap=True)]:
+        assert b.get_many(range(-5, 15)) == a.get_many(range(-5, 15))
+
+
+def test_mmap(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    a = ixs_by_slices(items=ITEMS, typecode='q')
+    save(a, path)
+    b = load(path, mmap=True)
+
+    assert isinstance(b.nonnegative, FixedSizeAggregator)
+    assert isinstance(b.nonnegative.table, memoryview)
+    starts = list(range(-510, 510))
+    assert b.get_many(starts, [None] * len(starts)) == a.get_many(starts, [None] * len(starts))
+    with pytest.raises(TypeError):
+        b.inc(3, 1)
+
+
+def test_fixed_size(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    save(VectorizedFixedSizeAggregator.from_dense(np.arange(10.0)), path)
+    for b in [load(path), load(path, mmap=True)]:
+        assert b[2:5] == 9.0
+        assert isinstance(b[2:5], float)
+    with pytest.raises(TypeError):
+        save(FixedSizeAggregator.from_dense([1, 'a']), path)
+
+
+def test_zero_type(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    a = ixs_by_slices(zero_factory=float)
+    a.inc(3, 2)
+    save(a, path)
+    b = load(path)
+    assert isinstance(b[10:20], float)
+    assert isinstance(b[:], float)
+
+    save(FixedSizeAggregator.from_dense([1, 2, 3], zero_factory=float), path)
+    for b in [load(path), load(path, mmap=True)]:
+        assert isinstance(b[1:1], float)
+        assert b[1:3] == 5.0
+
+    save(slices_by_ixs(zero_factory=float), path)
+    assert isinstance(load(path)[4], float)
+
+
+def test_invalid_file(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    with open(path, 'wb') as f:
+        f.write(b'not an aggregator')
+    with pytest.raises(ValueError):
+        load(path)
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.server import (
+    AsyncClient,
+    Client,
+    Server,
+)
+
+
+@pytest.fixture(params=['unix', 'tcp'])
+def server(request, tmp_path):
+    server = Server(dict(spans=slices_by_ixs()), default_factory=ixs_by_slices, buffer_size=4)
+    if request.param == 'unix':
+        address = server.start_in_thread(path=str(tmp_path / 'server.sock'))
+    else:
+        address = server.start_in_thread()
+    yield server, address
+    server.stop_thread()
+
+
+def test_client(server):
+    server, address = server
+    client = Client(address, pool_size=2)
+    client.inc('counts', [5, -3, 5, 10 ** 12], [1, 2, 3, 4])
+    client.inc('counts', [], [])
+    client.inc('floats', [1], [0.5])
+    assert client.get('counts', [None, 0, 6], [None, 6, None]) == [10, 4, 4]
+    assert client.get('floats', [None], [None]) == [0.5]
+    client.inc_slices('spans', [1, None, 3], [5, 2, None], [1, 10, 100])
+    assert client.get_ixs('spans', [0, 1, 3, 7]) == [10, 11, 101, 100]
+
+    with pytest.raises(TypeError):
+        client.inc('spans', [1], [1])
+    with pytest.raises(ValueError):
+        client.inc_slices('spans', [3], [2], [1])
+    with pytest.raises(TypeError):
+        client.inc('counts', [1], ['a'])
+    assert client.get('counts', [None], [None]) == [10]
+    client.inc('big', [1, 2], [2 ** 62, 2 ** 62])
+    assert client.get('big', [None, 2], [None, None]) == [2.0 ** 63, 2 ** 62]
+    client.close()
+
+    strict = Server()
+    with pytest.raises(KeyError):
+        strict._aggregator('counts')
+    address = strict.start_in_thread()
+    try:
+        client = Client(address)
+        with pytest.raises(KeyError) as info:
+            client.get('zz', [None], [None])
+        assert info.value.args == ("No aggregator named 'zz'",)
+        client.close()
+    finally:
+        strict.stop_thread()
+
+
+def test_async_client(server):
+    server, address = server
+
+    async def run():
+        client = AsyncClient(address, pool_size=3)
+        await asyncio.gather(*[client.inc('counts', [ix % 7], [1]) for ix in range(100)])
+        assert len(client.connections) <= 3
+        totals = await asyncio.gather(*[client.get('counts', [None, 3], [None, 4])
+                                        for _ in range(10)])
+        await client.inc_slices('spans', [0], [10], [2])
+        spans = await client.get_ixs('spans', [5, 10])
+        with pytest.raises(TypeError):
+            await client.get_ixs('counts', [1])
+        client.close()
+        return totals, spans
+
+    loop = asyncio.new_event_loop()
+    try:
+        totals, spans = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert totals == [[100, 14]] * 10
+    assert spans == [2, 0]
+    assert server.aggregators['counts'].get(None, None) == 100
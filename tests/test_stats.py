@@ -0,0 +1,93 @@
+import pytest
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.by_slices import (
+    CompressedAggregator,
+    NumericLeftBoundedAggregator,
+)
+from slice_aggregator.stats import instrument
+from slice_aggregator.window import WindowedAggregator
+
+
+def test_instrument():
+    a = ixs_by_slices()
+    stats = instrument(a, timings=True)
+    a.inc(5, 1)
+    a.inc(-3, 2)
+    a[5] = 3
+    assert a[:] == 5
+    assert a.get_many([None], [0]) == [2]
+
+    result = stats.as_dict()
+    assert result['inc'] == 2
+    assert result['set'] == 1
+    assert result['get'] == 1
+    assert result['get_many'] == 1
+    assert result['heap_adds'] == 3
+    assert result['heap_removes'] == 0
+    assert result['zero_tests'] > 0
+    assert result['table_size'] == len(a.negative.table) + len(a.nonnegative.table)
+    assert result['tracked_indices'] == 2
+    assert result['walk_steps'] == result['table_reads'] + result['table_writes']
+    assert 0 < result['walk_steps_max'] < result['walk_steps']
+    assert sum(result['timings']['inc'].values()) == 2
+
+    stats.detach()
+    assert 'inc' not in a.__dict__
+    assert type(a.nonnegative) is NumericLeftBoundedAggregator
+    a.inc(5, 1)
+    assert stats.as_dict()['inc'] == 2
+    assert a[5] == 4
+
+
+def test_instrument_by_ixs():
+    a = slices_by_ixs(buffer_size=10)
+    stats = instrument(a)
+    a[1:5] += 1
+    a.inc(None, 3, 2)
+    assert a[2] == 3
+
+    result = stats.as_dict()
+    assert result['inc'] == 2
+    assert result['get'] == 1
+    assert result['table_writes'] > 0
+    assert 'timings' not in result
+
+
+def test_instrument_numeric():
+    with pytest.raises(TypeError):
+        instrument(NumericLeftBoundedAggregator())
+
+
+def test_instrument_replaced_components():
+    a = CompressedAggregator(keys=[1, 5])
+    stats = instrument(a)
+    refreshes = []
+    refresh = stats._refresh
+    stats._refresh = lambda: refreshes.append(1) or refresh()
+    a.inc(5, 1)
+    a.inc(1, 1)
+    assert not refreshes
+    a.dec(1, 1)
+    a.add_keys([3])
+    a.inc(3, 1)
+    assert len(refreshes) == 1
+    result = stats.as_dict()
+    assert (result['inc'], result['dec']) == (3, 1)
+    assert result['table_writes'] == 1 + 1 + 1 + 1
+    assert result['table_size'] == 3
+
+    w = WindowedAggregator(window=3)
+    stats = instrument(w)
+    w.inc(0, 1)  # the ring is replaced on the first write, uncounted
+    w.inc(1, 1)
+    w.inc(100, 1)  # and after a jump
+    w.inc(101, 1)
+    result = stats.as_dict()
+    assert result['inc'] == 4
+    assert result['table_writes'] == 1 + 1
+    stats.detach()
+    assert 'inc' not in w.ring.__dict__
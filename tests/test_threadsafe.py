@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+
+import pytest
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.by_slices import FixedSizeAggregator
+from slice_aggregator.threadsafe import (
+    ByIxsAggregator,
+    BySlicesAggregator,
+)
+
+
+def _run_threads(target, n):
+    workers = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def test_by_slices_concurrent_writes():
+    rng = random.Random(0)
+    chunks = [[(rng.randrange(-50, 50), rng.randrange(-5, 5)) for _ in range(500)]
+              for _ in range(8)]
+    a = BySlicesAggregator(ixs_by_slices(), max_buffered=64)
+    reads = []
+
+    def write(i):
+        for ix, value in chunks[i]:
+            a.inc(ix, value)
+            if ix % 7 == 0:
+                reads.append(a.get(None, None))
+    _run_threads(write, len(chunks))
+
+    expected = ixs_by_slices()
+    for chunk in chunks:
+        for ix, value in chunk:
+            expected.inc(ix, value)
+    for start in range(-55, 55, 10):
+        for stop in range(start, 60, 15):
+            assert a.get(start, stop) == expected.get(start, stop)
+    assert a.get_many([None, 0], [0, None]) == [expected.get(None, 0), expected.get(0, None)]
+    assert reads
+
+
+def test_by_slices_set_and_dec():
+    a = BySlicesAggregator(ixs_by_slices())
+    a.inc(3, 5)
+    a.set(3, 2)
+    a.dec(4, 1)
+    assert a.get(3, 4) == 2
+    assert a.get(None, None) == 1
+
+
+def test_failed_flush_keeps_writes():
+    a = BySlicesAggregator(FixedSizeAggregator(table=[0] * 4))
+    a.inc(1, 2)
+    a.inc(9, 1)
+    with pytest.raises(IndexError):
+        a.get(None, None)
+    a.dec(9, 1)
+    a.inc(2, 3)
+    with pytest.raises(IndexError):
+        a.flush()
+    assert a._merged.data == {1: 2, 9: 0, 2: 3}
+    assert a.aggregator.get(None, None) == 0
+
+
+def test_by_ixs_concurrent_writes():
+    a = ByIxsAggregator(slices_by_ixs())
+
+    def write(i):
+        for j in range(100):
+            a.inc(i - j, i + j + 1, 1)
+            a.inc(None, i, 1)
+    _run_threads(write, 4)
+
+    for ix in range(-10, 10):
+        expected = sum(1 for i in range(4) for j in range(100) if i - j <= ix <= i + j)
+        expected += sum(100 for i in range(4) if ix < i)
+        assert a.get(ix) == expected
+    assert a.get_many([0, 200]) == [a.get(0), 0]
+
+
+def test_flush_interval():
+    def flushed(a):
+        # read the wrapped aggregator without flushing, but not during a flush
+        with a._lock:
+            return a.aggregator.get(None, None)
+
+    with BySlicesAggregator(ixs_by_slices(), flush_interval=0.01) as a:
+        a.inc(1, 1)
+        deadline = time.time() + 5
+        while flushed(a) != 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert flushed(a) == 1
+        a.inc(2, 1)
+    assert flushed(a) == 2
+
+
+def test_snapshot_concurrent_writes():
+    a = BySlicesAggregator(ixs_by_slices())
+    for ix in range(-50, 50):
+        a.inc(ix, 1)
+    s = a.snapshot()
+    stop = threading.Event()
+
+    def write(i):
+        rng = random.Random(i)
+        while not stop.is_set():
+            a.inc(rng.randrange(-60, 60), rng.randrange(1, 5))
+            a.flush()
+    writers = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for writer in writers:
+        writer.start()
+    try:
+        for _ in range(200):
+            assert s.get(None, None) == 100
+            assert s.get(-10, 10) == 20
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+    assert a.get(None, None) > 100
@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+
+from slice_aggregator import (
+    ixs_by_slices,
+    slices_by_ixs,
+)
+from slice_aggregator.by_slices import (
+    FixedSizeAggregator as GenericFixedSizeAggregator,
+    UnboundedAggregator,
+    VariableSizeLeftBoundedAggregator,
+)
+from slice_aggregator.stats import instrument
+from slice_aggregator.vectorized import (
+    FixedSizeAggregator,
+    VectorLeftBoundedAggregator,
+)
+
+
+def test_fixed_size_batch():
+    a = FixedSizeAggregator(table=np.zeros(100, dtype=np.int64))
+    b = GenericFixedSizeAggregator(table=[0] * 100)
+    rng = np.random.RandomState(0)
+    ixs = rng.randint(0, 100, 1000)
+    values = rng.randint(-10, 10, 1000)
+    a.inc_many(ixs, values)
+    for ix, value in zip(ixs.tolist(), values.tolist()):
+        b.inc(ix, value)
+
+    assert a.table.tolist() == b.table
+    starts = rng.randint(0, 100, 200)
+    stops = rng.randint(0, 100, 200)
+    assert a.get_many(starts, stops).tolist() == [b.get(start, stop)
+                                                  for start, stop in zip(starts, stops)]
+    assert a.get_many([None, 10, None], [None, None, 10]).tolist() == [
+        b[:], b[10:], b[:10]]
+    assert a[17] == b[17]
+
+
+def test_fixed_size_vectors():
+    a = FixedSizeAggregator(table=np.zeros((10, 2)))
+    a.inc_many([1, 5, 1], [(1, 2), (10, 20), (100, 200)])
+
+    assert np.array_equal(a.get_many([0, 2], [2, None]), [(101, 202), (10, 20)])
+    assert np.array_equal(a[1:6], (111, 222))
+
+
+def test_fixed_size_index_errors():
+    a = FixedSizeAggregator(table=np.zeros(10))
+
+    with pytest.raises(IndexError):
+        a.inc_many([1, 10], [1, 1])
+    with pytest.raises(IndexError):
+        a.get_many([-1], [3])
+    assert not a.table.any()
+
+
+def test_fixed_size_bulk_construction():
+    values = np.arange(37) % 5 - 2
+    a = GenericFixedSizeAggregator.from_dense(values.tolist(), 3)
+
+    assert FixedSizeAggregator.from_dense(values, 3).table.tolist() == a.table
+    assert FixedSizeAggregator.from_items(
+        zip(range(3, 40), values), size=40, dtype=int).table.tolist() == a.table
+
+
+def test_fixed_size_snapshot():
+    a = FixedSizeAggregator.from_dense(np.arange(8))
+    s = a.snapshot()
+    assert np.shares_memory(s.table, a.table)
+    a.inc(2, 10)
+    assert not np.shares_memory(s.table, a.table)
+    t = a.snapshot()
+    a.inc_many([0, 7], [1, 1])
+    u = a.snapshot()
+    a.merge(FixedSizeAggregator.from_dense(np.ones(8, dtype=int)))
+    assert (s[:], t[:], u[:], a[:]) == (28, 38, 40, 48)
+    with pytest.raises(ValueError):
+        s.inc(0, 1)
+
+
+def test_fixed_size_merge():
+    a = FixedSizeAggregator.from_dense(np.arange(10))
+    a += GenericFixedSizeAggregator.from_dense(list(range(10)))
+
+    assert a.get_many([0, 3], [10, 7]).tolist() == [90, 36]
+
+
+@pytest.mark.parametrize('track_points', [True, False])
+def test_vectors(track_points):
+    a = VectorLeftBoundedAggregator(dim=3, dtype=np.int64, track_points=track_points)
+    b = VariableSizeLeftBoundedAggregator(zero_factory=lambda: np.zeros(3, dtype=np.int64),
+                                          zero_test=lambda value: not value.any())
+    rng = np.random.RandomState(0)
+    for _ in range(300):
+        ix, other = rng.randint(0, 100, 2).tolist()
+        value = rng.randint(-3, 3, 3)
+        a.inc(ix, value)
+        b.inc(ix, value)
+        a._inc_pair(ix, other, value)
+        b._inc_pair(ix, other, value)
+    ixs = rng.randint(0, 100, 50)
+    values = rng.randint(-3, 3, (50, 3))
+    a.inc_many(ixs, values)
+    b.inc_many(ixs, values)
+
+    for start, stop in rng.randint(0, 101, (200, 2)).tolist():
+        assert np.array_equal(a.get(start, stop), b.get(start, stop))
+    assert np.array_equal(a[:], b[:])
+    assert a[:].dtype == np.int64
+    assert sorted(a.heap) == sorted(b.heap)
+    assert [ix for ix, _ in a.nonzero_items()] == [ix for ix, _ in b.nonzero_items()]
+    assert len(a.table) == len(b.table)
+    c = VectorLeftBoundedAggregator.from_items(b.nonzero_items(), dim=3, dtype=np.int64)
+    assert np.array_equal(c.get_many([None, 20], [50, None]), a.get_many([None, 20], [50, None]))
+    a.inc(7, -a[7])
+    assert not a[7].any()
+    assert 7 not in a.heap
+
+
+def test_vector_rows_reused():
+    a = VectorLeftBoundedAggregator(dim=2)
+    for _ in range(3):
+        for ix in range(20):
+            a.inc(ix, (1, 2))
+        for ix in range(20):
+            a.dec(ix, (1, 2))
+    assert not len(a.table)
+    assert len(a.table.rows) == 32
+
+
+def test_vector_factories():
+    a = ixs_by_slices(dim=2, dtype=np.float32)
+    a.inc(-5, (1, 2))
+    a.inc(3, 0.5)
+    assert isinstance(a.nonnegative, VectorLeftBoundedAggregator)
+    assert np.array_equal(a[-10:10], (1.5, 2.5))
+    assert a[:].dtype == np.float32
+
+    b = UnboundedAggregator.from_items([(-5, np.array((1, 2))), (3, np.array((0.5, 0.5)))],
+                                       left_bounded_class=VectorLeftBoundedAggregator, dim=2)
+    assert np.array_equal(b[-10:10], (1.5, 2.5))
+
+    c = slices_by_ixs(items=[(-3, 4, np.array((1, 1))), (0, None, np.array((0, 2)))], dim=2)
+    c[2:5] += np.array((3, 3))
+    assert np.array_equal(c.get_many([-3, 2, 4, 10]), [(1, 1), (4, 6), (3, 5), (0, 2)])
+    with pytest.raises(ValueError):
+        ixs_by_slices(dim=2, typecode='d')
+    with pytest.raises(ValueError):
+        ixs_by_slices(dtype=float)
+
+
+def test_vector_casting():
+    a = ixs_by_slices(dim=2, dtype=int)
+    with pytest.raises(TypeError):
+        a.inc(0, [0.5, 0.5])
+    assert list(a.nonzero_items()) == []
+    a.inc(1, np.array([3, 0], dtype=np.int8))
+    assert [(ix, value.tolist()) for ix, value in a.nonzero_items()] == [(1, [3, 0])]
+    with pytest.raises(TypeError):
+        VectorLeftBoundedAggregator.from_items([(2, np.array([0.5, 0.]))], dim=2, dtype=int)
+
+
+def test_vector_snapshot_and_stats():
+    a = ixs_by_slices(dim=2)
+    a.inc(4, (1, 1))
+    s = a.snapshot()
+    a.inc(2, (1, 0))
+    a.inc_many([4, 9], [(-1, -1), (2, 2)])
+    assert np.array_equal(s[:], (1, 1))
+    assert np.array_equal(a[:], (3, 2))
+
+    stats = instrument(a)
+    a.inc(5, (1, 1))
+    assert np.array_equal(a[:6], (2, 1))
+    stats.detach()
+    assert stats.as_dict()['table_writes'] > 0
+    assert isinstance(a.nonnegative, VectorLeftBoundedAggregator)
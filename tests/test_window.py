@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from slice_aggregator.window import WindowedAggregator
+
+
+def test_windowed():
+    a = WindowedAggregator(window=3)
+    assert a[:] == 0
+    a.inc(10, 1)
+    a.inc(8, 2)
+    a[11] += 4
+    assert a.now == 11
+    assert a[:] == 7
+    assert a[8:11] == 3
+    assert a[8] == 2
+
+    a.inc(12, 8)
+    assert a[8] == 0
+    assert a[:] == 13
+    assert list(a.items()) == [(9, 0), (10, 1), (11, 4), (12, 8)]
+    assert list(a.nonzero_items()) == [(10, 1), (11, 4), (12, 8)]
+    with pytest.raises(IndexError):
+        a.inc(8, 1)
+
+    a.advance(14)
+    assert a[:] == 12
+    a.advance(100)
+    assert a[:] == 0
+    assert len(a.ring.table) == 4
+
+
+def test_windowed_random():
+    rng = random.Random(0)
+    window = 10
+    a = WindowedAggregator(window=window, zero_factory=float)
+    values = {}
+    now = 0
+    for _ in range(2000):
+        now += rng.choice([0, 0, 1, 2, 15])
+        ix = now - rng.randrange(window + 1)
+        value = rng.randrange(-5, 5)
+        a.inc(now, 0)
+        a.inc(ix, value)
+        values[ix] = values.get(ix, 0) + value
+        start = now - rng.randrange(-3, window + 3)
+        stop = start + rng.randrange(window + 3)
+        expected = sum(v for i, v in values.items()
+                       if max(start, now - window) <= i < min(stop, now + 1))
+        assert a[start:stop] == expected
+    assert len(a.points) == 16